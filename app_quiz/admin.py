@@ -1,6 +1,6 @@
 # app_quiz/admin.py
 from django.contrib import admin
-from .models import Quiz, Question
+from .models import GeneratedQuiz, Quiz, Question, QuizBatch, QuizJob, TranscriptCache, VideoMetadata
 
 
 class QuestionInline(admin.TabularInline):
@@ -47,3 +47,55 @@ class QuestionAdmin(admin.ModelAdmin):
     list_filter = ("created_at", "updated_at", "quiz__owner")
     readonly_fields = ("created_at", "updated_at")
     ordering = ("-created_at",)
+
+
+@admin.register(QuizJob)
+class QuizJobAdmin(admin.ModelAdmin):
+    """Read-mostly view on background generation jobs."""
+    list_display = ("id", "owner", "status", "video_url", "quiz", "transcript_source", "audio_trimmed_sec", "attempts", "created_at", "finished_at")
+    list_select_related = ("owner", "quiz")
+    list_filter = ("status", "transcript_source", "created_at")
+    search_fields = ("video_url", "owner__username", "error")
+    readonly_fields = ("created_at", "started_at", "finished_at", "attempts")
+    ordering = ("-created_at",)
+
+
+@admin.register(QuizBatch)
+class QuizBatchAdmin(admin.ModelAdmin):
+    """Bulk ingestion batches; their jobs are listed under Quiz jobs."""
+    list_display = ("id", "owner", "source", "created_at")
+    list_select_related = ("owner",)
+    search_fields = ("owner__username", "source")
+    readonly_fields = ("created_at",)
+    ordering = ("-created_at",)
+
+
+@admin.register(TranscriptCache)
+class TranscriptCacheAdmin(admin.ModelAdmin):
+    """Cached transcripts; deleting rows here is a manual eviction."""
+    list_display = ("video_id", "whisper_model", "language", "duration_sec", "size_bytes", "hit_count", "miss_count", "last_used_at")
+    list_filter = ("whisper_model", "language")
+    search_fields = ("video_id",)
+    readonly_fields = ("size_bytes", "hit_count", "miss_count", "created_at", "last_used_at")
+    exclude = ("transcript",)
+    ordering = ("-last_used_at",)
+
+
+@admin.register(VideoMetadata)
+class VideoMetadataAdmin(admin.ModelAdmin):
+    """Probed video metadata; deleting a row forces a fresh probe."""
+    list_display = ("video_id", "title", "duration_sec", "language", "is_live", "fetched_at")
+    list_filter = ("language", "is_live")
+    search_fields = ("video_id", "title")
+    readonly_fields = ("fetched_at",)
+    ordering = ("-fetched_at",)
+
+
+@admin.register(GeneratedQuiz)
+class GeneratedQuizAdmin(admin.ModelAdmin):
+    """Canonical quizzes copied for new requests; deleting one forces a fresh generation."""
+    list_display = ("video_id", "title", "prompt_version", "llm_model", "transcript_source", "reuse_count", "generated_at")
+    list_filter = ("prompt_version", "llm_model")
+    search_fields = ("video_id", "title")
+    readonly_fields = ("reuse_count", "generated_at")
+    ordering = ("-generated_at",)
@@ -0,0 +1,234 @@
+# app_quiz/admission.py
+"""
+Cross-process admission control for the heavy pipeline stages.
+
+Every gunicorn thread may end up inside generate_quiz_from_youtube; left
+alone, several Whisper runs oversubscribe the cores and the cheap CRUD
+endpoints starve. Limits (all processes together, via FileLock slots in
+ADMISSION_DIR):
+
+- slot("transcribe") / slot("llm"): at most ADMISSION_TRANSCRIBE_SLOTS
+  transcriptions and ADMISSION_LLM_SLOTS Gemini calls at a time
+- user_slot(user_id): at most ADMISSION_USER_INFLIGHT generations per user
+
+A stage without a free slot waits in a bounded queue (ADMISSION_QUEUE_MAX
+waiters per resource, ADMISSION_WAIT_SEC at most); check_capacity() lets
+a caller give up before preparing work the full queue would reject. A full queue, a wait
+timeout or the per-user limit raise Rejected, which the views answer with
+503 / 429 and Retry-After. Waiters are not served in strict FIFO order.
+
+Queue depth is exported live on /metrics, wait times and rejections as
+regular metrics. Kept free of Django imports.
+"""
+from __future__ import annotations
+
+import os
+import tempfile
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Iterator, List, Optional
+
+from filelock import FileLock, Timeout
+
+from app_quiz import metrics
+
+RESOURCES = ("transcribe", "llm")
+
+
+class Rejected(RuntimeError):
+    """No capacity: status 429 (per-user limit) or 503 (server busy), retry after retry_after seconds."""
+
+    def __init__(self, message: str, status: int = 503, retry_after: int = 30):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, str(default)))
+    except ValueError:
+        return default
+
+
+def enabled() -> bool:
+    return os.getenv("ADMISSION", "1").strip().lower() not in {"0", "false", "no", "off"}
+
+
+def _base_dir() -> str:
+    path = os.getenv("ADMISSION_DIR", "").strip() or os.path.join(tempfile.gettempdir(), "quizly-admission")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _slots(resource: str) -> int:
+    defaults = {"transcribe": 2, "llm": 8}
+    return max(1, int(_env_float(f"ADMISSION_{resource.upper()}_SLOTS", defaults.get(resource, 4))))
+
+
+def _retry_after() -> int:
+    return max(1, int(_env_float("ADMISSION_RETRY_AFTER_SEC", 30)))
+
+
+def _queue_dir(resource: str) -> str:
+    path = os.path.join(_base_dir(), f"{resource}.queue")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _try_acquire(prefix: str, slots: int) -> Optional[FileLock]:
+    """First free slot lock, or None. Not thread-local: a slot may be released by another thread."""
+    for i in range(slots):
+        lock = FileLock(os.path.join(_base_dir(), f"{prefix}-{i}.lock"), thread_local=False)
+        try:
+            lock.acquire(timeout=0)
+        except Timeout:
+            continue
+        return lock
+    return None
+
+
+# --------------------------- wait queue ---------------------------
+
+def _tickets(resource: str) -> List[str]:
+    """Live waiter tickets; tickets left behind by killed processes expire."""
+    qdir = _queue_dir(resource)
+    stale_before = time.time() - _env_float("ADMISSION_WAIT_SEC", 120) - 60
+    live = []
+    for name in os.listdir(qdir):
+        path = os.path.join(qdir, name)
+        try:
+            if os.path.getmtime(path) < stale_before:
+                os.remove(path)
+                continue
+        except FileNotFoundError:
+            continue
+        live.append(path)
+    return live
+
+
+def queue_depth(resource: str) -> int:
+    return len(_tickets(resource))
+
+
+def _enqueue(resource: str) -> str:
+    with FileLock(os.path.join(_base_dir(), f"{resource}.queue.lock")):
+        if len(_tickets(resource)) >= int(_env_float("ADMISSION_QUEUE_MAX", 10)):
+            metrics.ADMISSION_REJECTED.inc(resource=resource, reason="queue_full")
+            raise Rejected("Server is busy, please retry later.", 503, _retry_after())
+        ticket = os.path.join(_queue_dir(resource), f"{os.getpid()}-{uuid.uuid4().hex}")
+        open(ticket, "w").close()
+    return ticket
+
+
+def _wait_for_slot(resource: str, slots: int) -> FileLock:
+    ticket = _enqueue(resource)
+    deadline = time.monotonic() + _env_float("ADMISSION_WAIT_SEC", 120)
+    delay = 0.05
+    try:
+        while True:
+            lock = _try_acquire(resource, slots)
+            if lock is not None:
+                return lock
+            if time.monotonic() >= deadline:
+                metrics.ADMISSION_REJECTED.inc(resource=resource, reason="timeout")
+                raise Rejected("Server is busy, please retry later.", 503, _retry_after())
+            time.sleep(delay)
+            delay = min(delay * 2, 1.0)
+    finally:
+        try:
+            os.remove(ticket)
+        except FileNotFoundError:
+            pass
+
+
+# --------------------------- public API ---------------------------
+
+@contextmanager
+def slot(resource: str) -> Iterator[None]:
+    """Hold one of the global slots of resource for the duration of the block."""
+    if not enabled():
+        yield
+        return
+    slots = _slots(resource)
+    started = time.perf_counter()
+    lock = _try_acquire(resource, slots)
+    try:
+        if lock is None:
+            lock = _wait_for_slot(resource, slots)
+    finally:
+        metrics.ADMISSION_WAIT_SECONDS.observe(
+            time.perf_counter() - started, resource=resource, outcome="admitted" if lock else "rejected"
+        )
+    try:
+        yield
+    finally:
+        lock.release()
+
+
+def check_capacity(resource: str) -> None:
+    """
+    Raise Rejected (503) when resource has no free slot and its wait queue
+    is full, so callers fail before expensive preparation (the audio
+    download ahead of slot("transcribe")). A hint only: slot() may still
+    wait for ADMISSION_WAIT_SEC or reject once the work is ready.
+    """
+    if not enabled():
+        return
+    if queue_depth(resource) < int(_env_float("ADMISSION_QUEUE_MAX", 10)):
+        return
+    lock = _try_acquire(resource, _slots(resource))
+    if lock is not None:
+        lock.release()
+        return
+    metrics.ADMISSION_REJECTED.inc(resource=resource, reason="queue_full")
+    raise Rejected("Server is busy, please retry later.", 503, _retry_after())
+
+
+class UserSlot:
+    """Handle of a per-user in-flight slot; release() is idempotent and thread-safe to call elsewhere."""
+
+    def __init__(self, lock: Optional[FileLock]):
+        self._lock = lock
+
+    def release(self) -> None:
+        lock, self._lock = self._lock, None
+        if lock is not None:
+            lock.release()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+def user_slot(user_id) -> UserSlot:
+    """Take one of the user's ADMISSION_USER_INFLIGHT slots or raise Rejected (429)."""
+    if not enabled():
+        return UserSlot(None)
+    limit = max(1, int(_env_float("ADMISSION_USER_INFLIGHT", 2)))
+    lock = _try_acquire(f"user-{user_id}", limit)
+    if lock is None:
+        metrics.ADMISSION_REJECTED.inc(resource="user", reason="user_limit")
+        raise Rejected(
+            f"Too many quiz generations in progress (limit {limit}); wait for one to finish.",
+            429,
+            _retry_after(),
+        )
+    return UserSlot(lock)
+
+
+def _depth_lines() -> List[str]:
+    lines = [
+        "# HELP quizly_admission_queue_depth Pipeline stages waiting for a slot, all processes.",
+        "# TYPE quizly_admission_queue_depth gauge",
+    ]
+    if enabled():
+        for resource in RESOURCES:
+            lines.append(f'quizly_admission_queue_depth{{resource="{resource}"}} {queue_depth(resource)}')
+    return lines
+
+
+metrics.registry.add_collector(_depth_lines)
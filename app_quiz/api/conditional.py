@@ -0,0 +1,107 @@
+"""
+Conditional GET for the quiz read endpoints.
+
+The validators come from one aggregate query over the quiz rows and their
+questions (count and newest updated_at of each), so a 304 costs a single
+SELECT and never reaches the serializer. The ETag additionally covers the
+user and the query string (view, fields, cursor, …), because those change
+the representation. Deleting a quiz lowers the count and therefore changes
+the ETag, but not Last-Modified; If-None-Match takes precedence over
+If-Modified-Since, and browsers send both.
+"""
+import hashlib
+from typing import Optional, Tuple
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, urlencode
+
+from app_quiz.models import Quiz
+
+# Bump when the JSON representation changes, so old ETags stop matching
+REPRESENTATION_VERSION = "1"
+
+Validators = Tuple[str, Optional[int]]
+
+
+def _validators(parts, newest) -> Validators:
+    digest = hashlib.sha256("|".join(str(p) for p in (REPRESENTATION_VERSION, *parts)).encode("utf-8"))
+    last_modified = int(newest.timestamp()) if newest else None
+    return f'"{digest.hexdigest()[:32]}"', last_modified
+
+
+def _newest(*values):
+    values = [v for v in values if v is not None]
+    return max(values) if values else None
+
+
+def query_key(request) -> str:
+    return urlencode(sorted(request.query_params.lists()), doseq=True)
+
+
+def list_validators(request) -> Validators:
+    """ETag / Last-Modified of GET /api/quizzes/ for request.user."""
+    agg = Quiz.objects.filter(owner=request.user).aggregate(
+        quiz_count=Count("id", distinct=True),
+        question_count=Count("questions"),
+        quiz_updated=Max("updated_at"),
+        question_updated=Max("questions__updated_at"),
+    )
+    newest = _newest(agg["quiz_updated"], agg["question_updated"])
+    parts = (
+        "list",
+        request.user.pk,
+        query_key(request),
+        agg["quiz_count"],
+        agg["question_count"],
+        agg["quiz_updated"] and agg["quiz_updated"].isoformat(),
+        agg["question_updated"] and agg["question_updated"].isoformat(),
+    )
+    return _validators(parts, newest)
+
+
+def detail_validators(request, pk) -> Optional[Validators]:
+    """
+    ETag / Last-Modified of GET /api/quizzes/<pk>/, or None when the quiz
+    does not exist or belongs to someone else (the view then answers
+    404/403 as usual, so a 304 never confirms a foreign quiz).
+    """
+    rows = list(
+        Quiz.objects.filter(pk=pk, owner=request.user)
+        .values("updated_at")
+        .annotate(question_count=Count("questions"), question_updated=Max("questions__updated_at"))
+    )
+    if not rows:
+        return None
+    row = rows[0]
+    parts = (
+        "detail",
+        pk,
+        row["question_count"],
+        row["updated_at"].isoformat(),
+        row["question_updated"] and row["question_updated"].isoformat(),
+    )
+    return _validators(parts, _newest(row["updated_at"], row["question_updated"]))
+
+
+def not_modified(request, validators: Optional[Validators]):
+    """304 response if the client's copy is current, else None."""
+    if validators is None:
+        return None
+    etag, last_modified = validators
+    response = get_conditional_response(request._request, etag=etag, last_modified=last_modified)
+    if response is not None:
+        set_validators(response, validators)
+    return response
+
+
+def set_validators(response, validators: Optional[Validators]):
+    if validators is None:
+        return response
+    etag, last_modified = validators
+    response["ETag"] = etag
+    if last_modified is not None:
+        response["Last-Modified"] = http_date(last_modified)
+    # Per user; revalidate on every use (cheap thanks to the 304 path)
+    response["Cache-Control"] = "private, no-cache"
+    return response
@@ -0,0 +1,113 @@
+"""
+Read-only fast path for the quiz read endpoints.
+
+QuizListSerializer, QuizSummarySerializer and QuestionListSerializer are
+pure projections of model columns, so their output can be built straight
+from .values() rows: one query for the quizzes, one for all of their
+questions (grouped by quiz_id in a single pass), and no per-object
+ModelSerializer field machinery. Values are formatted exactly like the
+DRF fields do (datetimes in the current time zone, ISO 8601 with "Z" for
+UTC) and rendered with the settings of DRF's JSONRenderer, so the bytes
+are identical to the serializer path. QUIZ_FAST_SERIALIZATION=0 switches
+back to the serializers.
+"""
+import datetime
+import json
+import os
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from django.conf import settings
+from django.db.models import QuerySet
+from django.utils import timezone
+from rest_framework.settings import api_settings
+
+from app_quiz.api.serializers import QuestionListSerializer, QuizListSerializer, QuizSummarySerializer
+from app_quiz.models import Question
+
+_DATETIME_FIELDS = {"created_at", "updated_at"}
+_QUESTION_FIELDS = tuple(QuestionListSerializer.Meta.fields)
+
+
+def enabled() -> bool:
+    return os.getenv("QUIZ_FAST_SERIALIZATION", "1").strip().lower() not in {"0", "false", "no", "off"}
+
+
+def _datetime_formatter():
+    """DRF DateTimeField.to_representation for the ISO 8601 default format."""
+    tz = timezone.get_current_timezone() if settings.USE_TZ else None
+
+    def fmt(value):
+        if not value:
+            return None
+        if tz is not None:
+            value = value.astimezone(tz) if timezone.is_aware(value) else timezone.make_aware(value, tz)
+        elif timezone.is_aware(value):
+            value = timezone.make_naive(value, datetime.timezone.utc)
+        text = value.isoformat()
+        return text[:-6] + "Z" if text.endswith("+00:00") else text
+
+    return fmt
+
+
+def _columns(fields: Optional[Sequence[str]], summary: bool) -> List[str]:
+    """Output fields in serializer declaration order (like SparseFieldsMixin)."""
+    declared = (QuizSummarySerializer if summary else QuizListSerializer).allowed_fields()
+    return [name for name in declared if fields is None or name in fields]
+
+
+def _rows(source, columns: Sequence[str]) -> List[Dict]:
+    """Column dicts from a queryset (.values, no model instances) or from already loaded instances (a page)."""
+    if isinstance(source, QuerySet):
+        return list(source.values(*columns))
+    return [{name: getattr(obj, name) for name in columns} for obj in source]
+
+
+def _questions_by_quiz(quiz_ids: Iterable[int]) -> Dict[int, List[Dict]]:
+    grouped: Dict[int, List[Dict]] = {}
+    # (quiz_id, id) is the order of the quiz_id index (rowid last): no sort step
+    rows = Question.objects.filter(quiz_id__in=list(quiz_ids)).order_by("quiz_id", "id").values_list(
+        "quiz_id", *_QUESTION_FIELDS
+    )
+    for quiz_id, *values in rows:
+        grouped.setdefault(quiz_id, []).append(dict(zip(_QUESTION_FIELDS, values)))
+    return grouped
+
+
+def quizzes(source, fields: Optional[Sequence[str]] = None, summary: bool = False) -> List[Dict]:
+    """
+    Representation of the quizzes in source (queryset or list of Quiz),
+    equal to QuizListSerializer / QuizSummarySerializer(many=True).data with
+    the same sparse fieldset.
+    """
+    columns = _columns(fields, summary)
+    with_questions = "questions" in columns
+    db_columns = [name for name in columns if name != "questions"]
+    if with_questions and "id" not in db_columns:
+        db_columns.append("id")
+    rows = _rows(source, db_columns)
+
+    questions = _questions_by_quiz(row["id"] for row in rows) if with_questions else {}
+    fmt = _datetime_formatter()
+    result = []
+    for row in rows:
+        item = {}
+        for name in columns:
+            if name == "questions":
+                item[name] = questions.get(row["id"], [])
+            elif name in _DATETIME_FIELDS:
+                item[name] = fmt(row[name])
+            else:
+                item[name] = row[name]
+        result.append(item)
+    return result
+
+
+def render(data) -> bytes:
+    """JSONRenderer().render(data) for plain data, with the configured DRF JSON settings."""
+    text = json.dumps(
+        data,
+        ensure_ascii=not api_settings.UNICODE_JSON,
+        allow_nan=not api_settings.STRICT_JSON,
+        separators=(",", ":") if api_settings.COMPACT_JSON else (", ", ": "),
+    )
+    return text.replace("\u2028", "\\u2028").replace("\u2029", "\\u2029").encode()
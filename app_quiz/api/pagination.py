@@ -0,0 +1,28 @@
+import os
+
+from rest_framework.pagination import CursorPagination
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, str(default)))
+    except ValueError:
+        return default
+
+
+class QuizCursorPagination(CursorPagination):
+    """
+    Keyset pagination on (created_at, id), newest first: every page is one
+    indexed range query, however many quizzes the user has. Opt-in, see
+    QuizListView.paginator; the next/previous links carry the cursor.
+    """
+    ordering = ("-created_at", "-id")
+    page_size_query_param = "page_size"
+
+    def __init__(self):
+        self.page_size = max(1, _env_int("QUIZ_PAGE_SIZE", 20))
+        self.max_page_size = max(self.page_size, _env_int("QUIZ_MAX_PAGE_SIZE", 100))
+
+    @classmethod
+    def requested(cls, request) -> bool:
+        return "cursor" in request.query_params or cls.page_size_query_param in request.query_params
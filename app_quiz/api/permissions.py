@@ -1,5 +1,5 @@
 from rest_framework.permissions import BasePermission
-from app_quiz.models import Quiz
+from app_quiz.models import Quiz, QuizBatch, QuizJob
 
 
 class IsQuizOwner(BasePermission):
@@ -9,3 +9,21 @@ class IsQuizOwner(BasePermission):
 
     def has_object_permission(self, request, view, obj: Quiz):
         return obj.owner_id == request.user.id
+
+
+class IsJobOwner(BasePermission):
+    """
+    Grants access only to the user who submitted the job.
+    """
+
+    def has_object_permission(self, request, view, obj: QuizJob):
+        return obj.owner_id == request.user.id
+
+
+class IsBatchOwner(BasePermission):
+    """
+    Grants access only to the user who submitted the batch.
+    """
+
+    def has_object_permission(self, request, view, obj: QuizBatch):
+        return obj.owner_id == request.user.id
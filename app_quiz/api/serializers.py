@@ -1,12 +1,16 @@
 from typing import Any
 from urllib.parse import urlparse
 
+from django.urls import reverse
 from rest_framework import serializers
-from app_quiz.models import Quiz, Question
+from app_quiz import batches
+from app_quiz.models import Quiz, Question, QuizBatch, QuizJob
 
 
 class CreateQuizRequestSerializer(serializers.Serializer):
     url = serializers.URLField()
+    # Ignore an existing quiz of the same video and generate a new one
+    force_regenerate = serializers.BooleanField(required=False, default=False)
 
     def validate_url(self, value: str) -> str:
         """
@@ -61,7 +65,25 @@ class QuestionListSerializer(serializers.ModelSerializer):
         fields = ["id", "question_title", "question_options", "answer"]
 
 
-class QuizListSerializer(serializers.ModelSerializer):
+class SparseFieldsMixin:
+    """
+    Sparse fieldsets: with context["fields"] (from ?fields=a,b) only those
+    fields are rendered. The view validates the names against allowed_fields().
+    """
+
+    @classmethod
+    def allowed_fields(cls):
+        return list(cls.Meta.fields)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        wanted = self.context.get("fields")
+        if wanted:
+            for name in set(self.fields) - set(wanted):
+                self.fields.pop(name)
+
+
+class QuizListSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     questions = QuestionListSerializer(many=True, read_only=True)
 
     class Meta:
@@ -77,6 +99,23 @@ class QuizListSerializer(serializers.ModelSerializer):
         ]
 
 
+class QuizSummarySerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    """?view=summary: quiz metadata plus the annotated question count, no Question rows."""
+    question_count = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = Quiz
+        fields = [
+            "id",
+            "title",
+            "description",
+            "created_at",
+            "updated_at",
+            "video_url",
+            "question_count",
+        ]
+
+
 class QuizPatchSerializer(serializers.ModelSerializer):
     class Meta:
         model = Quiz
@@ -91,3 +130,76 @@ class QuizPatchSerializer(serializers.ModelSerializer):
         if not value:
             raise serializers.ValidationError("Title must not be empty.")
         return value
+
+
+class QuizJobSerializer(serializers.ModelSerializer):
+    job_id = serializers.IntegerField(source="id", read_only=True)
+    quiz_id = serializers.IntegerField(read_only=True, allow_null=True)
+    status_url = serializers.SerializerMethodField()
+    quiz_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = QuizJob
+        fields = [
+            "job_id",
+            "status",
+            "video_url",
+            "quiz_id",
+            "quiz_url",
+            "status_url",
+            "error",
+            "transcript_source",
+            "audio_trimmed_sec",
+            "created_at",
+            "started_at",
+            "finished_at",
+        ]
+        read_only_fields = fields
+
+    def get_status_url(self, obj: QuizJob) -> str:
+        return reverse("quiz-job-detail", kwargs={"pk": obj.id})
+
+    def get_quiz_url(self, obj: QuizJob) -> Any:
+        if obj.quiz_id is None:
+            return None
+        return reverse("quiz-detail", kwargs={"pk": obj.quiz_id})
+
+
+class BatchCreateRequestSerializer(serializers.Serializer):
+    """URL list and/or playlist; every entry may itself be a playlist URL."""
+    urls = serializers.ListField(child=serializers.CharField(max_length=500), required=False, default=list)
+    playlist_url = serializers.URLField(required=False, allow_blank=True, default="")
+    force_regenerate = serializers.BooleanField(required=False, default=False)
+
+    def validate(self, attrs):
+        if not attrs["urls"] and not attrs["playlist_url"]:
+            raise serializers.ValidationError("Provide urls and/or playlist_url.")
+        return attrs
+
+
+class QuizBatchSerializer(serializers.ModelSerializer):
+    batch_id = serializers.IntegerField(source="id", read_only=True)
+    progress = serializers.SerializerMethodField()
+    finished = serializers.SerializerMethodField()
+    status_url = serializers.SerializerMethodField()
+    jobs = QuizJobSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = QuizBatch
+        fields = ["batch_id", "source", "created_at", "progress", "finished", "status_url", "jobs"]
+        read_only_fields = fields
+
+    def _progress(self, obj: QuizBatch):
+        if not hasattr(obj, "_progress_cache"):
+            obj._progress_cache = batches.progress(obj)
+        return obj._progress_cache
+
+    def get_progress(self, obj: QuizBatch):
+        return self._progress(obj)
+
+    def get_finished(self, obj: QuizBatch) -> bool:
+        return batches.is_finished(obj, self._progress(obj))
+
+    def get_status_url(self, obj: QuizBatch) -> str:
+        return reverse("quiz-batch-detail", kwargs={"pk": obj.id})
+
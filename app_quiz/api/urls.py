@@ -1,8 +1,22 @@
 from django.urls import path
-from app_quiz.api.views import CreateQuizFromYoutubeView, QuizDetailView, QuizListView 
+from app_quiz.api.views import (
+    CreateQuizFromYoutubeView,
+    CreateQuizStreamView,
+    QuizBatchCreateView,
+    QuizBatchDetailView,
+    QuizDetailView,
+    QuizJobDetailView,
+    QuizListView,
+    ReadinessView,
+)
 
 urlpatterns = [
     path("createQuiz/", CreateQuizFromYoutubeView.as_view(), name="create-quiz"),
+    path("createQuiz/stream/", CreateQuizStreamView.as_view(), name="create-quiz-stream"),
     path("quizzes/", QuizListView.as_view(), name="quiz-list"),
     path("quizzes/<int:pk>/", QuizDetailView.as_view(), name="quiz-detail"),
+    path("jobs/<int:pk>/", QuizJobDetailView.as_view(), name="quiz-job-detail"),
+    path("batches/", QuizBatchCreateView.as_view(), name="quiz-batch-list"),
+    path("batches/<int:pk>/", QuizBatchDetailView.as_view(), name="quiz-batch-detail"),
+    path("health/ready/", ReadinessView.as_view(), name="health-ready"),
 ]
@@ -1,31 +1,70 @@
-from typing import List, Dict
+import hmac
 import logging
+import os
+import queue
+import threading
 
+from django.db import close_old_connections, transaction
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.http import HttpResponse, StreamingHttpResponse
 from rest_framework import status, generics
+from rest_framework.exceptions import ValidationError
+from rest_framework.renderers import JSONRenderer
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAuthenticated
 from app_auth.authentication import CookieJWTAuthentication
-from app_quiz.api.permissions import IsQuizOwner
+from app_quiz.api import conditional, fast_serialization
+from app_quiz.api.pagination import QuizCursorPagination
+from app_quiz.api.permissions import IsBatchOwner, IsJobOwner, IsQuizOwner
 from app_quiz.api.serializers import (
+    BatchCreateRequestSerializer,
     CreateQuizRequestSerializer,
+    QuizBatchSerializer,
+    QuizJobSerializer,
     QuizPatchSerializer,
     QuizWithQuestionsSerializer,
-    QuizListSerializer
+    QuizListSerializer,
+    QuizSummarySerializer,
 )
-from app_quiz.models import Quiz, Question
+from app_quiz import admission, batches, jobs, metrics, payload_cache, streaming
+from app_quiz.models import Question, Quiz, QuizBatch, QuizJob
 import app_quiz.utils as utils
 from app_quiz.utils import generate_quiz_from_youtube
 
 
 logger = logging.getLogger(__name__)
 
+_TRUTHY = {"1", "true", "yes", "on"}
+
+
+def _rejected_response(exc: "admission.Rejected") -> Response:
+    """429 (per-user limit) or 503 (server busy) with Retry-After."""
+    return Response({"detail": str(exc)}, status=exc.status, headers={"Retry-After": str(exc.retry_after)})
+
+
+def _wants_async(request) -> bool:
+    """Async mode is opt-in via ?async=true or the RFC 7240 Prefer header."""
+    if (request.query_params.get("async") or "").strip().lower() in _TRUTHY:
+        return True
+    return "respond-async" in request.headers.get("Prefer", "").lower()
+
+
 class CreateQuizFromYoutubeView(APIView):
     """
     POST /api/createQuiz/
 
     Authenticated only. Creates a new quiz from a YouTube URL and returns
     the created quiz with all questions as specified.
+
+    With ?async=true (or "Prefer: respond-async") the request is queued
+    instead and answered with 202 + job; poll GET /api/jobs/{id}/.
+
+    An Idempotency-Key header makes retries reattach to the first request's
+    job: finished work is replayed, running work is awaited (sync) or
+    returned as 202 (async). Concurrent requests for the same video share
+    one pipeline run (utils.generate_quiz_coalesced), each gets its own quiz.
     """
     authentication_classes = [CookieJWTAuthentication]
     permission_classes = [IsAuthenticated]
@@ -36,24 +75,71 @@ class CreateQuizFromYoutubeView(APIView):
             return Response(req_ser.errors, status=status.HTTP_400_BAD_REQUEST)
 
         url = req_ser.validated_data["url"]
+        force = req_ser.validated_data["force_regenerate"]
+        run_async = _wants_async(request)
+        idempotency_key = request.headers.get("Idempotency-Key", "").strip()[:255]
+
+        if run_async:
+            # Opt-in: hand the pipeline to the worker pool and answer right away.
+            # Reject bad links (e.g. Shorts) now instead of as a failed job.
+            try:
+                video_id, _ = utils._parse_video_id(url)
+            except ValueError as e:
+                return Response({"url": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            if not video_id:
+                return Response({"url": "Invalid YouTube URL."}, status=status.HTTP_400_BAD_REQUEST)
+
+        job = None
+        if idempotency_key:
+            job, created = jobs.get_or_create_keyed_job(
+                request.user, url, idempotency_key, run_inline=not run_async, force_regenerate=force
+            )
+            if job.video_url != url:
+                return Response(
+                    {"detail": "Idempotency-Key was already used with a different URL."},
+                    status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                )
+            if not created:
+                # Client retry: reattach to the original work instead of starting over
+                replay = self._reattach(request, job, run_async)
+                if replay is not None:
+                    return replay
+        elif run_async:
+            job = jobs.enqueue_quiz_job(request.user, url, force_regenerate=force)
+
+        if run_async:
+            return _job_accepted(request, job)
 
         try:
-            generated = utils.generate_quiz_from_youtube(url)
-            # expected keys: title, description, questions
-            title = (generated.get("title") or "").strip()
-            description = generated.get("description") or ""
-            questions_data: List[Dict] = generated.get("questions") or []
+            # Same video already generated (any user): copy it, skip the pipeline
+            reused = None if force else utils.reuse_canonical_quiz(request.user, url)
+            if reused is None:
+                with admission.user_slot(request.user.id):
+                    generated = utils.generate_quiz_coalesced(url)
+                # expected keys: title, description, questions
+                title = (generated.get("title") or "").strip()
+
+        except admission.Rejected as e:
+            if job is not None:
+                jobs.fail_job(job, str(e))
+            return _rejected_response(e)
 
         except ValueError as e:
+            if job is not None:
+                jobs.fail_job(job, str(e))
             return Response({"url": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
         except NotImplementedError as e:
+            if job is not None:
+                jobs.fail_job(job, "Quiz generation failed.")
             # Explicit 500 per spec if internal logic not implemented
             return Response(
                 {"detail": "Internal error: quiz generation not implemented."},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR,
             )
         except Exception:
+            if job is not None:
+                jobs.fail_job(job, "Quiz generation failed.")
             # Do not leak internals; return 500 per spec
             # <- zeigt vollständigen Trace im Terminal
             logger.exception("createQuiz failed")
@@ -62,56 +148,313 @@ class CreateQuizFromYoutubeView(APIView):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR,
             )
 
+        if reused is not None:
+            quiz, record = reused
+            if job is not None:
+                jobs.complete_job(job, quiz, {"meta": {"transcript_source": record.transcript_source}})
+            headers = {"X-Quiz-Source": "reused"}
+            if record.transcript_source:
+                headers["X-Transcript-Source"] = record.transcript_source
+            return Response(
+                QuizWithQuestionsSerializer(instance=quiz).data, status=status.HTTP_201_CREATED, headers=headers
+            )
+
         if not title:
+            if job is not None:
+                jobs.fail_job(job, "Quiz generation failed.")
             return Response(
                 {"detail": "Invalid generated data: title missing."},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR,
             )
 
-        # Create quiz
-        quiz = Quiz.objects.create(
-            owner=request.user,
-            title=title,
-            description=description,
-            video_url=url,
+        try:
+            with transaction.atomic():
+                quiz = utils.persist_generated_quiz(request.user, url, generated)
+                if job is not None:
+                    jobs.complete_job(job, quiz, generated)
+        except Exception:
+            # Otherwise the keyed job stays RUNNING and retries wait on it until they time out
+            if job is not None:
+                jobs.fail_job(job, "Quiz generation failed.")
+            raise
+
+        resp_ser = QuizWithQuestionsSerializer(instance=quiz)
+        meta = generated.get("meta") or {}
+        headers = {"X-Quiz-Source": "generated"}
+        if meta.get("transcript_source"):
+            headers["X-Transcript-Source"] = meta["transcript_source"]
+        return Response(resp_ser.data, status=status.HTTP_201_CREATED, headers=headers)
+
+    def _reattach(self, request, job: QuizJob, run_async: bool):
+        """
+        Response for a repeated Idempotency-Key, or None when this request
+        should run the pipeline itself (the earlier attempt failed and we
+        won the restart).
+        """
+        if not run_async:
+            job = jobs.wait_for_job(job, timeout=_idempotency_wait_seconds())
+        if job.status == QuizJob.STATUS_SUCCEEDED and job.quiz_id:
+            resp_ser = QuizWithQuestionsSerializer(instance=job.quiz)
+            return Response(
+                resp_ser.data,
+                status=status.HTTP_201_CREATED,
+                headers={"Idempotent-Replayed": "true"},
+            )
+        if job.status == QuizJob.STATUS_FAILED:
+            if run_async:
+                jobs.restart_failed_job(job, queued=True)
+            elif jobs.restart_failed_job(job):
+                return None
+        # Still queued/running (or restarted by a concurrent retry)
+        return _job_accepted(request, job)
+
+
+def _idempotency_wait_seconds() -> float:
+    try:
+        return float(os.getenv("IDEMPOTENCY_WAIT_SEC", "600"))
+    except ValueError:
+        return 600.0
+
+
+def _job_accepted(request, job: QuizJob) -> Response:
+    job_ser = QuizJobSerializer(instance=job, context={"request": request})
+    return Response(
+        job_ser.data,
+        status=status.HTTP_202_ACCEPTED,
+        headers={"Location": job_ser.data["status_url"]},
+    )
+
+class CreateQuizStreamView(APIView):
+    """
+    POST /api/createQuiz/stream/
+
+    Streaming variant of createQuiz (text/event-stream). Events:
+    - progress: {"stage": "captions" | "downloading" | "transcribing" |
+      "transcript" | "generating" | "saving", "percent"?: int, ...}
+    - question: {"index", "question_title", "question_options", "answer"},
+      sent as soon as Gemini has streamed the question
+    - quiz: the persisted quiz, same shape as the createQuiz response
+    - error: {"detail", "status", "retry_after"?}; ends the stream
+    Runs the pipeline for this request only (no job record, no coalescing).
+    The per-user in-flight limit is checked up front (429); a busy server
+    is reported as an error event with status 503.
+    """
+    authentication_classes = [CookieJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, *args, **kwargs):
+        req_ser = CreateQuizRequestSerializer(data=request.data)
+        if not req_ser.is_valid():
+            return Response(req_ser.errors, status=status.HTTP_400_BAD_REQUEST)
+        url = req_ser.validated_data["url"]
+        try:
+            video_id, _ = utils._parse_video_id(url)
+        except ValueError as e:
+            return Response({"url": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        if not video_id:
+            return Response({"url": "Invalid YouTube URL."}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            user_slot = admission.user_slot(request.user.id)
+        except admission.Rejected as e:
+            return _rejected_response(e)
+        response = StreamingHttpResponse(
+            _quiz_event_stream(request.user, url, user_slot), content_type="text/event-stream"
         )
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"  # nginx: do not buffer the stream
+        return response
 
-        # Create questions
-        question_objs = []
-        for q in questions_data:
-            q_title = (q.get("question_title") or "").strip()
-            q_options = q.get("question_options") or []
-            q_answer = (q.get("answer") or "").strip()
-
-            # Basic server-side sanity checks to avoid empty records
-            if not q_title or not isinstance(q_options, list) or not q_options or not q_answer:
-                continue
-
-            question_objs.append(
-                Question(
-                    quiz=quiz,
-                    question_title=q_title,
-                    question_options=q_options,
-                    answer=q_answer,
-                )
+
+def _sse_keepalive_seconds() -> float:
+    try:
+        return float(os.getenv("SSE_KEEPALIVE_SEC", "15"))
+    except ValueError:
+        return 15.0
+
+
+def _quiz_event_stream(user, url: str, user_slot: "admission.UserSlot"):
+    """
+    Runs the pipeline in a helper thread and relays its callbacks as SSE
+    frames; the quiz is persisted here once generation has finished.
+    The helper thread releases user_slot when the pipeline is done.
+    """
+    events: "queue.Queue" = queue.Queue()
+
+    def progress(stage: str, **info):
+        events.put(("progress", {"stage": stage, **info}))
+
+    def on_question(question: dict, index: int):
+        events.put(("question", {"index": index, **question}))
+
+    def run():
+        try:
+            events.put(("result", utils.generate_quiz_from_youtube(url, progress=progress, on_question=on_question)))
+        except admission.Rejected as e:
+            events.put(("error", {"detail": str(e), "status": e.status, "retry_after": e.retry_after}))
+        except ValueError as e:
+            events.put(("error", {"detail": str(e), "status": 400}))
+        except Exception:
+            logger.exception("createQuiz stream failed")
+            events.put(("error", {"detail": "Internal server error.", "status": 500}))
+        finally:
+            user_slot.release()
+            close_old_connections()
+
+    threading.Thread(target=run, name="quiz-stream", daemon=True).start()
+    while True:
+        try:
+            kind, data = events.get(timeout=_sse_keepalive_seconds())
+        except queue.Empty:
+            yield b": keepalive\n\n"  # comment frame keeps proxies from timing out
+            continue
+        if kind != "result":
+            yield streaming.sse_event(kind, data)
+            if kind == "error":
+                return
+            continue
+
+        yield streaming.sse_event("progress", {"stage": "saving"})
+        try:
+            quiz = utils.persist_generated_quiz(user, url, data)
+        except Exception:
+            logger.exception("createQuiz stream: saving the quiz failed")
+            yield streaming.sse_event("error", {"detail": "Internal server error.", "status": 500})
+            return
+        yield streaming.sse_event("quiz", QuizWithQuestionsSerializer(instance=quiz).data)
+        return
+
+
+def _cached_read(request, key, cache_name, validators_fn, respond):
+    """
+    GET path of the quiz read views: payload cache entry, else validators
+    and conditional GET (304), else the regular response, whose rendered
+    body is stored under key. key is None when the cache does not apply.
+    """
+    if key is not None:
+        entry = payload_cache.get(key, cache_name)
+        if entry is not None:
+            validators = (entry["etag"], entry["last_modified"])
+            return conditional.not_modified(request, validators) or conditional.set_validators(
+                HttpResponse(entry["body"], content_type="application/json"), validators
             )
-        if question_objs:
-            Question.objects.bulk_create(question_objs)
+    validators = validators_fn()
+    not_modified = conditional.not_modified(request, validators)
+    if not_modified is not None:
+        return not_modified
+    response = respond()
+    if key is None or validators is None or response.status_code != 200:
+        return conditional.set_validators(response, validators)
+    if isinstance(response, Response):
+        response = HttpResponse(JSONRenderer().render(response.data), content_type="application/json")
+    payload_cache.put(key, response.content, validators)
+    return conditional.set_validators(response, validators)
+
+
+def _renders_json(request) -> bool:
+    # Browsable API and other renderers take the regular DRF path
+    return getattr(request.accepted_renderer, "format", None) == "json"
+
+
+def _payload_cacheable(request) -> bool:
+    return payload_cache.enabled() and _renders_json(request)
+
+
+def _fast_serialization(request) -> bool:
+    return fast_serialization.enabled() and _renders_json(request)
+
+
+def _json_response(data) -> HttpResponse:
+    return HttpResponse(fast_serialization.render(data), content_type="application/json")
 
-        resp_ser = QuizWithQuestionsSerializer(instance=quiz)
-        return Response(resp_ser.data, status=status.HTTP_201_CREATED)
 
 class QuizListView(generics.ListAPIView):
     """
     GET /api/quizzes/
     Returns all quizzes of the authenticated user, including questions.
+    Opt-in query parameters:
+    - page_size / cursor: cursor pagination on (created_at, id)
+    - view=summary: question_count instead of the questions (no Question rows loaded)
+    - fields=id,title,…: only these fields
+    Sends ETag / Last-Modified; a matching If-None-Match or
+    If-Modified-Since is answered with 304 before anything is serialized.
+    Rendered pages are kept in the payload cache (app_quiz.payload_cache)
+    and built from .values() rows (app_quiz.api.fast_serialization).
     """
     authentication_classes = [CookieJWTAuthentication]
     permission_classes = [IsAuthenticated]
-    serializer_class = QuizListSerializer
+    pagination_class = QuizCursorPagination
+
+    def get(self, request, *args, **kwargs):
+        return _cached_read(
+            request,
+            payload_cache.list_key(request) if _payload_cacheable(request) else None,
+            "quiz_list",
+            lambda: conditional.list_validators(request),
+            lambda: self.list(request, *args, **kwargs),
+        )
+
+    @property
+    def paginator(self):
+        # Without page_size/cursor the response stays the plain list
+        if not QuizCursorPagination.requested(self.request):
+            return None
+        return super().paginator
+
+    def _summary(self) -> bool:
+        view = (self.request.query_params.get("view") or "full").strip().lower()
+        if view not in {"full", "summary"}:
+            raise ValidationError({"view": "Use 'full' or 'summary'."})
+        return view == "summary"
+
+    def _fields(self):
+        raw = self.request.query_params.get("fields")
+        if not raw:
+            return None
+        wanted = [name.strip() for name in raw.split(",") if name.strip()]
+        unknown = set(wanted) - set(self.get_serializer_class().allowed_fields())
+        if unknown:
+            raise ValidationError({"fields": f"Unknown field(s): {', '.join(sorted(unknown))}."})
+        return wanted
+
+    def get_serializer_class(self):
+        return QuizSummarySerializer if self._summary() else QuizListSerializer
+
+    def list(self, request, *args, **kwargs):
+        if not _fast_serialization(request):
+            return super().list(request, *args, **kwargs)
+        queryset = self.get_queryset()
+        page = self.paginate_queryset(queryset)
+        data = fast_serialization.quizzes(queryset if page is None else page, self._fields(), self._summary())
+        if page is not None:
+            # Same shape as CursorPagination.get_paginated_response
+            data = {
+                "next": self.paginator.get_next_link(),
+                "previous": self.paginator.get_previous_link(),
+                "results": data,
+            }
+        return _json_response(data)
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context["fields"] = self._fields()
+        return context
 
     def get_queryset(self):
-        return Quiz.objects.filter(owner=self.request.user).prefetch_related("questions")
+        queryset = Quiz.objects.filter(owner=self.request.user).order_by("-created_at", "-id")
+        fields = self._fields()
+        if self._summary():
+            if fields is None or "question_count" in fields:
+                # Correlated COUNT instead of JOIN + GROUP BY: the list keeps the index order
+                counts = (
+                    Question.objects.filter(quiz=OuterRef("pk")).order_by().values("quiz").annotate(n=Count("id")).values("n")
+                )
+                queryset = queryset.annotate(question_count=Coalesce(Subquery(counts), 0))
+            return queryset
+        if (fields is None or "questions" in fields) and not _fast_serialization(self.request):
+            queryset = queryset.prefetch_related("questions")
+        return queryset
+
 
 class QuizDetailView(generics.RetrieveUpdateDestroyAPIView):
     """
@@ -122,6 +465,27 @@ class QuizDetailView(generics.RetrieveUpdateDestroyAPIView):
     permission_classes = [IsAuthenticated, IsQuizOwner]
     queryset = Quiz.objects.all().prefetch_related("questions")
 
+    def get(self, request, *args, **kwargs):
+        # Payload cache + conditional GET, see _cached_read
+        pk = kwargs["pk"]
+        return _cached_read(
+            request,
+            payload_cache.detail_key(request, pk) if _payload_cacheable(request) else None,
+            "quiz_detail",
+            lambda: conditional.detail_validators(request, pk),
+            lambda: self.retrieve(request, *args, **kwargs),
+        )
+
+    def get_queryset(self):
+        if self.request.method == "GET" and _fast_serialization(self.request):
+            return Quiz.objects.all()  # questions come as .values() rows
+        return super().get_queryset()
+
+    def retrieve(self, request, *args, **kwargs):
+        if not _fast_serialization(request):
+            return super().retrieve(request, *args, **kwargs)
+        return _json_response(fast_serialization.quizzes([self.get_object()])[0])
+
     def get_serializer_class(self):
         return QuizPatchSerializer if self.request.method.upper() == "PATCH" else QuizListSerializer
 
@@ -141,3 +505,103 @@ class QuizDetailView(generics.RetrieveUpdateDestroyAPIView):
         instance = self.get_object()
         self.perform_destroy(instance)
         return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class QuizJobDetailView(generics.RetrieveAPIView):
+    """
+    GET /api/jobs/{id}/
+    Status of an async createQuiz job; links the quiz once it succeeded.
+    """
+    authentication_classes = [CookieJWTAuthentication]
+    permission_classes = [IsAuthenticated, IsJobOwner]
+    serializer_class = QuizJobSerializer
+    queryset = QuizJob.objects.all()
+
+
+class QuizBatchCreateView(APIView):
+    """
+    POST /api/batches/
+    Queue quiz generation for a URL list and/or playlist. Videos the user
+    already has a quiz for are skipped; the worker pool processes the rest.
+    """
+    authentication_classes = [CookieJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, *args, **kwargs):
+        req = BatchCreateRequestSerializer(data=request.data)
+        req.is_valid(raise_exception=True)
+        urls = list(req.validated_data["urls"])
+        playlist_url = req.validated_data["playlist_url"]
+        if playlist_url:
+            urls.append(playlist_url)
+        try:
+            batch, summary = batches.create_batch(
+                request.user,
+                urls,
+                source=playlist_url,
+                force_regenerate=req.validated_data["force_regenerate"],
+            )
+        except ValueError as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        data = QuizBatchSerializer(instance=batch, context={"request": request}).data
+        data["summary"] = summary
+        return Response(data, status=status.HTTP_202_ACCEPTED, headers={"Location": data["status_url"]})
+
+
+class QuizBatchDetailView(generics.RetrieveAPIView):
+    """
+    GET /api/batches/{id}/
+    Progress of a batch and the state of each of its jobs.
+    """
+    authentication_classes = [CookieJWTAuthentication]
+    permission_classes = [IsAuthenticated, IsBatchOwner]
+    serializer_class = QuizBatchSerializer
+    queryset = QuizBatch.objects.all().prefetch_related("jobs")
+
+
+class ReadinessView(APIView):
+    """
+    GET /api/health/ready/
+    Public readiness probe. Reports whether Whisper is warm in this worker;
+    answers 503 while WHISPER_PRELOAD is on but the model is not loaded yet.
+    """
+    authentication_classes = []
+    permission_classes = [AllowAny]
+
+    def get(self, request, *args, **kwargs):
+        preload = utils.whisper_preload_enabled()
+        loaded = utils.whisper_model_loaded()
+        ready = loaded or not preload
+        payload = {
+            "ready": ready,
+            "whisper_model": utils._whisper_model_name(),
+            "whisper_loaded": loaded,
+            "whisper_preload": preload,
+        }
+        return Response(
+            payload,
+            status=status.HTTP_200_OK if ready else status.HTTP_503_SERVICE_UNAVAILABLE,
+        )
+
+
+class MetricsView(APIView):
+    """
+    GET /metrics
+    Prometheus text exposition, summed over all server processes.
+    Optional METRICS_TOKEN requires "Authorization: Bearer <token>".
+    """
+    authentication_classes = []
+    permission_classes = [AllowAny]
+
+    def get(self, request, *args, **kwargs):
+        if not metrics.enabled():
+            return Response(status=status.HTTP_404_NOT_FOUND)
+        token = os.getenv("METRICS_TOKEN", "")
+        if token:
+            given = request.headers.get("Authorization", "").removeprefix("Bearer ").strip()
+            if not hmac.compare_digest(given, token):
+                return Response({"detail": "Invalid metrics token."}, status=status.HTTP_401_UNAUTHORIZED)
+        return HttpResponse(
+            metrics.registry.render(),
+            content_type="text/plain; version=0.0.4; charset=utf-8",
+        )
@@ -1,6 +1,20 @@
+import os
+
 from django.apps import AppConfig
 
 
 class AppQuizConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'app_quiz'
+
+    def ready(self):
+        from app_quiz import payload_cache  # noqa: F401  (registers the invalidation signals)
+
+        # Only the server process preloads (gunicorn.conf.py sets the marker);
+        # manage.py commands like migrate must not pay for loading Whisper.
+        if os.getenv("QUIZLY_SERVER_PROCESS") != "gunicorn":
+            return
+        from app_quiz import utils
+
+        if utils.whisper_preload_enabled():
+            utils.preload_whisper_model()
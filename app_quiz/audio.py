@@ -0,0 +1,80 @@
+# app_quiz/audio.py
+"""
+Audio decoding for Whisper.
+
+The downloaded stream (webm/opus, m4a, …) is decoded exactly once by
+ffmpeg, straight to the format Whisper works on internally: 16 kHz mono
+float32 PCM. The samples are read from ffmpeg's stdout into a NumPy
+buffer, or written to a raw file and memory-mapped for very long audio.
+No intermediate m4a is produced and Whisper does not run ffmpeg again.
+"""
+from __future__ import annotations
+
+import os
+import subprocess
+import tempfile
+from typing import Optional
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+
+
+def lean_decode_enabled() -> bool:
+    return os.getenv("AUDIO_LEAN_DECODE", "1").strip().lower() not in {"0", "false", "no", "off"}
+
+
+def _ffmpeg_bin() -> str:
+    return os.getenv("FFMPEG_PATH", "ffmpeg")
+
+
+def decode_pcm(path: str, memmap_path: Optional[str] = None) -> np.ndarray:
+    """
+    Decode any ffmpeg-readable file to 16 kHz mono float32 samples.
+    With memmap_path the PCM goes to that raw file and is returned as a
+    copy-on-write memory map instead of a heap buffer.
+    """
+    cmd = [
+        _ffmpeg_bin(), "-nostdin", "-hide_banner", "-loglevel", "error",
+        "-threads", "0",
+        "-i", path,
+        "-vn", "-ac", "1", "-ar", str(SAMPLE_RATE),
+        "-f", "f32le",
+    ]
+    try:
+        if memmap_path:
+            subprocess.run([*cmd, "-y", memmap_path], check=True, capture_output=True)
+            if os.path.getsize(memmap_path) == 0:
+                return np.zeros(0, dtype=np.float32)
+            return np.memmap(memmap_path, dtype=np.float32, mode="c")
+
+        # Stream stdout into one mutable buffer (torch wants writable arrays).
+        # stderr goes to a file: a full stderr pipe would block ffmpeg while we wait on stdout.
+        buf = bytearray()
+        with tempfile.TemporaryFile() as errors:
+            with subprocess.Popen([*cmd, "-"], stdout=subprocess.PIPE, stderr=errors) as proc:
+                while True:
+                    chunk = proc.stdout.read(1 << 20)
+                    if not chunk:
+                        break
+                    buf += chunk
+            if proc.returncode != 0:
+                errors.seek(0)
+                detail = errors.read().decode("utf-8", errors="replace").strip()
+                raise RuntimeError(f"ffmpeg failed to decode audio: {detail}")
+    except FileNotFoundError as e:
+        raise RuntimeError(f"ffmpeg not found ({_ffmpeg_bin()}).") from e
+    except subprocess.CalledProcessError as e:
+        detail = e.stderr.decode("utf-8", errors="replace").strip()
+        raise RuntimeError(f"ffmpeg failed to decode audio: {detail}") from e
+    usable = len(buf) - len(buf) % 4
+    return np.frombuffer(buf, dtype=np.float32, count=usable // 4)
+
+
+def use_memmap(path: str) -> bool:
+    """Memory-map when the compressed input exceeds AUDIO_PCM_MEMMAP_MB (0 = never)."""
+    try:
+        limit_mb = float(os.getenv("AUDIO_PCM_MEMMAP_MB", "0"))
+    except ValueError:
+        return False
+    return limit_mb > 0 and os.path.getsize(path) > limit_mb * 1024 * 1024
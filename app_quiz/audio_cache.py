@@ -0,0 +1,153 @@
+# app_quiz/audio_cache.py
+"""
+Optional on-disk cache for downloaded audio, shared by all gunicorn workers.
+
+Enabled by setting AUDIO_CACHE_DIR. Entries are content-addressed by
+sha256("<video_id>:<format>") and live under <dir>/<2 hex>/<hash>.<format>.
+
+- writes are atomic (temp file in the cache dir + os.replace)
+- one FileLock per shard directory (256 fixed lock files, never deleted),
+  so concurrent workers asking for the same video wait for the first
+  download instead of fetching it again
+- recency is tracked via the file mtime (touched on every hit); after each
+  insert the least recently used entries are evicted until the cache fits
+  into AUDIO_CACHE_MAX_MB
+- callers get a hard link (or copy) in their own temp dir, so eviction can
+  never pull a file away from a running transcription
+"""
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import shutil
+import uuid
+from typing import Callable, List, Optional, Tuple
+
+from filelock import FileLock, Timeout
+
+from app_quiz import metrics
+
+logger = logging.getLogger(__name__)
+
+_LOCK_SUFFIX = ".lock"
+_TMP_PREFIX = ".tmp-"
+
+
+def cache_dir() -> Optional[str]:
+    path = os.getenv("AUDIO_CACHE_DIR", "").strip()
+    return path or None
+
+
+def max_bytes() -> int:
+    try:
+        return int(float(os.getenv("AUDIO_CACHE_MAX_MB", "2048")) * 1024 * 1024)
+    except ValueError:
+        return 2048 * 1024 * 1024
+
+
+def _entry_path(root: str, video_id: str, fmt: str) -> str:
+    digest = hashlib.sha256(f"{video_id}:{fmt}".encode("utf-8")).hexdigest()
+    return os.path.join(root, digest[:2], f"{digest}.{fmt}")
+
+
+def _lock_path(entry: str) -> str:
+    # Lock stripe of the entry's shard: removing per-entry lock files on
+    # eviction would let a waiter and a newcomer lock different inodes
+    return os.path.join(os.path.dirname(entry), _LOCK_SUFFIX)
+
+
+def _link_or_copy(src: str, dst: str) -> None:
+    try:
+        os.link(src, dst)
+    except OSError:
+        # Different file system (or no hard link support) -> plain copy
+        shutil.copyfile(src, dst)
+
+
+def fetch_audio(
+    video_id: str,
+    fmt: str,
+    tempdir: str,
+    download: Callable[[str], str],
+) -> str:
+    """
+    Return the path of the audio for video_id inside tempdir.
+    download(tempdir) is only called on a cache miss (or when the cache
+    is disabled) and must return the path of the produced file.
+    """
+    root = cache_dir()
+    if not root:
+        return download(tempdir)
+
+    entry = _entry_path(root, video_id, fmt)
+    os.makedirs(os.path.dirname(entry), exist_ok=True)
+    local = os.path.join(tempdir, f"audio.{fmt}")
+
+    with FileLock(_lock_path(entry)):
+        if os.path.exists(entry):
+            os.utime(entry)  # LRU: mark as recently used
+            _link_or_copy(entry, local)
+            logger.debug("audio cache hit %s (%s)", video_id, fmt)
+            metrics.cache_result("audio", hit=True)
+            return local
+
+        metrics.cache_result("audio", hit=False)
+        produced = download(tempdir)
+        tmp = os.path.join(os.path.dirname(entry), f"{_TMP_PREFIX}{os.getpid()}-{uuid.uuid4().hex}")
+        try:
+            _link_or_copy(produced, tmp)
+            os.replace(tmp, entry)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        logger.debug("audio cache store %s (%s)", video_id, fmt)
+
+    evict(keep=entry)
+    return produced
+
+
+def _entries(root: str) -> List[Tuple[float, int, str]]:
+    out = []
+    for dirpath, _, files in os.walk(root):
+        for name in files:
+            if name.endswith(_LOCK_SUFFIX) or name.startswith(_TMP_PREFIX):
+                continue
+            path = os.path.join(dirpath, name)
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                continue
+            out.append((st.st_mtime, st.st_size, path))
+    return out
+
+
+def evict(keep: Optional[str] = None, budget: Optional[int] = None) -> int:
+    """
+    Delete least recently used entries until the cache fits into budget
+    (default AUDIO_CACHE_MAX_MB). Entries whose shard is locked by another
+    worker and `keep` are skipped. Returns the number of removed files.
+    """
+    root = cache_dir()
+    if not root or not os.path.isdir(root):
+        return 0
+    budget = max_bytes() if budget is None else budget
+
+    removed = 0
+    with FileLock(os.path.join(root, ".evict" + _LOCK_SUFFIX)):
+        entries = sorted(_entries(root))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= budget:
+                break
+            if path == keep:
+                continue
+            try:
+                with FileLock(_lock_path(path), timeout=0):
+                    os.remove(path)
+            except (Timeout, FileNotFoundError):
+                continue  # in use right now or already gone
+            total -= size
+            removed += 1
+    return removed
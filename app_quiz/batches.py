@@ -0,0 +1,167 @@
+# app_quiz/batches.py
+"""
+Bulk pre-generation of quizzes (manage.py ingest_quizzes, POST /api/batches/).
+
+A batch turns a URL list and/or YouTube playlists into one QuizJob per
+distinct video id, inserted with bulk_create. Videos the owner already
+has a quiz for are skipped. The jobs are the checkpoint: the worker pool
+(or the ingest command, limited to the batch) processes them with bounded
+parallelism, and an interrupted run resumes with the jobs that are not
+finished yet.
+"""
+from __future__ import annotations
+
+import logging
+import os
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+import yt_dlp
+from django.db import transaction
+from django.db.models import Count, Q
+
+from app_quiz import utils
+from app_quiz.models import Quiz, QuizBatch, QuizJob
+
+logger = logging.getLogger(__name__)
+
+_INSERT_BATCH = 500
+
+
+def max_items() -> int:
+    try:
+        return int(os.getenv("BATCH_MAX_ITEMS", "500"))
+    except ValueError:
+        return 500
+
+
+def playlist_id(url: str) -> str:
+    """List id of a playlist URL (youtube.com/playlist?list=…), else ""."""
+    p = urlparse(url)
+    host = (p.netloc or "").lower()
+    if host not in {"youtube.com", "www.youtube.com", "m.youtube.com"} or p.path.rstrip("/") != "/playlist":
+        return ""
+    return (parse_qs(p.query).get("list") or [""])[0]
+
+
+def expand_playlist(list_id: str) -> List[str]:
+    """
+    Video ids of a playlist, in playlist order. Flat extraction: one
+    metadata request per page, nothing is downloaded. (Audio downloads keep
+    noplaylist, so watch?v=…&list=… URLs stay single videos.)
+    """
+    opts = {
+        **utils._ydl_base_opts(),
+        "noplaylist": False,
+        "extract_flat": "in_playlist",
+        "skip_download": True,
+    }
+    try:
+        with yt_dlp.YoutubeDL(opts) as ydl:
+            info = ydl.extract_info(f"https://www.youtube.com/playlist?list={list_id}", download=False) or {}
+    except Exception as e:
+        logger.warning("playlist %s could not be expanded: %s", list_id, e)
+        raise ValueError(f"Playlist {list_id} could not be loaded.") from e
+    return [entry["id"] for entry in info.get("entries") or [] if entry and entry.get("id")]
+
+
+def resolve(urls: List[str]) -> Tuple[List[str], List[Dict[str, str]]]:
+    """
+    (distinct video ids in input order, invalid entries as {"url", "error"}).
+    Playlist URLs are expanded in place.
+    """
+    video_ids: Dict[str, None] = {}
+    invalid: List[Dict[str, str]] = []
+    for raw in urls:
+        url = (raw or "").strip()
+        if not url:
+            continue
+        try:
+            list_id = playlist_id(url)
+            if list_id:
+                video_ids.update(dict.fromkeys(expand_playlist(list_id)))
+                continue
+            video_id, _ = utils._parse_video_id(url)
+            if not video_id:
+                raise ValueError("Invalid YouTube URL.")
+        except ValueError as e:
+            invalid.append({"url": url, "error": str(e)})
+            continue
+        video_ids[video_id] = None
+    return list(video_ids), invalid
+
+
+def create_batch(owner, urls: List[str], source: str = "", force_regenerate: bool = False) -> Tuple[QuizBatch, Dict]:
+    """
+    Batch with one queued job per new video: videos the owner already has a
+    quiz for or a queued/running job of are skipped. Returns (batch,
+    summary) with summary {"queued", "already_generated", "in_progress",
+    "invalid"}; raises ValueError when the input expands to more than
+    BATCH_MAX_ITEMS videos.
+    """
+    video_ids, invalid = resolve(urls)
+    if len(video_ids) > max_items():
+        raise ValueError(f"Too many videos ({len(video_ids)}); the limit is {max_items()} per batch.")
+
+    urls_by_id = {video_id: f"https://www.youtube.com/watch?v={video_id}" for video_id in video_ids}
+    existing = set()
+    if not force_regenerate:
+        existing = set(
+            Quiz.objects.filter(owner=owner, video_id__in=video_ids).values_list("video_id", flat=True)
+        )
+    # By video id: jobs from createQuiz?async=true keep the URL spelling the client sent
+    pending = set(
+        QuizJob.objects.filter(
+            owner=owner,
+            status__in=[QuizJob.STATUS_QUEUED, QuizJob.STATUS_RUNNING],
+            video_id__in=video_ids,
+        ).values_list("video_id", flat=True)
+    )
+    new_ids = [v for v in video_ids if v not in existing and v not in pending]
+    with transaction.atomic():
+        batch = QuizBatch.objects.create(owner=owner, source=source)
+        QuizJob.objects.bulk_create(
+            [
+                QuizJob(
+                    owner=owner,
+                    batch=batch,
+                    video_url=urls_by_id[video_id],
+                    video_id=video_id,
+                    force_regenerate=force_regenerate,
+                )
+                for video_id in new_ids
+            ],
+            batch_size=_INSERT_BATCH,
+        )
+    summary = {
+        "queued": len(new_ids),
+        "already_generated": sorted(existing),
+        "in_progress": sorted(pending),
+        "invalid": invalid,
+    }
+    return batch, summary
+
+
+def resume_batch(batch: QuizBatch, retry_failed: bool = False) -> int:
+    """
+    Queue the unfinished jobs of an interrupted run again (and the failed
+    ones with retry_failed). Only call this when no other process is still
+    working on the batch. Returns the number of requeued jobs.
+    """
+    states = [QuizJob.STATUS_RUNNING] + ([QuizJob.STATUS_FAILED] if retry_failed else [])
+    return batch.jobs.filter(status__in=states).update(
+        status=QuizJob.STATUS_QUEUED, started_at=None, finished_at=None, error=""
+    )
+
+
+def progress(batch: QuizBatch) -> Dict[str, int]:
+    """Job counts per state plus "total"."""
+    return batch.jobs.aggregate(
+        total=Count("id"),
+        **{state: Count("id", filter=Q(status=state)) for state, _ in QuizJob.STATUS_CHOICES},
+    )
+
+
+def is_finished(batch: QuizBatch, counts: Optional[Dict[str, int]] = None) -> bool:
+    counts = counts or progress(batch)
+    return not counts[QuizJob.STATUS_QUEUED] and not counts[QuizJob.STATUS_RUNNING]
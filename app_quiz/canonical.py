@@ -0,0 +1,95 @@
+# app_quiz/canonical.py
+"""
+Cross-user reuse of generated quizzes.
+
+Every successful generation is stored as the canonical GeneratedQuiz of
+its (video id, prompt version, LLM model). While it is younger than
+QUIZ_REUSE_TTL_SEC, a new quiz for the same video is a copy of it: one
+Quiz insert plus one bulk_create of the questions, no download, no
+Whisper, no Gemini. force_regenerate on createQuiz bypasses the lookup;
+the new result then replaces the canonical one.
+"""
+from __future__ import annotations
+
+import os
+from datetime import timedelta
+from typing import Dict, List, Optional
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from app_quiz import payload_cache
+from app_quiz.models import GeneratedQuiz, Question, Quiz
+
+
+def reuse_enabled() -> bool:
+    return os.getenv("QUIZ_REUSE", "1").strip().lower() not in {"0", "false", "no", "off"}
+
+
+def _ttl() -> float:
+    try:
+        return float(os.getenv("QUIZ_REUSE_TTL_SEC", str(30 * 24 * 3600)))
+    except ValueError:
+        return 30 * 24 * 3600.0
+
+
+def lookup(video_id: str, prompt_version: str, llm_model: str) -> Optional[GeneratedQuiz]:
+    """Fresh canonical quiz for the key, or None."""
+    return GeneratedQuiz.objects.filter(
+        video_id=video_id,
+        prompt_version=prompt_version,
+        llm_model=llm_model,
+        generated_at__gte=timezone.now() - timedelta(seconds=_ttl()),
+    ).first()
+
+
+def store(
+    video_id: str,
+    prompt_version: str,
+    llm_model: str,
+    title: str,
+    description: str,
+    questions: List[Dict],
+    transcript_source: str = "",
+) -> GeneratedQuiz:
+    """Insert or replace the canonical quiz for the key."""
+    row, _ = GeneratedQuiz.objects.update_or_create(
+        video_id=video_id,
+        prompt_version=prompt_version,
+        llm_model=llm_model,
+        defaults={
+            "title": title,
+            "description": description,
+            "questions": questions,
+            "transcript_source": transcript_source,
+            "generated_at": timezone.now(),
+        },
+    )
+    return row
+
+
+@transaction.atomic
+def clone(record: GeneratedQuiz, owner, video_url: str) -> Quiz:
+    """New Quiz of owner with a copy of the canonical questions (two INSERTs)."""
+    quiz = Quiz.objects.create(
+        owner=owner,
+        title=record.title,
+        description=record.description,
+        video_url=video_url,
+        video_id=record.video_id,
+    )
+    Question.objects.bulk_create(
+        [
+            Question(
+                quiz=quiz,
+                question_title=q["question_title"],
+                question_options=list(q["question_options"]),
+                answer=q["answer"],
+            )
+            for q in record.questions
+        ]
+    )
+    payload_cache.invalidate_quiz(quiz)  # bulk_create sends no signals
+    GeneratedQuiz.objects.filter(id=record.id).update(reuse_count=F("reuse_count") + 1)
+    return quiz
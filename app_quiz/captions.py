@@ -0,0 +1,155 @@
+# app_quiz/captions.py
+"""
+Caption-first transcripts: most lecture videos already ship subtitles,
+which are a few KB of text instead of minutes of download + Whisper.
+
+Track preference: manual subtitles in the preferred languages, then
+automatic captions (the video's own language first, then the preferred
+languages). Tracks are fetched as WebVTT and flattened to plain text.
+"""
+from __future__ import annotations
+
+import html
+import logging
+import os
+import re
+from typing import Dict, List, Optional, Tuple
+
+import yt_dlp
+
+logger = logging.getLogger(__name__)
+
+_FORMAT_PREFERENCE = ("vtt", "srv3", "srv1", "ttml")
+
+
+def captions_enabled() -> bool:
+    return os.getenv("CAPTIONS_FIRST", "1").strip().lower() not in {"0", "false", "no", "off"}
+
+
+def preferred_languages() -> List[str]:
+    raw = os.getenv("CAPTION_LANGUAGES", "en,de")
+    return [lang.strip().lower() for lang in raw.split(",") if lang.strip()]
+
+
+def _min_chars() -> int:
+    try:
+        return int(os.getenv("CAPTION_MIN_CHARS", "200"))
+    except ValueError:
+        return 200
+
+
+def _match_lang(tracks: Dict, lang: str) -> Optional[str]:
+    """Exact key first ("en"), then regional variants ("en-US", "en-GB")."""
+    if lang in tracks:
+        return lang
+    for key in tracks:
+        if key.lower().split("-")[0] == lang and not key.endswith("-orig"):
+            return key
+    return None
+
+
+def _pick_format(formats: List[Dict]) -> Optional[Dict]:
+    for ext in _FORMAT_PREFERENCE:
+        for fmt in formats or []:
+            if fmt.get("ext") == ext and fmt.get("url"):
+                return fmt
+    return None
+
+
+def pick_track(info: Dict, languages: List[str]) -> Optional[Tuple[str, str, Dict]]:
+    """
+    Choose a caption track from yt-dlp metadata.
+    Returns (language, kind, format) with kind "manual" or "automatic".
+    """
+    manual = info.get("subtitles") or {}
+    for lang in languages:
+        key = _match_lang(manual, lang)
+        fmt = _pick_format(manual.get(key)) if key else None
+        if fmt:
+            return key, "manual", fmt
+
+    automatic = info.get("automatic_captions") or {}
+    video_lang = (info.get("language") or "").lower().split("-")[0]
+    # The track in the spoken language is the real ASR output; others are machine translations
+    order = ([video_lang] if video_lang in languages else []) + languages
+    for lang in order:
+        key = f"{lang}-orig" if f"{lang}-orig" in automatic else _match_lang(automatic, lang)
+        fmt = _pick_format(automatic.get(key)) if key else None
+        if fmt:
+            return key, "automatic", fmt
+    return None
+
+
+def track_languages(info: Dict) -> Tuple[List[str], List[str]]:
+    """(manual, automatic) languages that have a track in a supported format."""
+    return (
+        [key for key, formats in (info.get("subtitles") or {}).items() if _pick_format(formats)],
+        [key for key, formats in (info.get("automatic_captions") or {}).items() if _pick_format(formats)],
+    )
+
+
+def has_usable_track(manual: List[str], automatic: List[str], languages: List[str]) -> bool:
+    """Whether pick_track would find a track, from the language lists alone."""
+    manual_keys, automatic_keys = dict.fromkeys(manual), dict.fromkeys(automatic)
+    return any(
+        _match_lang(manual_keys, lang) or f"{lang}-orig" in automatic_keys or _match_lang(automatic_keys, lang)
+        for lang in languages
+    )
+
+
+_TIMING = re.compile(r"^\d{1,2}:\d{2}(:\d{2})?[.,]\d{3}\s+-->")
+_TAG = re.compile(r"<[^>]+>")
+
+
+def vtt_to_text(vtt: str) -> str:
+    """
+    Flatten WebVTT to plain text: drops header, NOTE/STYLE blocks, cue ids,
+    timings and inline tags, and the rolling repeats of auto captions.
+    """
+    lines: List[str] = []
+    skip_block = False
+    for raw in vtt.splitlines():
+        line = raw.strip()
+        if not line:
+            skip_block = False
+            continue
+        if skip_block:
+            continue
+        if line.startswith(("WEBVTT", "Kind:", "Language:")):
+            continue
+        if line.startswith(("NOTE", "STYLE", "REGION")):
+            skip_block = True
+            continue
+        if _TIMING.match(line) or line.isdigit():
+            continue
+        text = html.unescape(_TAG.sub("", line)).strip()
+        if text and (not lines or lines[-1] != text):
+            lines.append(text)
+    return " ".join(lines)
+
+
+def fetch_captions(video_url: str, ydl_opts: Dict, info: Optional[Dict] = None) -> Optional[Dict]:
+    """
+    Return {"text", "language", "kind"} from the best caption track, or None
+    when the video has no usable track (callers fall back to Whisper).
+    info: fresh yt-dlp metadata of the video (skips a second extract_info).
+    """
+    opts = {**ydl_opts, "skip_download": True}
+    try:
+        with yt_dlp.YoutubeDL(opts) as ydl:
+            if not info:
+                info = ydl.extract_info(video_url, download=False) or {}
+            picked = pick_track(info, preferred_languages())
+            if picked is None:
+                return None
+            lang, kind, fmt = picked
+            raw = ydl.urlopen(fmt["url"]).read().decode("utf-8", errors="replace")
+    except Exception as e:
+        logger.warning("caption lookup failed for %s: %s", video_url, e)
+        return None
+
+    text = vtt_to_text(raw) if fmt.get("ext") == "vtt" else _TAG.sub(" ", raw)
+    text = re.sub(r"\s+", " ", html.unescape(text)).strip()
+    if len(text) < _min_chars():
+        return None
+    return {"text": text, "language": lang.split("-")[0], "kind": kind}
@@ -0,0 +1,116 @@
+# app_quiz/chunking.py
+"""
+Token-aware transcript chunking for question generation.
+
+The transcript is split at sentence boundaries into chunks that each fit
+a token budget (QUIZ_CHUNK_TOKENS), so long videos are covered end to end
+instead of only their first minutes. Tokens are counted with tiktoken;
+when its encoding file cannot be loaded (offline container) a
+4-characters-per-token estimate is used instead.
+"""
+from __future__ import annotations
+
+import functools
+import logging
+import math
+import os
+import re
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+_CHARS_PER_TOKEN = 4  # rough average for English/German prose
+_SENTENCE_END = re.compile(r"(?<=[.!?…])\s+")
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, str(default)))
+    except ValueError:
+        return default
+
+
+def chunk_token_budget() -> int:
+    """Transcript tokens per Gemini request (default 3000 ≈ the old 12000 chars)."""
+    return max(200, _env_int("QUIZ_CHUNK_TOKENS", 3000))
+
+
+def max_chunks() -> int:
+    """Upper bound on requests per quiz; the budget grows instead of the fan-out."""
+    return max(1, _env_int("QUIZ_MAX_CHUNKS", 8))
+
+
+@functools.lru_cache(maxsize=1)
+def _encoding():
+    try:
+        import tiktoken
+
+        return tiktoken.get_encoding(os.getenv("TIKTOKEN_ENCODING", "cl100k_base"))
+    except Exception as e:  # not installed, or the BPE file cannot be fetched
+        logger.warning("tiktoken unavailable, estimating tokens from length: %s", e)
+        return None
+
+
+def count_tokens(text: str) -> int:
+    enc = _encoding()
+    if enc is None:
+        return math.ceil(len(text) / _CHARS_PER_TOKEN)
+    return len(enc.encode(text, disallowed_special=()))
+
+
+def _units(text: str, budget: int) -> List[str]:
+    """Sentences; sentences over budget (unpunctuated ASR output) are cut into word runs."""
+    units: List[str] = []
+    for sentence in _SENTENCE_END.split(text.strip()):
+        if not sentence:
+            continue
+        if count_tokens(sentence) <= budget:
+            units.append(sentence)
+            continue
+        run: List[str] = []
+        used = 0
+        for word in sentence.split():
+            cost = count_tokens(" " + word)
+            if run and used + cost > budget:
+                units.append(" ".join(run))
+                run, used = [], 0
+            run.append(word)
+            used += cost
+        if run:
+            units.append(" ".join(run))
+    return units
+
+
+def split_transcript(text: str, budget: Optional[int] = None, limit: Optional[int] = None) -> List[str]:
+    """
+    Split text into chunks of at most budget tokens, packing whole
+    sentences greedily. With more than limit chunks the budget is raised
+    until the transcript fits into limit chunks.
+    """
+    budget = budget or chunk_token_budget()
+    limit = limit or max_chunks()
+    total = count_tokens(text)
+    if total <= budget:
+        return [text.strip()] if text.strip() else []
+    budget = max(budget, math.ceil(total / limit))
+    chunks = _pack(_units(text, budget), budget)
+    while len(chunks) > limit:  # greedy packing leaves slack per chunk
+        budget = math.ceil(budget * 1.2)
+        chunks = _pack(_units(text, budget), budget)
+    return chunks
+
+
+def _pack(units: List[str], budget: int) -> List[str]:
+    chunks: List[str] = []
+    current: List[str] = []
+    used = 0
+    for unit in units:
+        cost = count_tokens(unit) + 1  # + joining space
+        if current and used + cost > budget:
+            chunks.append(" ".join(current))
+            current, used = [], 0
+        current.append(unit)
+        used += cost
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
@@ -0,0 +1,210 @@
+# app_quiz/gemini.py
+"""
+Process-wide Gemini client registry.
+
+- genai.configure() runs once per API key (and transport), not per quiz
+- the auto-detected model name (when GEMINI_MODEL is unset) is cached for
+  GEMINI_MODEL_TTL_SEC and refreshed in a background thread once stale,
+  so requests never wait on genai.list_models() after the first one
+- GenerativeModel objects (and the transport behind them) are reused
+"""
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Iterator, Optional
+
+import google.generativeai as genai
+
+logger = logging.getLogger(__name__)
+
+_PREFERRED_MODELS = [
+    "gemini-2.5-flash",
+    "gemini-2.0-flash",
+    "gemini-flash-latest",
+    "gemini-pro-latest",
+    "gemini-2.5-pro",
+    "gemini-2.0-pro",
+]
+_FALLBACK_MODEL = "gemini-flash-latest"
+
+# Mirrors the JSON contract in utils._build_prompt
+QUIZ_RESPONSE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "title": {"type": "string"},
+        "description": {"type": "string"},
+        "questions": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "question_title": {"type": "string"},
+                    "question_options": {"type": "array", "items": {"type": "string"}},
+                    "answer": {"type": "string"},
+                },
+                "required": ["question_title", "question_options", "answer"],
+            },
+        },
+    },
+    "required": ["title", "description", "questions"],
+}
+
+
+def structured_output_enabled() -> bool:
+    return os.getenv("GEMINI_STRUCTURED_OUTPUT", "1").strip().lower() not in {"0", "false", "no", "off"}
+
+
+def generation_config() -> Optional[Dict[str, Any]]:
+    """JSON mime type + response schema (structured output), unless disabled."""
+    if not structured_output_enabled():
+        return None
+    return {"response_mime_type": "application/json", "response_schema": QUIZ_RESPONSE_SCHEMA}
+
+
+def _model_ttl() -> float:
+    try:
+        return float(os.getenv("GEMINI_MODEL_TTL_SEC", "3600"))
+    except ValueError:
+        return 3600.0
+
+
+def _detect_model_name() -> str:
+    """Pick a model with generateContent support (one list_models round trip)."""
+    try:
+        avail = [
+            (m.name.split("/")[-1], getattr(m, "supported_generation_methods", []))
+            for m in genai.list_models()
+        ]
+    except Exception:
+        return _FALLBACK_MODEL
+    supported = [name for (name, methods) in avail if "generateContent" in methods]
+    for cand in _PREFERRED_MODELS:
+        if cand in supported:
+            return cand
+    return supported[0] if supported else _FALLBACK_MODEL
+
+
+class GeminiClientRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget configuration and caches (tests, key rotation)."""
+        self._configured: Optional[tuple] = None
+        self._models: Dict[str, Any] = {}
+        self._detected_name: Optional[str] = None
+        self._detected_at = 0.0
+        self._detect_cost = 0.0  # seconds the last list_models() round trip took
+        self._refreshing = False
+
+    # ---- configuration ----
+
+    def configure(self, api_key: Optional[str]) -> None:
+        transport = os.getenv("GEMINI_TRANSPORT", "").strip() or None
+        wanted = (api_key, transport)
+        if self._configured == wanted:
+            return
+        with self._lock:
+            if self._configured == wanted:
+                return
+            kwargs = {"api_key": api_key}
+            if transport:
+                kwargs["transport"] = transport
+            genai.configure(**kwargs)
+            # Models are bound to the previous client -> rebuild lazily
+            self._models = {}
+            self._configured = wanted
+
+    # ---- model resolution ----
+
+    def _detect(self) -> str:
+        started = time.perf_counter()
+        name = _detect_model_name()
+        self._detect_cost = time.perf_counter() - started
+        self._detected_name = name
+        self._detected_at = time.monotonic()
+        return name
+
+    def _refresh_in_background(self) -> None:
+        def _run():
+            try:
+                self._detect()
+            finally:
+                self._refreshing = False
+
+        threading.Thread(target=_run, name="gemini-model-refresh", daemon=True).start()
+
+    def model_name(self) -> str:
+        explicit = os.getenv("GEMINI_MODEL")
+        if explicit:
+            return explicit
+        with self._lock:
+            if self._detected_name is None:
+                return self._detect()
+            stale = time.monotonic() - self._detected_at > _model_ttl()
+            if stale and not self._refreshing:
+                # Serve the stale name now, refresh for the next request
+                self._refreshing = True
+                self._refresh_in_background()
+            return self._detected_name
+
+    def get_model(self, name: str):
+        model = self._models.get(name)
+        if model is None:
+            with self._lock:
+                model = self._models.get(name)
+                if model is None:
+                    model = genai.GenerativeModel(name)
+                    self._models[name] = model
+        return model
+
+    # ---- calls ----
+
+    def generate(self, prompt: str, api_key: Optional[str]) -> str:
+        """Run generate_content and return the raw response text (timed)."""
+        t0 = time.perf_counter()
+        self.configure(api_key)
+        first_resolution = self._detected_name is None and not os.getenv("GEMINI_MODEL")
+        name = self.model_name()
+        model = self.get_model(name)
+        t1 = time.perf_counter()
+        resp = model.generate_content(prompt, generation_config=generation_config())
+        t2 = time.perf_counter()
+
+        setup_ms = (t1 - t0) * 1000
+        if first_resolution or os.getenv("GEMINI_MODEL"):
+            logger.info("gemini call model=%s setup=%.1fms generate=%.0fms", name, setup_ms, (t2 - t1) * 1000)
+        else:
+            logger.info(
+                "gemini call model=%s setup=%.1fms (cached model, saved ~%.0fms) generate=%.0fms",
+                name, setup_ms, self._detect_cost * 1000, (t2 - t1) * 1000,
+            )
+        return (getattr(resp, "text", None) or "").strip()
+
+    def generate_stream(self, prompt: str, api_key: Optional[str]) -> Iterator[str]:
+        """generate_content(stream=True): yields the response text piece by piece."""
+        self.configure(api_key)
+        name = self.model_name()
+        model = self.get_model(name)
+        t1 = time.perf_counter()
+        first = None
+        for chunk in model.generate_content(prompt, generation_config=generation_config(), stream=True):
+            try:
+                text = chunk.text or ""
+            except ValueError:  # chunk without text parts (e.g. the final one)
+                continue
+            if first is None:
+                first = time.perf_counter()
+            yield text
+        t2 = time.perf_counter()
+        logger.info(
+            "gemini stream model=%s first_chunk=%.0fms total=%.0fms",
+            name, ((first or t2) - t1) * 1000, (t2 - t1) * 1000,
+        )
+
+
+registry = GeminiClientRegistry()
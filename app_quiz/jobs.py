@@ -0,0 +1,261 @@
+# app_quiz/jobs.py
+"""
+DB-backed background jobs for quiz generation.
+
+The web process only inserts a QuizJob row (status "queued"). A separate
+worker process (`python manage.py run_quiz_workers`) claims queued rows and
+runs the heavy pipeline (yt-dlp, Whisper, Gemini) in a local thread pool,
+so gunicorn slots stay free for the cheap CRUD endpoints.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import Dict, Optional, Tuple
+
+from django.db import close_old_connections
+from django.db.models import F
+from django.utils import timezone
+
+import app_quiz.utils as utils
+from app_quiz import admission, metrics
+from app_quiz.models import QuizJob
+
+logger = logging.getLogger(__name__)
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, str(default)))
+    except ValueError:
+        return default
+
+
+_FINAL_STATES = {QuizJob.STATUS_SUCCEEDED, QuizJob.STATUS_FAILED}
+
+
+def video_id_of(video_url: str) -> str:
+    """Video id stored on a job ("" when the URL does not parse)."""
+    try:
+        return utils._parse_video_id(video_url)[0]
+    except ValueError:
+        return ""
+
+
+def enqueue_quiz_job(owner, video_url: str, force_regenerate: bool = False) -> QuizJob:
+    """Create a queued job; a worker picks it up on its next poll."""
+    return QuizJob.objects.create(
+        owner=owner, video_url=video_url, video_id=video_id_of(video_url), force_regenerate=force_regenerate
+    )
+
+
+def get_or_create_keyed_job(
+    owner, video_url: str, idempotency_key: str, run_inline: bool, force_regenerate: bool = False
+) -> Tuple[QuizJob, bool]:
+    """
+    Job for (owner, Idempotency-Key). A new job is either queued for the
+    workers or, for synchronous requests (run_inline), marked running right
+    away so no worker claims it. Returns (job, created).
+    """
+    defaults = {"video_url": video_url, "video_id": video_id_of(video_url), "force_regenerate": force_regenerate}
+    if run_inline:
+        defaults.update(status=QuizJob.STATUS_RUNNING, started_at=timezone.now(), attempts=1)
+    return QuizJob.objects.get_or_create(owner=owner, idempotency_key=idempotency_key, defaults=defaults)
+
+
+def wait_for_job(job: QuizJob, timeout: float, poll_interval: float = 1.0) -> QuizJob:
+    """Poll until the job reached a final state or timeout seconds passed."""
+    deadline = time.monotonic() + timeout
+    while job.status not in _FINAL_STATES and time.monotonic() < deadline:
+        time.sleep(poll_interval)
+        job.refresh_from_db()
+    return job
+
+
+def restart_failed_job(job: QuizJob, queued: bool = False) -> bool:
+    """
+    Take over a failed job for another inline attempt (or hand it back to
+    the workers with queued=True). Conditional UPDATE, so of several
+    concurrent retries only one restarts the pipeline.
+    """
+    if queued:
+        changes = {"status": QuizJob.STATUS_QUEUED, "started_at": None}
+    else:
+        changes = {
+            "status": QuizJob.STATUS_RUNNING,
+            "started_at": timezone.now(),
+            "attempts": F("attempts") + 1,
+        }
+    restarted = QuizJob.objects.filter(id=job.id, status=QuizJob.STATUS_FAILED).update(
+        error="", finished_at=None, **changes
+    )
+    job.refresh_from_db()
+    return bool(restarted)
+
+
+def complete_job(job: QuizJob, quiz, generated: Optional[Dict] = None) -> QuizJob:
+    meta = (generated or {}).get("meta") or {}
+    return _finish(
+        job,
+        QuizJob.STATUS_SUCCEEDED,
+        quiz=quiz,
+        transcript_source=meta.get("transcript_source", ""),
+        audio_trimmed_sec=meta.get("audio_trimmed_sec"),
+    )
+
+
+def fail_job(job: QuizJob, error: str) -> QuizJob:
+    return _finish(job, QuizJob.STATUS_FAILED, error=error)
+
+
+def claim_next_job(batch=None) -> Optional[QuizJob]:
+    """
+    Atomically move the oldest queued job (of batch, if given) to "running"
+    and return it. The conditional UPDATE makes the claim safe across
+    worker processes: only the worker whose UPDATE hits the still-queued
+    row wins.
+    """
+    queued = QuizJob.objects.filter(status=QuizJob.STATUS_QUEUED)
+    if batch is not None:
+        queued = queued.filter(batch=batch)
+    while True:
+        job_id = (
+            queued
+            .order_by("created_at", "id")
+            .values_list("id", flat=True)
+            .first()
+        )
+        if job_id is None:
+            return None
+        claimed = QuizJob.objects.filter(id=job_id, status=QuizJob.STATUS_QUEUED).update(
+            status=QuizJob.STATUS_RUNNING,
+            started_at=timezone.now(),
+            attempts=F("attempts") + 1,
+        )
+        if claimed:
+            return QuizJob.objects.select_related("owner").get(id=job_id)
+        # Another worker was faster -> try the next one
+
+
+def run_job(job: QuizJob) -> QuizJob:
+    """
+    Run the generation pipeline for a claimed job and persist the outcome.
+    Errors are stored on the job instead of being raised.
+    """
+    try:
+        try:
+            reused = None if job.force_regenerate else utils.reuse_canonical_quiz(job.owner, job.video_url)
+            if reused is not None:
+                quiz, record = reused
+                return complete_job(job, quiz, {"meta": {"transcript_source": record.transcript_source}})
+            generated = utils.generate_quiz_coalesced(job.video_url)
+            quiz = utils.persist_generated_quiz(job.owner, job.video_url, generated)
+        except admission.Rejected as e:
+            # Server busy: hand the job back to the queue instead of failing it
+            time.sleep(min(e.retry_after, 5))  # no hot claim/reject loop while the queue is full
+            QuizJob.objects.filter(id=job.id).update(
+                status=QuizJob.STATUS_QUEUED, started_at=None, attempts=F("attempts") - 1
+            )
+            job.refresh_from_db()
+            return job
+        except ValueError as e:
+            # User error (invalid URL, Shorts, …) -> message is safe to expose
+            return _finish(job, QuizJob.STATUS_FAILED, error=str(e))
+        except Exception:
+            logger.exception("quiz job %s failed", job.id)
+            return _finish(job, QuizJob.STATUS_FAILED, error="Quiz generation failed.")
+        return complete_job(job, quiz, generated)
+    finally:
+        metrics.registry.flush()  # worker processes serve no requests that would flush
+
+
+def _finish(
+    job: QuizJob,
+    status: str,
+    quiz=None,
+    error: str = "",
+    transcript_source: str = "",
+    audio_trimmed_sec: Optional[float] = None,
+) -> QuizJob:
+    job.status = status
+    job.quiz = quiz
+    job.error = error
+    job.transcript_source = transcript_source
+    job.audio_trimmed_sec = audio_trimmed_sec
+    job.finished_at = timezone.now()
+    job.save(update_fields=["status", "quiz", "error", "transcript_source", "audio_trimmed_sec", "finished_at"])
+    return job
+
+
+def requeue_stale_jobs() -> int:
+    """
+    Recover jobs left in "running" by a crashed worker.
+    Jobs below QUIZ_JOB_MAX_ATTEMPTS are queued again, the rest fail.
+    """
+    timeout = _env_int("QUIZ_JOB_TIMEOUT_SEC", 1800)
+    max_attempts = _env_int("QUIZ_JOB_MAX_ATTEMPTS", 2)
+    stale = QuizJob.objects.filter(
+        status=QuizJob.STATUS_RUNNING,
+        started_at__lt=timezone.now() - timedelta(seconds=timeout),
+    )
+    requeued = stale.filter(attempts__lt=max_attempts).update(
+        status=QuizJob.STATUS_QUEUED, started_at=None
+    )
+    stale.update(
+        status=QuizJob.STATUS_FAILED,
+        error="Job timed out.",
+        finished_at=timezone.now(),
+    )
+    return requeued
+
+
+class QuizWorkerPool:
+    """
+    Local worker pool: one polling loop feeding a bounded thread pool.
+    A job is only claimed when a thread is free, so queued jobs stay
+    visible to other worker processes in the meantime.
+    """
+
+    def __init__(self, workers: Optional[int] = None, poll_interval: float = 2.0, batch=None):
+        self.workers = workers or _env_int("QUIZ_WORKER_CONCURRENCY", 2)
+        self.poll_interval = poll_interval
+        self.batch = batch  # only claim jobs of this QuizBatch (ingest_quizzes)
+        self._slots = threading.Semaphore(self.workers)
+        self._stop = threading.Event()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run_and_release(self, job: QuizJob) -> None:
+        try:
+            close_old_connections()
+            run_job(job)
+        finally:
+            close_old_connections()
+            self._slots.release()
+
+    def run(self, once: bool = False) -> int:
+        """
+        Process jobs until stop() is called. With once=True, drain the
+        queue and return. Returns the number of jobs processed.
+        """
+        processed = 0
+        requeue_stale_jobs()
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="quiz-job") as pool:
+            while not self._stop.is_set():
+                self._slots.acquire()
+                job = claim_next_job(self.batch)
+                if job is None:
+                    self._slots.release()
+                    if once:
+                        break
+                    self._stop.wait(self.poll_interval)
+                    continue
+                processed += 1
+                logger.info("quiz job %s claimed (%s)", job.id, job.video_url)
+                pool.submit(self._run_and_release, job)
+        return processed
@@ -0,0 +1,109 @@
+# app_quiz/llm_json.py
+"""
+Tolerant JSON extraction from LLM output.
+
+Gemini usually returns clean JSON (structured output), but prose around
+the document, code fences, trailing commas or a response cut off at the
+token limit must not fail a quiz that took minutes of transcription.
+extract_json_object() returns the largest JSON object it can recover:
+
+1. the whole text (fences stripped) as-is
+2. every balanced {...} span, as-is or with trailing commas removed
+3. a truncated object, cut back to its last complete value and closed
+"""
+from __future__ import annotations
+
+import json
+import re
+from typing import Dict, Iterator, List, Optional, Tuple
+
+_FENCE = re.compile(r"^\s*```[a-zA-Z]*\s*|\s*```\s*$")
+_TRAILING_COMMA = re.compile(r",(\s*[}\]])")
+_MAX_REPAIR_CUTS = 200  # cut points tried per truncated candidate
+
+_CLOSER = {"{": "}", "[": "]"}
+
+
+def _loads_object(text: str) -> Optional[Dict]:
+    for candidate in (text, _TRAILING_COMMA.sub(r"\1", text)):
+        try:
+            value = json.loads(candidate)
+        except ValueError:
+            continue
+        if isinstance(value, dict):
+            return value
+    return None
+
+
+def _scan(text: str, start: int) -> Tuple[Optional[int], List[Tuple[int, str]]]:
+    """
+    Walk from the "{" at start. Returns (end, cuts): end is the index after
+    the matching "}" (None if the text ends first); cuts are positions
+    after a complete value with the closers needed at that point.
+    """
+    stack: List[str] = []
+    cuts: List[Tuple[int, str]] = []
+    in_str = escaped = False
+    for i in range(start, len(text)):
+        c = text[i]
+        if in_str:
+            if escaped:
+                escaped = False
+            elif c == "\\":
+                escaped = True
+            elif c == '"':
+                in_str = False
+            continue
+        if c == '"':
+            in_str = True
+        elif c in "{[":
+            stack.append(c)
+        elif c in "}]":
+            if not stack or _CLOSER[stack[-1]] != c:
+                return None, cuts  # unbalanced: not a JSON object
+            stack.pop()
+            if not stack:
+                return i + 1, cuts
+            cuts.append((i + 1, "".join(_CLOSER[b] for b in reversed(stack))))
+    return None, cuts
+
+
+def _candidates(text: str) -> Iterator[Tuple[int, Dict]]:
+    """
+    (recovered length, object) per top-level candidate. Objects nested in
+    a recovered one are skipped: they can only be smaller.
+    """
+    pos = text.find("{")
+    while pos != -1:
+        end, cuts = _scan(text, pos)
+        found = None
+        if end is not None:
+            parsed = _loads_object(text[pos:end])
+            if parsed is not None:
+                found = (end, parsed)
+        else:
+            for cut, closers in reversed(cuts[-_MAX_REPAIR_CUTS:]):
+                parsed = _loads_object(text[pos:cut].rstrip().rstrip(",") + closers)
+                if parsed is not None:
+                    found = (cut, parsed)
+                    break
+        if found is not None:
+            yield found[0] - pos, found[1]
+            pos = text.find("{", found[0])
+        else:
+            pos = text.find("{", pos + 1)
+
+
+def extract_json_object(text: str) -> Optional[Dict]:
+    """Largest JSON object recoverable from text, or None."""
+    if not text:
+        return None
+    stripped = _FENCE.sub("", text.strip())
+    whole = _loads_object(stripped)
+    if whole is not None:
+        return whole
+    best: Optional[Tuple[int, Dict]] = None
+    for size, parsed in _candidates(stripped):
+        if best is None or size > best[0]:
+            best = (size, parsed)
+    return best[1] if best else None
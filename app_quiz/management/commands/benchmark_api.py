@@ -0,0 +1,111 @@
+# app_quiz/management/commands/benchmark_api.py
+import json
+import platform
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from app_quiz import query_audit
+
+
+class _Rollback(Exception):
+    pass
+
+
+def compare(report, baseline, tolerance: float):
+    """Regressions of report against baseline: more queries, new plan problems, slower p50."""
+    regressions = []
+    for name, row in report["endpoints"].items():
+        base = baseline.get("endpoints", {}).get(name)
+        if base is None:
+            continue
+        if row["queries"] > base["queries"]:
+            regressions.append(f"{name}: {row['queries']} queries (baseline {base['queries']})")
+        known = {p for plan in base.get("plans", []) for p in plan.get("problems", [])}
+        for plan in row["plans"]:
+            for problem in plan["problems"]:
+                if problem not in known:
+                    regressions.append(f"{name}: new plan problem {problem!r}")
+        # Sub-millisecond noise is not a regression
+        if row["p50_ms"] > base["p50_ms"] * (1 + tolerance) and row["p50_ms"] - base["p50_ms"] > 1:
+            regressions.append(f"{name}: p50 {row['p50_ms']} ms (baseline {base['p50_ms']} ms)")
+    return regressions
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a production-sized data set (rolled back afterwards), call every API "
+        "endpoint and record query counts, EXPLAIN QUERY PLAN of the main reads and "
+        "latency. Writes a JSON baseline and/or compares against one."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=50)
+        parser.add_argument("--quizzes-per-user", type=int, default=40)
+        parser.add_argument("--questions", type=int, default=10, help="Questions per quiz.")
+        parser.add_argument("--runs", type=int, default=10, help="Requests per endpoint.")
+        parser.add_argument("--output", help="Write the report to this JSON file.")
+        parser.add_argument("--compare", help="Baseline JSON file; exit with an error on regressions.")
+        parser.add_argument(
+            "--tolerance", type=float, default=0.5,
+            help="Allowed relative p50 slowdown against the baseline (default 0.5 = +50%%).",
+        )
+        parser.add_argument("--json", action="store_true", help="Print the report as JSON.")
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options["compare"]:
+            try:
+                with open(options["compare"], "r", encoding="utf-8") as fh:
+                    baseline = json.load(fh)
+            except (OSError, ValueError) as e:
+                raise CommandError(f"Cannot read baseline {options['compare']}: {e}")
+
+        try:
+            with transaction.atomic():
+                seed = query_audit.seed(
+                    users=max(1, options["users"]),
+                    quizzes_per_user=max(2, options["quizzes_per_user"]),
+                    questions_per_quiz=max(1, options["questions"]),
+                )
+                endpoints = query_audit.audit(seed, runs=max(1, options["runs"]))
+                raise _Rollback
+        except _Rollback:
+            pass
+
+        report = {
+            "meta": {
+                "users": options["users"],
+                "quizzes_per_user": options["quizzes_per_user"],
+                "questions_per_quiz": options["questions"],
+                "runs": options["runs"],
+                "database": connection.vendor,
+                "python": platform.python_version(),
+                "django": django.get_version(),
+                "recorded_at": timezone.now().isoformat(),
+            },
+            "endpoints": endpoints,
+        }
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as fh:
+                json.dump(report, fh, indent=2, sort_keys=True)
+                fh.write("\n")
+
+        if options["json"]:
+            self.stdout.write(json.dumps(report))
+        else:
+            for name, row in endpoints.items():
+                problems = sum(len(plan["problems"]) for plan in row["plans"])
+                self.stdout.write(
+                    f"{name:<24} {'/'.join(map(str, row['status'])):<7} queries={row['queries']:<3} "
+                    f"p50={row['p50_ms']:.2f}ms p95={row['p95_ms']:.2f}ms"
+                    + (f" plan problems={problems}" if problems else "")
+                )
+
+        if baseline is not None:
+            regressions = compare(report, baseline, options["tolerance"])
+            if regressions:
+                raise CommandError("Regressions against the baseline:\n  " + "\n  ".join(regressions))
+            self.stdout.write(self.style.SUCCESS("No regressions against the baseline."))
@@ -0,0 +1,141 @@
+# app_quiz/management/commands/benchmark_pipeline.py
+import json
+import math
+import os
+import resource
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from django.core.management.base import BaseCommand
+
+import app_quiz.utils as utils
+from app_quiz import providers
+
+
+def _percentile(sorted_values, pct: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+@contextmanager
+def _env(**values):
+    previous = {k: os.environ.get(k) for k in values}
+    os.environ.update({k: str(v) for k, v in values.items()})
+    try:
+        yield
+    finally:
+        for key, value in previous.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+
+class Command(BaseCommand):
+    help = (
+        "Drive N concurrent quiz generations against the fake downloader/"
+        "transcriber/LLM backends and report throughput, latency percentiles "
+        "and peak RSS. Needs no network access."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=20, help="Total generations.")
+        parser.add_argument("--concurrency", type=int, default=4, help="Generations in flight.")
+        parser.add_argument(
+            "--videos", type=int, default=None,
+            help="Distinct video ids (default: one per request); fewer exercises coalescing and caches.",
+        )
+        parser.add_argument("--download-latency", type=float, default=0.2, help="Seconds per fake download.")
+        parser.add_argument("--transcribe-latency", type=float, default=0.5, help="Seconds per fake transcription.")
+        parser.add_argument("--llm-latency", type=float, default=0.3, help="Seconds per fake LLM call.")
+        parser.add_argument("--jitter", type=float, default=0.2, help="Relative latency jitter (0.2 = +/-20%%).")
+        parser.add_argument("--download-failure-rate", type=float, default=0.0)
+        parser.add_argument("--transcribe-failure-rate", type=float, default=0.0)
+        parser.add_argument("--llm-failure-rate", type=float, default=0.0)
+        parser.add_argument("--audio-kb", type=int, default=1024, help="Size of each fake audio file.")
+        parser.add_argument("--transcript-words", type=int, default=3000, help="Words per fake transcript.")
+        parser.add_argument("--questions", type=int, default=10, help="Questions per fake LLM answer.")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--use-caches", action="store_true",
+            help="Keep transcript/audio caches and single-flight as configured (default: all off).",
+        )
+        parser.add_argument("--json", action="store_true", help="Print the report as JSON.")
+
+    def handle(self, *args, **options):
+        n = max(1, options["requests"])
+        videos = max(1, options["videos"] or n)
+        common = {"jitter": options["jitter"], "seed": options["seed"]}
+        backends = {
+            "downloader": providers.FakeDownloader(
+                size_kb=options["audio_kb"], latency=options["download_latency"],
+                failure_rate=options["download_failure_rate"], **common,
+            ),
+            "transcriber": providers.FakeTranscriber(
+                words=options["transcript_words"], latency=options["transcribe_latency"],
+                failure_rate=options["transcribe_failure_rate"], **common,
+            ),
+            "llm": providers.FakeLLM(
+                questions=options["questions"], latency=options["llm_latency"],
+                failure_rate=options["llm_failure_rate"], **common,
+            ),
+        }
+        # The metadata probe and captions talk to YouTube directly (no provider fakes)
+        env = {"CAPTIONS_FIRST": "0", "VIDEO_PROBE": "0", "GEMINI_API_KEY": os.getenv("GEMINI_API_KEY") or "benchmark"}
+        if not options["use_caches"]:
+            env.update(TRANSCRIPT_CACHE="0", AUDIO_CACHE_DIR="", SINGLEFLIGHT="0", QUIZ_REUSE="0")
+
+        urls = [f"https://www.youtube.com/watch?v=bench{i % videos:05d}" for i in range(n)]
+
+        def run(url):
+            started = time.perf_counter()
+            try:
+                utils.generate_quiz_coalesced(url)
+                ok = True
+            except Exception:
+                ok = False
+            return ok, time.perf_counter() - started
+
+        with _env(**env), providers.override(**backends):
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=max(1, options["concurrency"])) as pool:
+                results = list(pool.map(run, urls))
+            wall = time.perf_counter() - started
+
+        latencies = sorted(t for ok, t in results if ok)
+        report = {
+            "requests": n,
+            "concurrency": options["concurrency"],
+            "succeeded": len(latencies),
+            "failed": n - len(latencies),
+            "wall_sec": round(wall, 3),
+            "throughput_per_sec": round(len(latencies) / wall, 3) if wall else 0.0,
+            "p50_sec": round(_percentile(latencies, 50), 3),
+            "p95_sec": round(_percentile(latencies, 95), 3),
+            "p99_sec": round(_percentile(latencies, 99), 3),
+            "peak_rss_mb": round(_peak_rss_mb(), 1),
+        }
+
+        if options["json"]:
+            self.stdout.write(json.dumps(report))
+            return
+        self.stdout.write(
+            f"{report['succeeded']}/{n} ok ({report['failed']} failed) in {report['wall_sec']}s "
+            f"with concurrency {report['concurrency']}"
+        )
+        self.stdout.write(f"throughput={report['throughput_per_sec']}/s")
+        self.stdout.write(
+            f"latency p50={report['p50_sec']}s p95={report['p95_sec']}s p99={report['p99_sec']}s"
+        )
+        self.stdout.write(f"peak_rss={report['peak_rss_mb']}MB (process high-water mark)")
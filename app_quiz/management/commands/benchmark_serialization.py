@@ -0,0 +1,114 @@
+# app_quiz/management/commands/benchmark_serialization.py
+import json
+import statistics
+import time
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from app_quiz.api import fast_serialization
+from app_quiz.api.serializers import QuizListSerializer
+from app_quiz.models import Question, Quiz
+
+
+class _Rollback(Exception):
+    pass
+
+
+def _timed(fn, runs: int):
+    """(result of the last run, median seconds)."""
+    timings = []
+    result = None
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - started)
+    return result, statistics.median(timings)
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the DRF serializers with the .values() fast path for the quiz "
+        "list at several sizes (queries, serialization and JSON rendering). "
+        "Seeds its data inside a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000], help="Quizzes per run.")
+        parser.add_argument("--questions", type=int, default=10, help="Questions per quiz.")
+        parser.add_argument("--runs", type=int, default=5, help="Repetitions per size (median is reported).")
+        parser.add_argument("--json", action="store_true", help="Print the report as JSON.")
+
+    def handle(self, *args, **options):
+        report = []
+        try:
+            with transaction.atomic():
+                owner = get_user_model().objects.create_user(username=f"bench-{uuid.uuid4().hex[:12]}")
+                seeded = 0
+                for size in sorted(options["sizes"]):
+                    seeded = self._seed(owner, seeded, size, options["questions"])
+                    report.append(self._measure(owner, size, max(1, options["runs"])))
+                raise _Rollback
+        except _Rollback:
+            pass
+
+        mismatched = [row["quizzes"] for row in report if not row["identical"]]
+        if options["json"]:
+            self.stdout.write(json.dumps(report))
+        else:
+            for row in report:
+                self.stdout.write(
+                    f"{row['quizzes']:>6} quizzes: serializer {row['serializer_ms']:.2f} ms, "
+                    f"fast path {row['fast_ms']:.2f} ms ({row['speedup']}x), {row['bytes']} bytes"
+                )
+        if mismatched:
+            raise CommandError(f"Fast path output differs from the serializers for sizes {mismatched}.")
+
+    def _seed(self, owner, seeded: int, size: int, questions: int) -> int:
+        if size <= seeded:
+            return seeded
+        quizzes = Quiz.objects.bulk_create(
+            [
+                Quiz(owner=owner, title=f"Quiz {i} – Grundlagen", description="Benchmark", video_url=f"https://youtu.be/b{i}")
+                for i in range(seeded, size)
+            ]
+        )
+        Question.objects.bulk_create(
+            [
+                Question(
+                    quiz=quiz,
+                    question_title=f"Question {j}?",
+                    question_options=["Option A", "Option B", "Option C", "Option D"],
+                    answer="Option A",
+                )
+                for quiz in quizzes
+                for j in range(questions)
+            ],
+            batch_size=1000,
+        )
+        return size
+
+    def _measure(self, owner, size: int, runs: int):
+        def queryset():
+            return Quiz.objects.filter(owner=owner).order_by("-created_at", "-id")[:size]
+
+        def serializer_path():
+            data = QuizListSerializer(queryset().prefetch_related("questions"), many=True).data
+            return JSONRenderer().render(data)
+
+        def fast_path():
+            return fast_serialization.render(fast_serialization.quizzes(queryset()))
+
+        slow_body, slow = _timed(serializer_path, runs)
+        fast_body, fast = _timed(fast_path, runs)
+        return {
+            "quizzes": size,
+            "serializer_ms": round(slow * 1000, 3),
+            "fast_ms": round(fast * 1000, 3),
+            "speedup": round(slow / fast, 2) if fast else None,
+            "bytes": len(fast_body),
+            "identical": slow_body == fast_body,
+        }
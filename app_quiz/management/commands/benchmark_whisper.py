@@ -0,0 +1,108 @@
+# app_quiz/management/commands/benchmark_whisper.py
+import json
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from app_quiz import audio, transcription
+from app_quiz.utils import _whisper_model_name
+
+
+def _run(model_name, profile, samples, runs):
+    import whisper
+
+    model = profile.prepare_model(whisper.load_model(model_name))
+    options = profile.decode_options()
+    timings, text = [], ""
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = model.transcribe(samples, **options)
+        timings.append(time.perf_counter() - started)
+        text = (result.get("text") or "").strip()
+    return statistics.median(timings), text
+
+
+class Command(BaseCommand):
+    help = (
+        "Transcribe a local audio file with the plain Whisper settings and with "
+        "a CPU profile (WHISPER_* env or the flags below) and report real-time "
+        "factor and word error rate of both."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--audio", required=True, help="Local audio/video file (decoded with ffmpeg).")
+        parser.add_argument(
+            "--reference", default=None,
+            help="Text file with the reference transcript (default: WER of the profile against the baseline output).",
+        )
+        parser.add_argument("--model", default=None, help="Whisper model (default: WHISPER_MODEL).")
+        parser.add_argument("--runs", type=int, default=1, help="Transcriptions per setting; the median is reported.")
+        parser.add_argument("--int8", action="store_true", default=None, help="Dynamic int8 quantization.")
+        parser.add_argument("--threads", type=int, default=None, help="torch intra-op threads.")
+        parser.add_argument("--language", default=None, help="Fixed language, e.g. de or en.")
+        parser.add_argument("--beam-size", type=int, default=None, help="Beam size (1 = greedy).")
+        parser.add_argument(
+            "--no-condition-on-previous-text", dest="condition", action="store_false", default=None,
+            help="Decode every 30 s window without the previous text as prompt.",
+        )
+        parser.add_argument("--json", action="store_true", help="Print the report as JSON.")
+
+    def handle(self, *args, **options):
+        try:
+            samples = audio.decode_pcm(options["audio"])
+        except (OSError, RuntimeError) as exc:
+            raise CommandError(f"cannot decode {options['audio']}: {exc}")
+        duration = len(samples) / transcription.SAMPLE_RATE
+        if not duration:
+            raise CommandError("audio file contains no samples")
+
+        reference = None
+        if options["reference"]:
+            with open(options["reference"], encoding="utf-8") as fh:
+                reference = fh.read()
+
+        profile = transcription.CpuProfile.from_env()
+        overrides = {
+            "int8": options["int8"],
+            "threads": options["threads"],
+            "language": options["language"],
+            "beam_size": options["beam_size"],
+            "condition_on_previous_text": options["condition"],
+        }
+        for field, value in overrides.items():
+            if value is not None:
+                setattr(profile, field, value)
+
+        model_name = options["model"] or _whisper_model_name()
+        runs = max(1, options["runs"])
+        report = {"model": model_name, "audio_sec": round(duration, 2), "runs": runs, "settings": {}}
+        texts = {}
+        for label, settings in (("baseline", transcription.CpuProfile()), ("profile", profile)):
+            seconds, texts[label] = _run(model_name, settings, samples, runs)
+            report["settings"][label] = {
+                "options": settings.decode_options(),
+                "int8": settings.int8,
+                "threads": settings.threads,
+                "seconds": round(seconds, 3),
+                "rtf": round(seconds / duration, 4),
+            }
+        if reference is not None:
+            for label, text in texts.items():
+                report["settings"][label]["wer"] = round(transcription.word_error_rate(reference, text), 4)
+        else:
+            report["settings"]["profile"]["wer_vs_baseline"] = round(
+                transcription.word_error_rate(texts["baseline"], texts["profile"]), 4
+            )
+
+        if options["json"]:
+            self.stdout.write(json.dumps(report))
+            return
+        self.stdout.write(f"model={model_name} audio={report['audio_sec']}s runs={runs}")
+        for label, row in report["settings"].items():
+            wer = row.get("wer", row.get("wer_vs_baseline"))
+            self.stdout.write(
+                f"{label:<8} rtf={row['rtf']} ({row['seconds']}s) int8={row['int8']} "
+                f"threads={row['threads'] or 'default'} options={row['options']}"
+                + (f" wer={wer}" if wer is not None else "")
+            )
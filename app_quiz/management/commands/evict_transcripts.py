@@ -0,0 +1,47 @@
+# app_quiz/management/commands/evict_transcripts.py
+import os
+
+from django.core.management.base import BaseCommand
+
+from app_quiz.transcript_cache import cache_stats, evict_transcripts
+
+
+def _env_float(name: str):
+    raw = os.getenv(name, "").strip()
+    return float(raw) if raw else None
+
+
+class Command(BaseCommand):
+    help = "Evict cached transcripts by age and/or total compressed size (LRU)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--max-age-days",
+            type=float,
+            default=_env_float("TRANSCRIPT_CACHE_MAX_AGE_DAYS"),
+            help="Drop entries not used for this many days.",
+        )
+        parser.add_argument(
+            "--max-total-mb",
+            type=float,
+            default=_env_float("TRANSCRIPT_CACHE_MAX_MB"),
+            help="Drop least recently used entries until the cache fits this size.",
+        )
+        parser.add_argument("--stats", action="store_true", help="Only print cache statistics.")
+
+    def handle(self, *args, **options):
+        if not options["stats"]:
+            max_mb = options["max_total_mb"]
+            deleted = evict_transcripts(
+                max_age_days=options["max_age_days"],
+                max_total_bytes=int(max_mb * 1024 * 1024) if max_mb is not None else None,
+            )
+            self.stdout.write(self.style.SUCCESS(f"Evicted {deleted} transcript(s)."))
+
+        stats = cache_stats()
+        lookups = stats["hits"] + stats["misses"]
+        ratio = stats["hits"] / lookups if lookups else 0.0
+        self.stdout.write(
+            f"entries={stats['entries']} size={stats['size_bytes']}B "
+            f"hits={stats['hits']} misses={stats['misses']} hit_ratio={ratio:.2%}"
+        )
@@ -0,0 +1,117 @@
+# app_quiz/management/commands/ingest_quizzes.py
+import signal
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from app_quiz import batches
+from app_quiz.jobs import QuizWorkerPool
+from app_quiz.models import QuizBatch
+
+
+class Command(BaseCommand):
+    help = (
+        "Pre-generate quizzes for a list of YouTube URLs and/or playlists. "
+        "Interrupted runs continue with --resume BATCH_ID."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("urls", nargs="*", help="Video or playlist URLs.")
+        parser.add_argument("--owner", required=True, help="Username that will own the quizzes.")
+        parser.add_argument("--file", help="Text file with one URL per line (# starts a comment).")
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=2,
+            help="Videos processed in parallel (default: 2).",
+        )
+        parser.add_argument("--resume", type=int, metavar="BATCH_ID", help="Continue an interrupted batch.")
+        parser.add_argument(
+            "--retry-failed",
+            action="store_true",
+            help="With --resume: queue the failed jobs of the batch again.",
+        )
+        parser.add_argument(
+            "--enqueue-only",
+            action="store_true",
+            help="Only create the jobs; run_quiz_workers processes them.",
+        )
+        parser.add_argument(
+            "--force-regenerate",
+            action="store_true",
+            help="Generate new quizzes even where the owner already has one.",
+        )
+
+    def _read_urls(self, options):
+        urls = list(options["urls"])
+        if options["file"]:
+            try:
+                with open(options["file"], "r", encoding="utf-8") as fh:
+                    for line in fh:
+                        line = line.split("#", 1)[0].strip()
+                        if line:
+                            urls.append(line)
+            except OSError as e:
+                raise CommandError(f"Cannot read {options['file']}: {e}")
+        return urls
+
+    def handle(self, *args, **options):
+        try:
+            owner = get_user_model().objects.get(username=options["owner"])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f"Unknown user {options['owner']!r}.")
+
+        if options["resume"]:
+            try:
+                batch = QuizBatch.objects.get(id=options["resume"], owner=owner)
+            except QuizBatch.DoesNotExist:
+                raise CommandError(f"Batch {options['resume']} of {owner.username} does not exist.")
+            requeued = batches.resume_batch(batch, retry_failed=options["retry_failed"])
+            self.stdout.write(f"Batch {batch.id}: {requeued} job(s) queued again.")
+        else:
+            urls = self._read_urls(options)
+            if not urls:
+                raise CommandError("No URLs given (positional arguments or --file).")
+            try:
+                batch, summary = batches.create_batch(
+                    owner, urls, force_regenerate=options["force_regenerate"]
+                )
+            except ValueError as e:
+                raise CommandError(str(e))
+            self.stdout.write(
+                f"Batch {batch.id}: {summary['queued']} queued, "
+                f"{len(summary['already_generated'])} already generated, "
+                f"{len(summary['in_progress'])} in progress, {len(summary['invalid'])} invalid."
+            )
+            for entry in summary["invalid"]:
+                self.stderr.write(f"  skipped {entry['url']}: {entry['error']}")
+
+        if options["enqueue_only"]:
+            return
+
+        pool = QuizWorkerPool(workers=max(1, options["concurrency"]), poll_interval=1.0, batch=batch)
+        stopped = []
+
+        def _stop(*_):
+            stopped.append(True)
+            pool.stop()
+
+        # Finish running jobs on SIGTERM/SIGINT; the rest stays queued for --resume
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(sig, _stop)
+
+        # Jobs handed back by admission control are queued again -> drain until done
+        while not stopped and not batches.is_finished(batch):
+            if not pool.run(once=True):
+                time.sleep(pool.poll_interval)  # jobs still running elsewhere
+
+        counts = batches.progress(batch)
+        self.stdout.write(
+            f"Batch {batch.id}: {counts['succeeded']} succeeded, {counts['failed']} failed, "
+            f"{counts['queued'] + counts['running']} pending (of {counts['total']})."
+        )
+        if not batches.is_finished(batch, counts):
+            self.stdout.write(f"Continue with: manage.py ingest_quizzes --owner {owner.username} --resume {batch.id}")
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Batch {batch.id} finished."))
@@ -0,0 +1,40 @@
+# app_quiz/management/commands/run_quiz_workers.py
+import signal
+
+from django.core.management.base import BaseCommand
+
+from app_quiz.jobs import QuizWorkerPool
+
+
+class Command(BaseCommand):
+    help = "Run the local worker pool that processes queued quiz generation jobs."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=None,
+            help="Concurrent jobs (default: QUIZ_WORKER_CONCURRENCY or 2).",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=2.0,
+            help="Seconds to wait between polls when the queue is empty.",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Drain the queue and exit instead of polling forever.",
+        )
+
+    def handle(self, *args, **options):
+        pool = QuizWorkerPool(workers=options["workers"], poll_interval=options["poll_interval"])
+
+        # Finish running jobs on SIGTERM/SIGINT, but do not claim new ones
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(sig, lambda *_: pool.stop())
+
+        self.stdout.write(f"Quiz workers started ({pool.workers} threads).")
+        processed = pool.run(once=options["once"])
+        self.stdout.write(self.style.SUCCESS(f"Quiz workers stopped after {processed} job(s)."))
@@ -0,0 +1,348 @@
+# app_quiz/metrics.py
+"""
+Small in-process metrics registry with Prometheus text exposition.
+
+Counters and histograms live in memory and are flushed as one JSON
+snapshot per process to METRICS_DIR, at most every METRICS_FLUSH_SEC and
+at the latest METRICS_FLUSH_SEC after an update (a timer thread, so idle
+workers publish their last values too). The /metrics endpoint sums the
+snapshots of all processes (gunicorn workers, quiz workers), so every
+scrape sees the whole server no matter which worker answers it.
+Snapshots of exited processes are kept: counters stay monotonic across
+worker restarts. gunicorn.conf.py clears the directory on start.
+
+Kept free of Django imports (used from the pipeline and the workers).
+"""
+from __future__ import annotations
+
+import atexit
+import json
+import math
+import os
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Sequence, Tuple
+
+_DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+_STAGE_BUCKETS = (0.001, 0.01, 0.05, 0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800)
+_QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+_FILE_PREFIX = "metrics-"
+
+
+def enabled() -> bool:
+    return os.getenv("METRICS", "1").strip().lower() not in {"0", "false", "no", "off"}
+
+
+def metrics_dir() -> str:
+    return os.getenv("METRICS_DIR") or os.path.join(tempfile.gettempdir(), "quizly-metrics")
+
+
+def _flush_interval() -> float:
+    try:
+        return float(os.getenv("METRICS_FLUSH_SEC", "5"))
+    except ValueError:
+        return 5.0
+
+
+def _key(labels: Dict[str, str]) -> str:
+    return json.dumps(sorted(labels.items()))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        registry.register(self)
+
+    def _labels(self, labels: Dict[str, str]) -> str:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return _key({k: str(v) for k, v in labels.items()})
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        registry.update(self, self._labels(labels), lambda cur: (cur or 0.0) + amount)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labelnames=(), buckets: Sequence[float] = _DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, help_text, labelnames)
+
+    def observe(self, value: float, **labels) -> None:
+        def apply(cur):
+            cur = cur or {"buckets": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    cur["buckets"][i] += 1
+            cur["sum"] += value
+            cur["count"] += 1
+            return cur
+
+        registry.update(self, self._labels(labels), apply)
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+
+class Registry:
+    """Per-process values plus the snapshot file they are flushed to."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], List[str]]] = []
+        self._lock = threading.RLock()
+        self._reset_process()
+
+    def _reset_process(self) -> None:
+        self._values: Dict[str, Dict[str, object]] = {}
+        self._pid = os.getpid()
+        # pid plus a random token: a recycled pid must not overwrite a dead worker's counters
+        self._file = f"{_FILE_PREFIX}{self._pid}-{uuid.uuid4().hex[:8]}.json"
+        self._last_flush = 0.0
+        self._dirty = False
+        # Pending flush of dirty values; threads do not survive a fork, so this is per process
+        self._timer = None
+
+    def _check_fork(self) -> None:
+        # A forked child starts empty; the parent's values are in the parent's file
+        if os.getpid() != self._pid:
+            self._reset_process()
+
+    def register(self, metric: _Metric) -> None:
+        with self._lock:
+            self._metrics[metric.name] = metric
+
+    def add_collector(self, fn: Callable[[], List[str]]) -> None:
+        """fn() returns exposition lines computed at scrape time (live gauges)."""
+        with self._lock:
+            self._collectors.append(fn)
+
+    def update(self, metric: _Metric, key: str, fn) -> None:
+        if not enabled():
+            return
+        with self._lock:
+            self._check_fork()
+            series = self._values.setdefault(metric.name, {})
+            series[key] = fn(series.get(key))
+            self._dirty = True
+            wait = self._last_flush + _flush_interval() - time.monotonic()
+            if wait > 0 and self._timer is None:
+                # An idle process must not sit on its last updates until the next one arrives
+                self._timer = threading.Timer(wait, self._timed_flush)
+                self._timer.daemon = True
+                self._timer.start()
+        if wait <= 0:
+            self.flush()
+
+    def _timed_flush(self) -> None:
+        with self._lock:
+            if os.getpid() != self._pid:
+                return
+            self._timer = None
+        self.flush()
+
+    def reset(self) -> None:
+        """Forget this process's values (tests)."""
+        with self._lock:
+            if self._timer is not None and os.getpid() == self._pid:
+                self._timer.cancel()
+            self._reset_process()
+
+    def flush(self) -> None:
+        """Write this process's snapshot (atomic replace)."""
+        with self._lock:
+            self._check_fork()
+            if not self._dirty:
+                return
+            payload = json.dumps(self._values)
+            self._dirty = False
+            self._last_flush = time.monotonic()
+            target_dir = metrics_dir()
+            target = os.path.join(target_dir, self._file)
+        try:
+            os.makedirs(target_dir, exist_ok=True)
+            tmp = f"{target}.{threading.get_ident()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as fh:
+                fh.write(payload)
+            os.replace(tmp, target)
+        except OSError:
+            with self._lock:
+                self._dirty = True  # retry on the next flush
+
+    def collect(self) -> Dict[str, Dict[str, object]]:
+        """Sum of the snapshots of all processes (this one flushed first)."""
+        self.flush()
+        totals: Dict[str, Dict[str, object]] = {}
+        try:
+            names = os.listdir(metrics_dir())
+        except FileNotFoundError:
+            names = []
+        for name in names:
+            if not (name.startswith(_FILE_PREFIX) and name.endswith(".json")):
+                continue
+            try:
+                with open(os.path.join(metrics_dir(), name), encoding="utf-8") as fh:
+                    snapshot = json.load(fh)
+            except (OSError, ValueError):
+                continue  # vanished or half-written by a dying process
+            for metric_name, series in snapshot.items():
+                metric = self._metrics.get(metric_name)
+                if metric is None:
+                    continue
+                merged = totals.setdefault(metric_name, {})
+                for key, value in series.items():
+                    merged[key] = _merge(metric, merged.get(key), value)
+        return totals
+
+    def render(self) -> str:
+        """Prometheus text exposition format 0.0.4."""
+        totals = self.collect()
+        lines: List[str] = []
+        for name in sorted(self._metrics):
+            metric = self._metrics[name]
+            lines.append(f"# HELP {name} {metric.help}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            for key, value in sorted(totals.get(name, {}).items()):
+                labels = json.loads(key)
+                if metric.kind == "counter":
+                    lines.append(f"{name}{_fmt_labels(labels)} {_fmt(value)}")
+                    continue
+                for bound, count in zip(metric.buckets, value["buckets"]):
+                    lines.append(f"{name}_bucket{_fmt_labels(labels + [['le', _fmt(bound)]])} {count}")
+                lines.append(f"{name}_bucket{_fmt_labels(labels + [['le', '+Inf']])} {value['count']}")
+                lines.append(f"{name}_sum{_fmt_labels(labels)} {_fmt(value['sum'])}")
+                lines.append(f"{name}_count{_fmt_labels(labels)} {value['count']}")
+        lines.extend(_cache_ratio_lines(totals))
+        for collect in list(self._collectors):
+            lines.extend(collect())
+        return "\n".join(lines) + "\n"
+
+
+def _merge(metric: _Metric, left, right):
+    if left is None:
+        return right
+    if metric.kind == "counter":
+        return left + right
+    return {
+        "buckets": [a + b for a, b in zip(left["buckets"], right["buckets"])],
+        "sum": left["sum"] + right["sum"],
+        "count": left["count"] + right["count"],
+    }
+
+
+def _fmt(value: float) -> str:
+    if isinstance(value, float) and (math.isinf(value) or value != int(value)):
+        return repr(value)
+    return str(int(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _fmt_labels(pairs: List[Tuple[str, str]]) -> str:
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(str(v))}"' for k, v in pairs) + "}"
+
+
+def _cache_ratio_lines(totals: Dict[str, Dict[str, object]]) -> List[str]:
+    per_cache: Dict[str, Dict[str, float]] = {}
+    for key, value in totals.get(CACHE_REQUESTS.name, {}).items():
+        labels = dict(json.loads(key))
+        per_cache.setdefault(labels["cache"], {})[labels["result"]] = value
+    lines = [
+        "# HELP quizly_cache_hit_ratio Hits / (hits + misses) since start, all processes.",
+        "# TYPE quizly_cache_hit_ratio gauge",
+    ]
+    for cache, counts in sorted(per_cache.items()):
+        total = counts.get("hit", 0) + counts.get("miss", 0)
+        if total:
+            lines.append(f'quizly_cache_hit_ratio{{cache="{_escape(cache)}"}} {counts.get("hit", 0) / total:.6g}')
+    return lines
+
+
+registry = Registry()
+atexit.register(registry.flush)
+
+
+# --------------------------- metric definitions ---------------------------
+
+STAGE_SECONDS = Histogram(
+    "quizly_pipeline_stage_seconds",
+    "Duration of quiz pipeline stages.",
+    ("stage",),
+    buckets=_STAGE_BUCKETS,
+)
+STAGE_ERRORS = Counter(
+    "quizly_pipeline_stage_errors_total",
+    "Pipeline stages that raised.",
+    ("stage",),
+)
+HTTP_SECONDS = Histogram(
+    "quizly_http_request_duration_seconds",
+    "API request latency per view.",
+    ("view", "method", "status"),
+)
+HTTP_DB_QUERIES = Histogram(
+    "quizly_http_db_queries",
+    "Database queries per API request.",
+    ("view",),
+    buckets=_QUERY_BUCKETS,
+)
+LLM_RETRIES = Counter(
+    "quizly_gemini_retries_total",
+    "Gemini re-asks after unparseable output or transient API errors.",
+    ("reason",),
+)
+CACHE_REQUESTS = Counter(
+    "quizly_cache_requests_total",
+    "Cache lookups by cache and result (hit/miss).",
+    ("cache", "result"),
+)
+ADMISSION_WAIT_SECONDS = Histogram(
+    "quizly_admission_wait_seconds",
+    "Time pipeline stages waited for a global slot.",
+    ("resource", "outcome"),
+    buckets=_STAGE_BUCKETS,
+)
+ADMISSION_REJECTED = Counter(
+    "quizly_admission_rejected_total",
+    "Requests turned away by admission control.",
+    ("resource", "reason"),
+)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Time one pipeline stage; failures are counted as well."""
+    started = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        STAGE_ERRORS.inc(stage=name)
+        raise
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - started, stage=name)
+
+
+def cache_result(cache: str, hit: bool) -> None:
+    CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
@@ -0,0 +1,41 @@
+# app_quiz/middleware.py
+import time
+
+from django.db import connection
+
+from app_quiz import metrics
+
+
+class MetricsMiddleware:
+    """
+    Records latency and DB query count per resolved view (URL name). The
+    snapshot file is written by the registry itself (at most every
+    METRICS_FLUSH_SEC, at scrape time and at exit), not per request.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not metrics.enabled():
+            return self.get_response(request)
+
+        queries = [0]
+
+        def count_query(execute, sql, params, many, context):
+            queries[0] += 1
+            return execute(sql, params, many, context)
+
+        started = time.perf_counter()
+        with connection.execute_wrapper(count_query):
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - started
+
+        match = getattr(request, "resolver_match", None)
+        view = (match.url_name or match.view_name) if match else "unmatched"
+        if view != "metrics":  # scrapes would drown the API numbers
+            metrics.HTTP_SECONDS.observe(
+                elapsed, view=view, method=request.method, status=str(response.status_code)
+            )
+            metrics.HTTP_DB_QUERIES.observe(queries[0], view=view)
+        return response
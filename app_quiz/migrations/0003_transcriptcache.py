@@ -0,0 +1,35 @@
+# Generated by Django 5.2.6 on 2026-10-18 01:34
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_quiz', '0002_quizjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TranscriptCache',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('video_id', models.CharField(max_length=32)),
+                ('whisper_model', models.CharField(max_length=64)),
+                ('transcript', models.BinaryField()),
+                ('language', models.CharField(blank=True, default='', max_length=16)),
+                ('duration_sec', models.FloatField(blank=True, null=True)),
+                ('size_bytes', models.PositiveIntegerField(default=0)),
+                ('hit_count', models.PositiveIntegerField(default=0)),
+                ('miss_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_used_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'ordering': ['-last_used_at'],
+                'indexes': [models.Index(fields=['last_used_at'], name='app_quiz_tr_last_us_245f81_idx')],
+                'constraints': [models.UniqueConstraint(fields=('video_id', 'whisper_model'), name='uniq_transcript_video_model')],
+            },
+        ),
+    ]
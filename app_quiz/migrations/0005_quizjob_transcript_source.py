@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-18 01:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_quiz', '0004_quizjob_idempotency_key'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quizjob',
+            name='transcript_source',
+            field=models.CharField(blank=True, default='', max_length=16),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-18 02:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_quiz', '0005_quizjob_transcript_source'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quizjob',
+            name='audio_trimmed_sec',
+            field=models.FloatField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.6 on 2026-10-18 02:14
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_quiz', '0006_quizjob_audio_trimmed_sec'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VideoMetadata',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('video_id', models.CharField(max_length=32, unique=True)),
+                ('title', models.CharField(blank=True, default='', max_length=300)),
+                ('duration_sec', models.FloatField(blank=True, null=True)),
+                ('language', models.CharField(blank=True, default='', max_length=16)),
+                ('is_live', models.BooleanField(default=False)),
+                ('subtitle_languages', models.JSONField(default=list)),
+                ('automatic_caption_languages', models.JSONField(default=list)),
+                ('fetched_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'ordering': ['-fetched_at'],
+            },
+        ),
+    ]
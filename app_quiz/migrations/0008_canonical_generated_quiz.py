@@ -0,0 +1,64 @@
+# Generated by Django 5.2.6 on 2026-10-18 02:22
+
+import re
+
+import django.utils.timezone
+from django.db import migrations, models
+
+# Same URL forms as utils._parse_video_id: watch?v=<id>, youtu.be/<id>, /live/<id>
+_VIDEO_ID = re.compile(r"(?:[?&]v=|youtu\.be/|/live/)([A-Za-z0-9_-]{5,})")
+
+
+def backfill_video_ids(apps, schema_editor):
+    Quiz = apps.get_model("app_quiz", "Quiz")
+    batch = []
+    for quiz in Quiz.objects.exclude(video_url="").only("id", "video_url").iterator(chunk_size=500):
+        match = _VIDEO_ID.search(quiz.video_url)
+        if match:
+            quiz.video_id = match.group(1)
+            batch.append(quiz)
+        if len(batch) >= 500:
+            Quiz.objects.bulk_update(batch, ["video_id"])
+            batch = []
+    if batch:
+        Quiz.objects.bulk_update(batch, ["video_id"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_quiz', '0007_videometadata'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quiz',
+            name='video_id',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=32),
+        ),
+        migrations.AddField(
+            model_name='quizjob',
+            name='force_regenerate',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.CreateModel(
+            name='GeneratedQuiz',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('video_id', models.CharField(max_length=32)),
+                ('prompt_version', models.CharField(max_length=32)),
+                ('llm_model', models.CharField(max_length=64)),
+                ('title', models.CharField(max_length=200)),
+                ('description', models.TextField(blank=True, default='')),
+                ('questions', models.JSONField(default=list)),
+                ('transcript_source', models.CharField(blank=True, default='', max_length=16)),
+                ('reuse_count', models.PositiveIntegerField(default=0)),
+                ('generated_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'ordering': ['-generated_at'],
+                'constraints': [models.UniqueConstraint(fields=('video_id', 'prompt_version', 'llm_model'), name='uniq_generated_video_prompt_model')],
+            },
+        ),
+        migrations.RunPython(backfill_video_ids, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.6 on 2026-10-18 03:00
+
+import re
+
+from django.conf import settings
+from django.db import migrations, models
+
+# Same URL forms as utils._parse_video_id: watch?v=<id>, youtu.be/<id>, /live/<id>
+_VIDEO_ID = re.compile(r"(?:[?&]v=|youtu\.be/|/live/)([A-Za-z0-9_-]{5,})")
+
+
+def backfill_video_ids(apps, schema_editor):
+    QuizJob = apps.get_model("app_quiz", "QuizJob")
+    batch = []
+    for job in QuizJob.objects.only("id", "video_url").iterator(chunk_size=500):
+        match = _VIDEO_ID.search(job.video_url)
+        if match:
+            job.video_id = match.group(1)
+            batch.append(job)
+        if len(batch) >= 500:
+            QuizJob.objects.bulk_update(batch, ["video_id"])
+            batch = []
+    if batch:
+        QuizJob.objects.bulk_update(batch, ["video_id"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_quiz', '0010_quiz_owner_created_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quizjob',
+            name='video_id',
+            field=models.CharField(blank=True, default='', max_length=32),
+        ),
+        migrations.AddIndex(
+            model_name='quizjob',
+            index=models.Index(fields=['owner', 'video_id'], name='quizjob_owner_video_idx'),
+        ),
+        migrations.RunPython(backfill_video_ids, migrations.RunPython.noop),
+    ]
@@ -12,11 +12,17 @@ class Quiz(models.Model):
     title = models.CharField(max_length=200)
     description = models.TextField(blank=True, default="")
     video_url = models.URLField(blank=True, default="")
+    # YouTube video id parsed from video_url (any URL form maps to the same id)
+    video_id = models.CharField(max_length=32, blank=True, default="", db_index=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            # Quiz list: owner filter + cursor order (created_at, id) newest first
+            models.Index(fields=["owner", "-created_at", "-id"], name="quiz_owner_created_idx"),
+        ]
 
     def __str__(self) -> str:
         return f"{self.title} ({self.owner_id})"
@@ -40,3 +46,180 @@ class Question(models.Model):
 
     def __str__(self) -> str:
         return f"Q{self.id}: {self.question_title[:50]}"
+
+
+class QuizBatch(models.Model):
+    """
+    Bulk pre-generation request (URL list or playlist). Every video is a
+    QuizJob of the batch; the job states are the batch's checkpoint.
+    """
+
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="quiz_batches",
+    )
+    # Playlist URL the batch was expanded from, "" for a plain URL list
+    source = models.URLField(blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+
+    def __str__(self) -> str:
+        return f"Batch {self.id} ({self.owner_id})"
+
+
+class QuizJob(models.Model):
+    """
+    Background quiz generation request (POST /api/createQuiz/?async=true).
+    Picked up by `manage.py run_quiz_workers`, links the finished quiz.
+    """
+
+    STATUS_QUEUED = "queued"
+    STATUS_RUNNING = "running"
+    STATUS_SUCCEEDED = "succeeded"
+    STATUS_FAILED = "failed"
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, "Queued"),
+        (STATUS_RUNNING, "Running"),
+        (STATUS_SUCCEEDED, "Succeeded"),
+        (STATUS_FAILED, "Failed"),
+    ]
+
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="quiz_jobs",
+    )
+    video_url = models.URLField()
+    # Parsed from video_url, so the same video matches across URL spellings (youtu.be, &t=, &list=)
+    video_id = models.CharField(max_length=32, blank=True, default="")
+    # Client supplied Idempotency-Key header; retries with the same key reattach to this job
+    idempotency_key = models.CharField(max_length=255, blank=True, default="")
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=STATUS_QUEUED)
+    quiz = models.ForeignKey(
+        Quiz,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="jobs",
+    )
+    error = models.TextField(blank=True, default="")
+    # Which path produced the transcript: "captions" or "whisper"
+    transcript_source = models.CharField(max_length=16, blank=True, default="")
+    # Seconds of silence cut before Whisper (None: no transcription ran, e.g. captions/cache)
+    audio_trimmed_sec = models.FloatField(null=True, blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    # Skip the canonical quiz of the video and run the pipeline again
+    force_regenerate = models.BooleanField(default=False)
+    batch = models.ForeignKey(
+        QuizBatch,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="jobs",
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["status", "created_at"]),
+            models.Index(fields=["owner", "video_id"], name="quizjob_owner_video_idx"),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["owner", "idempotency_key"],
+                condition=~models.Q(idempotency_key=""),
+                name="uniq_job_owner_idempotency_key",
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"Job {self.id} [{self.status}] {self.video_url}"
+
+
+class GeneratedQuiz(models.Model):
+    """
+    Canonical generation result per (video id, prompt version, LLM model).
+    Later quizzes for the same video are cloned from it instead of asking
+    Gemini again (see app_quiz.canonical).
+    """
+
+    video_id = models.CharField(max_length=32)
+    prompt_version = models.CharField(max_length=32)
+    llm_model = models.CharField(max_length=64)
+    title = models.CharField(max_length=200)
+    description = models.TextField(blank=True, default="")
+    # [{"question_title", "question_options", "answer"}, ...] as persisted
+    questions = models.JSONField(default=list)
+    transcript_source = models.CharField(max_length=16, blank=True, default="")
+    reuse_count = models.PositiveIntegerField(default=0)
+    # Set again when a forced regeneration replaces the result
+    generated_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ["-generated_at"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["video_id", "prompt_version", "llm_model"], name="uniq_generated_video_prompt_model"
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.video_id} [{self.prompt_version}/{self.llm_model}]"
+
+
+class VideoMetadata(models.Model):
+    """
+    yt-dlp metadata per YouTube video id from the pre-flight probe
+    (see app_quiz.video_probe): duration limit, transcript strategy, title.
+    """
+
+    video_id = models.CharField(max_length=32, unique=True)
+    title = models.CharField(max_length=300, blank=True, default="")
+    duration_sec = models.FloatField(null=True, blank=True)
+    language = models.CharField(max_length=16, blank=True, default="")
+    is_live = models.BooleanField(default=False)
+    # Languages with a fetchable caption track (keys as yt-dlp reports them, e.g. "en-GB", "de-orig")
+    subtitle_languages = models.JSONField(default=list)
+    automatic_caption_languages = models.JSONField(default=list)
+    fetched_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ["-fetched_at"]
+
+    def __str__(self) -> str:
+        return f"{self.video_id}: {self.title[:50]}"
+
+
+class TranscriptCache(models.Model):
+    """
+    Whisper transcript per (YouTube video id, Whisper model).
+    Repeat quizzes for the same video skip download + transcription.
+    The transcript is stored zlib-compressed (see app_quiz.transcript_cache).
+    """
+
+    video_id = models.CharField(max_length=32)
+    whisper_model = models.CharField(max_length=64)
+    transcript = models.BinaryField()
+    language = models.CharField(max_length=16, blank=True, default="")
+    duration_sec = models.FloatField(null=True, blank=True)
+    size_bytes = models.PositiveIntegerField(default=0)
+    hit_count = models.PositiveIntegerField(default=0)
+    miss_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ["-last_used_at"]
+        constraints = [
+            models.UniqueConstraint(fields=["video_id", "whisper_model"], name="uniq_transcript_video_model"),
+        ]
+        indexes = [models.Index(fields=["last_used_at"])]
+
+    def __str__(self) -> str:
+        return f"{self.video_id} [{self.whisper_model}]"
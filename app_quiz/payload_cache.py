@@ -0,0 +1,153 @@
+# app_quiz/payload_cache.py
+"""
+Server-side cache of the rendered quiz read responses.
+
+GET /api/quizzes/ and GET /api/quizzes/<id>/ store their JSON body
+together with ETag / Last-Modified in the Django cache alias
+"quiz_payloads" (QUIZ_PAYLOAD_CACHE: file, locmem, redis or off). A
+repeat read is answered from the entry: no ORM query, no DRF
+serialization, no rendering.
+
+Keys contain a version token per user (list) and per quiz (detail).
+Every write bumps the tokens: model signals for Quiz/Question saves and
+deletes, plus explicit calls where questions are bulk-inserted
+(bulk_create sends no signals). Inside a transaction the tokens are
+bumped again after the commit, so an entry a concurrent reader built
+from the pre-commit state is never read. Tokens are random, so
+concurrent bumps from several processes cannot collide.
+"""
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import uuid
+from typing import Dict, Iterable, Optional
+
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from app_quiz import metrics
+from app_quiz.api.conditional import query_key
+from app_quiz.models import Question, Quiz
+
+logger = logging.getLogger(__name__)
+
+CACHE_ALIAS = "quiz_payloads"
+
+
+def enabled() -> bool:
+    return os.getenv("QUIZ_PAYLOAD_CACHE", "file").strip().lower() not in {"0", "false", "no", "off"}
+
+
+def _ttl() -> int:
+    try:
+        return int(os.getenv("QUIZ_PAYLOAD_CACHE_TTL", "300"))
+    except ValueError:
+        return 300
+
+
+def _cache():
+    return caches[CACHE_ALIAS]
+
+
+# --------------------------- versions ---------------------------
+
+def _version_key(scope: str, ident) -> str:
+    return f"quizpayload:v:{scope}:{ident}"
+
+
+def _version(scope: str, ident) -> str:
+    key = _version_key(scope, ident)
+    token = _cache().get(key)
+    if token is None:
+        token = uuid.uuid4().hex
+        # add(): a token set concurrently by a writer wins
+        if not _cache().add(key, token, timeout=None):
+            token = _cache().get(key) or token
+    return token
+
+
+def _bump(keys: Iterable[str]) -> None:
+    try:
+        _cache().set_many({key: uuid.uuid4().hex for key in keys}, timeout=None)
+    except Exception:
+        # A failed bump would serve stale data -> drop everything instead
+        logger.exception("payload cache: version bump failed, clearing the cache")
+        _cache().clear()
+
+
+def invalidate(owner_id=None, quiz_id=None) -> None:
+    """Invalidate the user's list and/or the quiz detail now and, in a transaction, after the commit."""
+    if not enabled():
+        return
+    keys = []
+    if owner_id is not None:
+        keys.append(_version_key("user", owner_id))
+    if quiz_id is not None:
+        keys.append(_version_key("quiz", quiz_id))
+    if keys:
+        _bump(keys)
+        if transaction.get_connection().in_atomic_block:
+            transaction.on_commit(lambda: _bump(keys))
+
+
+def invalidate_quiz(quiz: Quiz) -> None:
+    invalidate(owner_id=quiz.owner_id, quiz_id=quiz.pk)
+
+
+@receiver([post_save, post_delete], sender=Quiz, dispatch_uid="quiz_payload_cache_quiz")
+def _quiz_changed(sender, instance: Quiz, **kwargs):
+    invalidate_quiz(instance)
+
+
+def _owner_id(question: Question):
+    if Question.quiz.is_cached(question):
+        return question.quiz.owner_id
+    return Quiz.objects.filter(pk=question.quiz_id).values_list("owner_id", flat=True).first()
+
+
+@receiver(post_save, sender=Question, dispatch_uid="quiz_payload_cache_question")
+def _question_saved(sender, instance: Question, **kwargs):
+    invalidate(owner_id=_owner_id(instance), quiz_id=instance.quiz_id)
+
+
+@receiver(post_delete, sender=Question, dispatch_uid="quiz_payload_cache_question_delete")
+def _question_deleted(sender, instance: Question, origin=None, **kwargs):
+    if isinstance(origin, Quiz) or getattr(origin, "model", None) is Quiz:
+        return  # cascade from a quiz delete: the Quiz receiver invalidates
+    # One lookup and bump per quiz and delete() call, not per deleted row
+    done = origin.__dict__.setdefault("_payload_cache_quiz_ids", set()) if origin is not None else set()
+    if instance.quiz_id in done:
+        return
+    done.add(instance.quiz_id)
+    invalidate(owner_id=_owner_id(instance), quiz_id=instance.quiz_id)
+
+
+# --------------------------- entries ---------------------------
+
+def list_key(request) -> str:
+    """Entry key of the user's quiz list for this query string and host (links in paginated pages)."""
+    raw = f"{request.get_host()}?{query_key(request)}"
+    digest = hashlib.sha256(raw.encode("utf-8")).hexdigest()[:24]
+    user_id = request.user.pk
+    return f"quizpayload:list:{user_id}:{_version('user', user_id)}:{digest}"
+
+
+def detail_key(request, pk) -> str:
+    """Entry key of one quiz as seen by request.user (foreign users never hit the owner's entry)."""
+    return f"quizpayload:detail:{pk}:{request.user.pk}:{_version('quiz', pk)}"
+
+
+def get(key: str, cache: str) -> Optional[Dict]:
+    """Entry {"body", "etag", "last_modified"} or None; counted as cache=cache on /metrics."""
+    entry = _cache().get(key)
+    metrics.cache_result(cache, entry is not None)
+    return entry
+
+
+def put(key: str, body: bytes, validators) -> None:
+    etag, last_modified = validators
+    _cache().set(key, {"body": body, "etag": etag, "last_modified": last_modified}, timeout=_ttl())
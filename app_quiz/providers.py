@@ -0,0 +1,246 @@
+# app_quiz/providers.py
+"""
+Pluggable backends for the three external steps of the quiz pipeline:
+
+- Downloader: fetch the audio of a video into a temp dir (yt-dlp)
+- Transcriber: audio file -> {"text", "language", "duration", ...} (ffmpeg + VAD + Whisper)
+- LLM: prompt -> raw text, optionally streamed, plus the model name (Gemini)
+
+utils.py always goes through downloader() / transcriber() / llm(). The
+defaults wrap the real implementations; override() swaps in other
+backends, e.g. the deterministic Fake* stand-ins below, which simulate
+latency, failures and payload sizes without network access (used by the
+benchmark_pipeline command).
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, Optional, Protocol
+
+Progress = Callable[..., None]
+
+
+class Downloader(Protocol):
+    def download(self, tempdir: str, video_url: str, progress: Optional[Progress] = None) -> str: ...
+
+
+class Transcriber(Protocol):
+    def transcribe(self, audio_path: str, tempdir: str, progress: Optional[Progress] = None) -> Dict: ...
+
+
+class LLM(Protocol):
+    def model_name(self) -> str: ...
+
+    def generate(self, prompt: str, api_key: str) -> str: ...
+
+    def generate_stream(self, prompt: str, api_key: str) -> Iterator[str]: ...
+
+
+# --------------------------- real backends ---------------------------
+# Looked up on the utils/gemini modules at call time, so tests that patch
+# e.g. utils._download_audio_to keep working.
+
+class YtDlpDownloader:
+    def download(self, tempdir, video_url, progress=None):
+        from app_quiz import utils
+
+        return utils._download_audio_to(tempdir, video_url, progress=progress)
+
+
+class WhisperTranscriber:
+    def transcribe(self, audio_path, tempdir, progress=None):
+        from app_quiz import audio, metrics, utils, vad
+
+        if audio.lean_decode_enabled() or vad.vad_enabled():
+            with metrics.stage("decode"):
+                samples = utils._decode_audio(audio_path, tempdir)
+        else:
+            samples = audio_path  # AUDIO_LEAN_DECODE=0: Whisper decodes the m4a itself, as before
+        speech_map = None
+        if vad.vad_enabled():
+            with metrics.stage("vad"):
+                samples, speech_map = vad.trim_silence(samples)
+        with metrics.stage("transcribe"):
+            result = utils._transcribe_result(samples, progress=progress)
+        if speech_map is not None:
+            # Timestamps of the trimmed audio map back via speech_map
+            result.update(
+                duration=speech_map.original_sec,
+                removed_sec=round(speech_map.removed_sec, 2),
+                speech_map=speech_map.as_list(),
+            )
+        return result
+
+
+class GeminiLLM:
+    def model_name(self):
+        from app_quiz import gemini
+
+        if not os.getenv("GEMINI_MODEL"):
+            gemini.registry.configure(os.getenv("GEMINI_API_KEY"))  # auto-detection lists the models
+        return gemini.registry.model_name()
+
+    def generate(self, prompt, api_key):
+        from app_quiz import gemini
+
+        return gemini.registry.generate(prompt, api_key)
+
+    def generate_stream(self, prompt, api_key):
+        from app_quiz import gemini
+
+        return gemini.registry.generate_stream(prompt, api_key)
+
+
+# --------------------------- selection ---------------------------
+
+_DEFAULTS = {"downloader": YtDlpDownloader(), "transcriber": WhisperTranscriber(), "llm": GeminiLLM()}
+_active: Dict[str, object] = dict(_DEFAULTS)
+_lock = threading.Lock()
+
+
+def downloader() -> Downloader:
+    return _active["downloader"]
+
+
+def transcriber() -> Transcriber:
+    return _active["transcriber"]
+
+
+def llm() -> LLM:
+    return _active["llm"]
+
+
+@contextmanager
+def override(**backends):
+    """Temporarily replace backends: override(downloader=..., transcriber=..., llm=...)."""
+    unknown = set(backends) - set(_DEFAULTS)
+    if unknown:
+        raise TypeError(f"unknown provider(s): {', '.join(sorted(unknown))}")
+    with _lock:
+        previous = dict(_active)
+        _active.update({k: v for k, v in backends.items() if v is not None})
+    try:
+        yield
+    finally:
+        with _lock:
+            _active.clear()
+            _active.update(previous)
+
+
+# --------------------------- fakes ---------------------------
+
+class _FakeBackend:
+    """
+    Seeded behaviour per (key, call number): the same inputs give the same
+    latency, failures and output regardless of thread scheduling.
+    """
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, failure_rate: float = 0.0, seed: int = 0):
+        self.latency = max(0.0, latency)
+        self.jitter = max(0.0, jitter)
+        self.failure_rate = min(1.0, max(0.0, failure_rate))
+        self.seed = seed
+        self._calls: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def _rng(self, key: str) -> random.Random:
+        with self._lock:
+            self._calls[key] += 1
+            n = self._calls[key]
+        return random.Random(f"{type(self).__name__}:{self.seed}:{key}:{n}")
+
+    def _simulate(self, rng: random.Random, what: str) -> None:
+        delay = self.latency * (1 + rng.uniform(-self.jitter, self.jitter))
+        if delay > 0:
+            time.sleep(delay)
+        if rng.random() < self.failure_rate:
+            raise RuntimeError(f"simulated {what} failure")
+
+
+class FakeDownloader(_FakeBackend):
+    """Writes size_kb of pseudo-random bytes as audio.webm."""
+
+    def __init__(self, size_kb: int = 1024, **kwargs):
+        super().__init__(**kwargs)
+        self.size_kb = size_kb
+
+    def download(self, tempdir, video_url, progress=None):
+        rng = self._rng(video_url)
+        self._simulate(rng, "download")
+        path = os.path.join(tempdir, "audio.webm")
+        with open(path, "wb") as fh:
+            fh.write(rng.randbytes(self.size_kb * 1024))
+        if progress is not None:
+            progress("downloading", percent=100)
+        return path
+
+
+class FakeTranscriber(_FakeBackend):
+    """Returns `words` words of pseudo-random text, keyed by the audio content."""
+
+    _VOCAB = (
+        "graph node edge path weight tree root leaf search sort queue stack "
+        "memory cache thread process latency network packet server client"
+    ).split()
+
+    def __init__(self, words: int = 3000, **kwargs):
+        super().__init__(**kwargs)
+        self.words = words
+
+    def transcribe(self, audio_path, tempdir, progress=None):
+        with open(audio_path, "rb") as fh:
+            rng = self._rng(hashlib.sha1(fh.read(4096)).hexdigest())
+        self._simulate(rng, "transcription")
+        out = []
+        for i in range(self.words):
+            out.append(rng.choice(self._VOCAB))
+            if i % 12 == 11:
+                out[-1] += "."
+        if progress is not None:
+            progress("transcribing", percent=100)
+        return {"text": " ".join(out), "language": "en", "duration": self.words / 2.5}
+
+
+class FakeLLM(_FakeBackend):
+    """Answers every prompt with a valid quiz JSON of `questions` questions."""
+
+    def __init__(self, questions: int = 10, **kwargs):
+        super().__init__(**kwargs)
+        self.questions = questions
+
+    def _payload(self, prompt: str) -> str:
+        rng = self._rng(prompt)
+        self._simulate(rng, "LLM")
+        tag = rng.getrandbits(32)
+        return json.dumps(
+            {
+                "title": f"Benchmark quiz {tag:08x}",
+                "description": "Generated by the fake LLM backend.",
+                "questions": [
+                    {
+                        "question_title": f"Question {k + 1} ({tag:08x})?",
+                        "question_options": [f"Option {c}" for c in "ABCD"],
+                        "answer": "Option A",
+                    }
+                    for k in range(self.questions)
+                ],
+            }
+        )
+
+    def model_name(self):
+        return "fake-llm"
+
+    def generate(self, prompt, api_key):
+        return self._payload(prompt)
+
+    def generate_stream(self, prompt, api_key):
+        text = self._payload(prompt)
+        for i in range(0, len(text), 64):
+            yield text[i:i + 64]
@@ -0,0 +1,315 @@
+# app_quiz/query_audit.py
+"""
+Query-count, EXPLAIN and latency audit of the API endpoints.
+
+seed() bulk-inserts realistic volumes (users, quizzes, questions, a job,
+a batch and a canonical quiz), ENDPOINTS describes one request per API
+endpoint, and audit() runs each of them through the Django test client
+while recording every SQL statement with its parameters. Used by
+tests/test_query_regressions.py (query budgets, index use) and by
+`manage.py benchmark_api` (latency baselines at production-like volumes).
+
+The payload cache is off during the audit unless an endpoint asks for a
+warm cache, so the counts describe the ORM path.
+"""
+from __future__ import annotations
+
+import math
+import os
+import statistics
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from app_quiz import payload_cache, providers
+from app_quiz.models import GeneratedQuiz, Question, Quiz, QuizBatch, QuizJob
+
+PASSWORD = "audit-password-123"
+CANONICAL_VIDEO = "auditcanon1"
+_APP_TABLES = ("app_quiz_", "auth_user", "token_blacklist_")
+
+
+@dataclass
+class Seed:
+    users: List = field(default_factory=list)
+    quiz_ids: Dict[int, List[int]] = field(default_factory=dict)  # user id -> quiz ids, newest first
+    job_id: Optional[int] = None
+    batch_id: Optional[int] = None
+    questions_per_quiz: int = 0
+
+    @property
+    def user(self):
+        """The user the authenticated requests run as (has the most data)."""
+        return self.users[0]
+
+
+def seed(users: int = 20, quizzes_per_user: int = 50, questions_per_quiz: int = 10) -> Seed:
+    """Bulk-insert the audit data set; every user gets the same password hash (hashed once)."""
+    User = get_user_model()
+    tag = uuid.uuid4().hex[:8]
+    password = make_password(PASSWORD)
+    User.objects.bulk_create(
+        [User(username=f"audit-{tag}-{i}", email=f"audit-{tag}-{i}@example.com", password=password)
+         for i in range(users)]
+    )
+    result = Seed(
+        users=list(User.objects.filter(username__startswith=f"audit-{tag}-").order_by("id")),
+        questions_per_quiz=questions_per_quiz,
+    )
+
+    now = timezone.now()
+    quizzes = Quiz.objects.bulk_create(
+        [
+            Quiz(
+                owner=owner,
+                title=f"Quiz {i} of {owner.username}",
+                description="Seeded for the query audit",
+                video_url=f"https://www.youtube.com/watch?v={tag}{owner.pk}x{i}",
+                video_id=f"{tag}{owner.pk}x{i}",
+            )
+            for owner in result.users
+            for i in range(quizzes_per_user)
+        ],
+        batch_size=500,
+    )
+    # Spread created_at like real accounts (bulk_create stamps them all with "now")
+    for offset, quiz in enumerate(quizzes):
+        quiz.created_at = now - timedelta(minutes=offset)
+    Quiz.objects.bulk_update(quizzes, ["created_at"], batch_size=500)
+    for quiz in quizzes:
+        result.quiz_ids.setdefault(quiz.owner_id, []).append(quiz.pk)
+
+    Question.objects.bulk_create(
+        [
+            Question(
+                quiz=quiz,
+                question_title=f"Question {j} about {quiz.title}?",
+                question_options=["Option A", "Option B", "Option C", "Option D"],
+                answer="Option A",
+            )
+            for quiz in quizzes
+            for j in range(questions_per_quiz)
+        ],
+        batch_size=1000,
+    )
+
+    owner = result.user
+    batch = QuizBatch.objects.create(owner=owner)
+    QuizJob.objects.bulk_create(
+        [
+            QuizJob(owner=owner, batch=batch, video_url=f"https://www.youtube.com/watch?v={tag}job{i}",
+                    video_id=f"{tag}job{i}")
+            for i in range(10)
+        ]
+    )
+    result.batch_id = batch.pk
+    result.job_id = batch.jobs.order_by("id").values_list("id", flat=True).first()
+
+    from app_quiz import utils  # heavy import, only needed here
+
+    GeneratedQuiz.objects.update_or_create(
+        video_id=CANONICAL_VIDEO,
+        prompt_version=utils._prompt_version(),
+        llm_model=providers.llm().model_name(),
+        defaults={
+            "title": "Canonical quiz",
+            "description": "",
+            "questions": [
+                {"question_title": f"Q{j}", "question_options": ["A", "B", "C", "D"], "answer": "A"}
+                for j in range(questions_per_quiz)
+            ],
+            "generated_at": timezone.now(),
+        },
+    )
+    return result
+
+
+# --------------------------- endpoints ---------------------------
+
+@dataclass
+class Endpoint:
+    name: str
+    method: str
+    path: Callable[[Seed], str]
+    data: Optional[Callable[[Seed], Dict]] = None
+    auth: bool = True
+    status: int = 200
+    warm_cache: bool = False  # first request fills the payload cache, the measured one hits it
+    setup: Optional[Callable[[Seed], Dict]] = None  # returns extra path kwargs (fresh objects per call)
+    explain: bool = False  # main read queries whose plans are checked for index use
+
+
+def _fresh_quiz(s: Seed) -> Dict:
+    """A quiz shaped like the seeded ones, so cascade deletes of its questions are counted."""
+    quiz = Quiz.objects.create(owner=s.user, title="To be deleted")
+    Question.objects.bulk_create(
+        [
+            Question(quiz=quiz, question_title=f"Question {j}?", question_options=["A", "B", "C", "D"], answer="A")
+            for j in range(s.questions_per_quiz)
+        ]
+    )
+    return {"victim": quiz.pk}
+
+
+ENDPOINTS: List[Endpoint] = [
+    Endpoint("auth.register", "post", lambda s: "/api/register/", auth=False, status=201,
+             data=lambda s: {"username": f"new-{uuid.uuid4().hex[:10]}", "email": f"{uuid.uuid4().hex[:10]}@example.com",
+                             "password": PASSWORD, "confirmed_password": PASSWORD}),
+    Endpoint("auth.login", "post", lambda s: "/api/login/", auth=False,
+             data=lambda s: {"username": s.user.username, "password": PASSWORD}),
+    Endpoint("auth.token_refresh", "post", lambda s: "/api/token/refresh/"),
+    Endpoint("auth.logout", "post", lambda s: "/api/logout/"),
+    Endpoint("quizzes.list", "get", lambda s: "/api/quizzes/", explain=True),
+    Endpoint("quizzes.list_summary", "get", lambda s: "/api/quizzes/?view=summary", explain=True),
+    Endpoint("quizzes.list_page", "get", lambda s: "/api/quizzes/?page_size=20", explain=True),
+    Endpoint("quizzes.list_cached", "get", lambda s: "/api/quizzes/", warm_cache=True),
+    Endpoint("quizzes.detail", "get", lambda s: f"/api/quizzes/{s.quiz_ids[s.user.pk][0]}/", explain=True),
+    Endpoint("quizzes.patch", "patch", lambda s: f"/api/quizzes/{s.quiz_ids[s.user.pk][1]}/",
+             data=lambda s: {"title": "Renamed by the audit"}),
+    Endpoint("quizzes.delete", "delete", lambda s: "/api/quizzes/{victim}/", status=204, setup=_fresh_quiz),
+    Endpoint("quizzes.create_reused", "post", lambda s: "/api/createQuiz/", status=201,
+             data=lambda s: {"url": f"https://www.youtube.com/watch?v={CANONICAL_VIDEO}"}),
+    Endpoint("quizzes.create_async", "post", lambda s: "/api/createQuiz/?async=true", status=202,
+             data=lambda s: {"url": "https://www.youtube.com/watch?v=auditasync1"}),
+    Endpoint("jobs.detail", "get", lambda s: f"/api/jobs/{s.job_id}/"),
+    Endpoint("batches.detail", "get", lambda s: f"/api/batches/{s.batch_id}/"),
+    Endpoint("health.ready", "get", lambda s: "/api/health/ready/", auth=False),
+]
+
+
+def client_for(user=None) -> Client:
+    """Test client, logged in through fresh JWT cookies when user is given (no login round trip)."""
+    client = Client()
+    if user is not None:
+        refresh = RefreshToken.for_user(user)
+        client.cookies[getattr(settings, "AUTH_COOKIE", "access_token")] = str(refresh.access_token)
+        client.cookies[getattr(settings, "REFRESH_COOKIE", "refresh_token")] = str(refresh)
+    return client
+
+
+@contextmanager
+def _env(**values):
+    previous = {k: os.environ.get(k) for k in values}
+    os.environ.update(values)
+    try:
+        yield
+    finally:
+        for key, value in previous.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+
+@contextmanager
+def recording():
+    """Collects (sql, params) of every statement on the default connection."""
+    statements: List[Tuple[str, tuple]] = []
+
+    def record(execute, sql, params, many, context):
+        statements.append((sql, params))
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(record):
+        yield statements
+
+
+def call(endpoint: Endpoint, s: Seed):
+    """One request: (response, [(sql, params)], seconds). Setup queries are not counted."""
+    kwargs = endpoint.setup(s) if endpoint.setup else {}
+    client = client_for(s.user if endpoint.auth else None)
+    path = endpoint.path(s).format(**kwargs)
+    data = endpoint.data(s) if endpoint.data else None
+    send = getattr(client, endpoint.method)
+
+    def request():
+        if data is None:
+            return send(path)
+        return send(path, data=data, content_type="application/json")
+
+    with _env(QUIZ_PAYLOAD_CACHE="1" if endpoint.warm_cache else "off", METRICS="0"):
+        if endpoint.warm_cache:
+            request()
+        with recording() as statements:
+            started = time.perf_counter()
+            response = request()
+            elapsed = time.perf_counter() - started
+        if endpoint.warm_cache:
+            # Seeded rows may be rolled back and their ids reused: drop the entries now
+            payload_cache.invalidate(owner_id=s.user.pk)
+    return response, statements, elapsed
+
+
+# --------------------------- EXPLAIN ---------------------------
+
+def explain(sql: str, params) -> List[str]:
+    """EXPLAIN QUERY PLAN detail lines (SQLite), e.g. "SEARCH app_quiz_quiz USING INDEX …"."""
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def plan_problems(plan: List[str]) -> List[str]:
+    """
+    Full table scans of app tables and sorts of whole result sets; an
+    indexed SEARCH is fine. The COUNT(DISTINCT) of the ETag aggregate only
+    dedupes rows that were already found through the owner index.
+    """
+    problems = []
+    for line in plan:
+        if line.startswith("SCAN ") and any(t in line for t in _APP_TABLES) and "COVERING INDEX" not in line:
+            problems.append(line)
+        elif "USE TEMP B-TREE" in line and "count(DISTINCT)" not in line:
+            problems.append(line)
+    return problems
+
+
+def is_select(sql: str) -> bool:
+    return sql.lstrip().upper().startswith("SELECT")
+
+
+# --------------------------- audit ---------------------------
+
+def audit(s: Seed, runs: int = 1, endpoints: Optional[List[Endpoint]] = None) -> Dict[str, Dict]:
+    """
+    {endpoint name: {"status", "queries", "p50_ms", "p95_ms", "plans"}}.
+    Plans are collected for the SELECTs of endpoints with explain=True
+    (SQLite only, other backends format EXPLAIN differently).
+    """
+    report: Dict[str, Dict] = {}
+    with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"]):
+        for endpoint in endpoints or ENDPOINTS:
+            timings, counts, statuses, statements = [], set(), set(), []
+            for _ in range(max(1, runs)):
+                response, statements, elapsed = call(endpoint, s)
+                timings.append(elapsed)
+                counts.add(len(statements))
+                statuses.add(response.status_code)
+            plans = []
+            if endpoint.explain and connection.vendor == "sqlite":
+                for sql, params in statements:
+                    if is_select(sql) and "app_quiz_" in sql:
+                        plan = explain(sql, params)
+                        plans.append({"sql": sql, "plan": plan, "problems": plan_problems(plan)})
+            timings.sort()
+            p95_rank = max(1, math.ceil(0.95 * len(timings)))
+            report[endpoint.name] = {
+                "status": sorted(statuses),
+                "queries": max(counts),
+                "p50_ms": round(statistics.median(timings) * 1000, 3),
+                "p95_ms": round(timings[p95_rank - 1] * 1000, 3),
+                "plans": plans,
+            }
+    return report
@@ -0,0 +1,114 @@
+# app_quiz/singleflight.py
+"""
+Cross-process single-flight for quiz generation.
+
+Concurrent requests for the same video id serialize on one FileLock. The
+first holder (leader) runs the pipeline and drops its result next to the
+lock; everybody who was waiting picks that result up instead of running
+download + Whisper + Gemini again. Works across gunicorn workers because
+the coordination happens on the file system (SINGLEFLIGHT_DIR).
+
+Successful results are reused for SINGLEFLIGHT_RESULT_TTL seconds. A
+failure is only shared with requests that were already waiting for it,
+so a later retry always gets a fresh attempt.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+import uuid
+from typing import Callable, Dict, Optional
+
+from filelock import FileLock, Timeout
+
+from app_quiz import admission
+
+logger = logging.getLogger(__name__)
+
+
+class CoalescedError(RuntimeError):
+    """The in-flight generation we waited for failed with a non-user error."""
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, str(default)))
+    except ValueError:
+        return default
+
+
+def _base_dir() -> str:
+    path = os.getenv("SINGLEFLIGHT_DIR", "").strip() or os.path.join(
+        tempfile.gettempdir(), "quizly-singleflight"
+    )
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _paths(key: str):
+    digest = hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]
+    base = _base_dir()
+    return os.path.join(base, f"{digest}.lock"), os.path.join(base, f"{digest}.json")
+
+
+def _read(path: str) -> Optional[Dict]:
+    try:
+        with open(path, "r", encoding="utf-8") as fh:
+            return json.load(fh)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def _write_atomic(path: str, record: Dict) -> None:
+    tmp = f"{path}.{os.getpid()}-{uuid.uuid4().hex}.tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(record, fh)
+    os.replace(tmp, path)
+
+
+def run_once(key: str, fn: Callable[[], Dict]) -> Dict:
+    """
+    Run fn() at most once per key among concurrent callers (all processes).
+    Waiters receive the leader's result; ValueError from the leader is
+    re-raised as ValueError (user error), anything else as CoalescedError.
+    Admission rejections (server busy) are not shared.
+    """
+    lock_path, result_path = _paths(key)
+    ttl = _env_float("SINGLEFLIGHT_RESULT_TTL", 60)
+    arrived = time.time()
+
+    try:
+        with FileLock(lock_path, timeout=_env_float("SINGLEFLIGHT_WAIT_SEC", 1800)):
+            record = _read(result_path)
+            if record is not None:
+                finished = record.get("finished_at", 0)
+                if "result" in record and finished >= arrived - ttl:
+                    logger.info("single-flight: reused result for %s", key)
+                    return record["result"]
+                if "error" in record and finished >= arrived:
+                    # We were queued behind this failure -> share it
+                    if record.get("kind") == "value":
+                        raise ValueError(record["error"])
+                    raise CoalescedError(record["error"])
+
+            try:
+                result = fn()
+            except admission.Rejected:
+                raise  # not shared: waiters try for a slot themselves
+            except ValueError as e:
+                _write_atomic(result_path, {"error": str(e), "kind": "value", "finished_at": time.time()})
+                raise
+            except Exception:
+                _write_atomic(
+                    result_path,
+                    {"error": "Quiz generation failed.", "kind": "runtime", "finished_at": time.time()},
+                )
+                raise
+            _write_atomic(result_path, {"result": result, "finished_at": time.time()})
+            return result
+    except Timeout as e:
+        raise RuntimeError(f"Timed out waiting for in-flight generation of {key}.") from e
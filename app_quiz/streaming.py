@@ -0,0 +1,78 @@
+# app_quiz/streaming.py
+"""
+Helpers for the streaming createQuiz variant (Server-Sent Events).
+
+QuestionStreamParser is fed the Gemini output piece by piece and returns
+every object of the top-level "questions" array as soon as its closing
+brace has arrived, so questions can be pushed to the client long before
+the whole JSON document is complete.
+"""
+from __future__ import annotations
+
+import json
+from typing import Dict, List, Optional
+
+
+class QuestionStreamParser:
+    """Incremental scanner (string/escape aware) for {"questions": [{...}, ...]}."""
+
+    def __init__(self):
+        self._buf = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_str = False
+        self._escaped = False
+        self._str_start = 0
+        self._last_key: Optional[str] = None
+        self._array_depth = 0  # depth inside the "questions" array, 0 = not in it
+        self._item_start: Optional[int] = None
+        self.questions: List[Dict] = []
+
+    def feed(self, text: str) -> List[Dict]:
+        """Consume the next piece of output; returns the questions completed by it."""
+        self._buf += text
+        buf = self._buf
+        found: List[Dict] = []
+        for i in range(self._pos, len(buf)):
+            c = buf[i]
+            if self._in_str:
+                if self._escaped:
+                    self._escaped = False
+                elif c == "\\":
+                    self._escaped = True
+                elif c == '"':
+                    self._in_str = False
+                    if self._depth == 1:
+                        self._last_key = buf[self._str_start:i]
+                continue
+
+            if c == '"':
+                self._in_str = True
+                self._str_start = i + 1
+            elif c == "[" or c == "{":
+                if c == "[" and self._depth == 1 and self._last_key == "questions":
+                    self._array_depth = 2
+                elif c == "{" and self._array_depth and self._depth == self._array_depth:
+                    self._item_start = i
+                self._depth += 1
+            elif c == "]" or c == "}":
+                self._depth -= 1
+                if c == "}" and self._item_start is not None and self._depth == self._array_depth:
+                    try:
+                        item = json.loads(buf[self._item_start:i + 1])
+                    except ValueError:
+                        item = None
+                    if isinstance(item, dict):
+                        found.append(item)
+                    self._item_start = None
+                elif c == "]" and self._array_depth and self._depth == 1:
+                    self._array_depth = 0
+        self._pos = len(buf)
+        self.questions.extend(found)
+        return found
+
+
+def sse_event(event: str, data) -> bytes:
+    """One Server-Sent Event frame with a JSON payload."""
+    payload = json.dumps(data, ensure_ascii=False, default=str)
+    return f"event: {event}\ndata: {payload}\n\n".encode("utf-8")
@@ -0,0 +1,120 @@
+# app_quiz/transcript_cache.py
+"""
+Persistent transcript store keyed by (video_id, whisper_model).
+
+Transcripts are zlib-compressed in the DB. Each row counts its hits
+(served from cache) and misses (had to be transcribed again), so the
+admin and `manage.py evict_transcripts --stats` show how well it works.
+"""
+from __future__ import annotations
+
+import os
+import zlib
+from datetime import timedelta
+from typing import Dict, Optional
+
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from app_quiz.models import TranscriptCache
+
+
+def is_enabled() -> bool:
+    return os.getenv("TRANSCRIPT_CACHE", "1").strip().lower() not in {"0", "false", "no", "off"}
+
+
+def get_cached_transcript(video_id: str, whisper_model: str) -> Optional[Dict]:
+    """
+    Return {"text", "language", "duration"} or None on a miss.
+    A hit bumps hit_count and last_used_at (used for LRU eviction).
+    """
+    row = (
+        TranscriptCache.objects.filter(video_id=video_id, whisper_model=whisper_model)
+        .only("id", "transcript", "language", "duration_sec")
+        .first()
+    )
+    if row is None:
+        return None
+
+    TranscriptCache.objects.filter(id=row.id).update(
+        hit_count=F("hit_count") + 1,
+        last_used_at=timezone.now(),
+    )
+    return {
+        "text": zlib.decompress(bytes(row.transcript)).decode("utf-8"),
+        "language": row.language,
+        "duration": row.duration_sec,
+    }
+
+
+def store_transcript(
+    video_id: str,
+    whisper_model: str,
+    text: str,
+    language: str = "",
+    duration: Optional[float] = None,
+) -> TranscriptCache:
+    """Insert or refresh the transcript and count the miss that produced it."""
+    blob = zlib.compress(text.encode("utf-8"), 6)
+    row, created = TranscriptCache.objects.get_or_create(
+        video_id=video_id,
+        whisper_model=whisper_model,
+        defaults={
+            "transcript": blob,
+            "language": language or "",
+            "duration_sec": duration,
+            "size_bytes": len(blob),
+            "miss_count": 1,
+        },
+    )
+    if not created:
+        TranscriptCache.objects.filter(id=row.id).update(
+            transcript=blob,
+            language=language or "",
+            duration_sec=duration,
+            size_bytes=len(blob),
+            miss_count=F("miss_count") + 1,
+            last_used_at=timezone.now(),
+        )
+    return row
+
+
+def cache_stats() -> Dict[str, int]:
+    agg = TranscriptCache.objects.aggregate(
+        hits=Sum("hit_count"), misses=Sum("miss_count"), size=Sum("size_bytes")
+    )
+    return {
+        "entries": TranscriptCache.objects.count(),
+        "hits": agg["hits"] or 0,
+        "misses": agg["misses"] or 0,
+        "size_bytes": agg["size"] or 0,
+    }
+
+
+def evict_transcripts(
+    max_age_days: Optional[float] = None,
+    max_total_bytes: Optional[int] = None,
+) -> int:
+    """
+    Eviction policy:
+    1) drop entries not used for more than max_age_days
+    2) then drop least recently used entries until the compressed
+       total fits into max_total_bytes
+    Returns the number of deleted rows.
+    """
+    deleted = 0
+    if max_age_days is not None:
+        cutoff = timezone.now() - timedelta(days=max_age_days)
+        deleted += TranscriptCache.objects.filter(last_used_at__lt=cutoff).delete()[0]
+
+    if max_total_bytes is not None:
+        total = TranscriptCache.objects.aggregate(s=Sum("size_bytes"))["s"] or 0
+        if total > max_total_bytes:
+            doomed = []
+            for pk, size in TranscriptCache.objects.order_by("last_used_at", "id").values_list("id", "size_bytes"):
+                if total <= max_total_bytes:
+                    break
+                doomed.append(pk)
+                total -= size
+            deleted += TranscriptCache.objects.filter(id__in=doomed).delete()[0]
+    return deleted
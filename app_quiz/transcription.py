@@ -0,0 +1,379 @@
+# app_quiz/transcription.py
+"""
+Chunked, parallel Whisper transcription for long recordings.
+
+The 16 kHz mono audio is cut near the target chunk length at the quietest
+frame (silence boundary), each chunk carries a little overlap into its
+predecessor, the chunks are transcribed in a process pool (one Whisper
+model per process, the cores shared among the gunicorn workers, shut
+down after WHISPER_POOL_IDLE_SEC without use, rebuilt once if a chunk
+process dies) and the texts are stitched back in order with the
+duplicated overlap words removed.
+
+CpuProfile bundles the CPU inference knobs (int8 dynamic quantization,
+torch thread count, fixed language, greedy vs beam search,
+condition_on_previous_text); the benchmark_whisper command compares a
+profile against the plain settings by real-time factor and WER.
+
+Kept free of Django imports on purpose: pool processes are started with
+"spawn" and import only this module.
+"""
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import os
+import re
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000  # Whisper's native input rate
+
+
+# --------------------------- configuration ---------------------------
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, str(default)))
+    except ValueError:
+        return default
+
+
+def chunking_enabled() -> bool:
+    return os.getenv("WHISPER_CHUNKED", "").strip().lower() in {"1", "true", "yes", "on"}
+
+
+def min_duration_for_chunking() -> float:
+    """Shorter clips keep the single model.transcribe call."""
+    return _env_float("WHISPER_CHUNK_MIN_SEC", 600)
+
+
+def available_cores() -> int:
+    try:
+        return max(1, len(os.sched_getaffinity(0)))
+    except AttributeError:  # not available on macOS/Windows
+        return max(1, os.cpu_count() or 1)
+
+
+def server_processes() -> int:
+    """Gunicorn workers on this host (each may build a pool), 1 elsewhere."""
+    if os.getenv("QUIZLY_SERVER_PROCESS") != "gunicorn":
+        return 1
+    return max(1, int(_env_float("GUNICORN_WORKERS", 3)))
+
+
+def pool_size() -> int:
+    """
+    Chunk processes per server process: the cores divided among the gunicorn
+    workers, so all pools together hold about one model per core.
+    """
+    raw = os.getenv("WHISPER_CHUNK_WORKERS", "").strip()
+    return max(1, int(raw)) if raw.isdigit() else max(1, available_cores() // server_processes())
+
+
+def pool_idle_seconds() -> float:
+    """An unused pool (and its models) is shut down after this long; 0 = after every transcription."""
+    return max(0.0, _env_float("WHISPER_POOL_IDLE_SEC", 300))
+
+
+# --------------------------- CPU inference profile ---------------------------
+
+_FALSY = {"0", "false", "no", "off"}
+
+
+@dataclass
+class CpuProfile:
+    """
+    Whisper inference settings for CPU-only hosts. The defaults reproduce
+    the plain model.transcribe(temperature=0, fp16=False) call; from_env()
+    reads the WHISPER_* knobs.
+    """
+
+    int8: bool = False  # dynamic int8 quantization of the Linear layers
+    threads: int = 0  # torch intra-op threads, 0 = torch default
+    language: str = ""  # fixed language skips auto-detection
+    beam_size: int = 0  # 0/1 = greedy, >1 = beam search
+    condition_on_previous_text: Optional[bool] = None  # None = Whisper default (True)
+
+    @classmethod
+    def from_env(cls) -> "CpuProfile":
+        condition = os.getenv("WHISPER_CONDITION_ON_PREVIOUS", "").strip().lower()
+        return cls(
+            int8=os.getenv("WHISPER_INT8", "").strip().lower() in {"1", "true", "yes", "on"},
+            threads=max(0, int(_env_float("WHISPER_TORCH_THREADS", 0))),
+            language=os.getenv("WHISPER_LANGUAGE", "").strip().lower(),
+            beam_size=max(0, int(_env_float("WHISPER_BEAM_SIZE", 0))),
+            condition_on_previous_text=(condition not in _FALSY) if condition else None,
+        )
+
+    def decode_options(self) -> Dict:
+        # fp16=False: CPU has no fast half precision
+        options: Dict = {"temperature": 0, "fp16": False}
+        if self.language:
+            options["language"] = self.language
+        if self.beam_size > 1:
+            options["beam_size"] = self.beam_size
+        if self.condition_on_previous_text is not None:
+            options["condition_on_previous_text"] = self.condition_on_previous_text
+        return options
+
+    def prepare_model(self, model):
+        """Apply thread count and int8 quantization to a freshly loaded model."""
+        try:
+            import torch
+        except ImportError:
+            return model
+        if self.threads:
+            torch.set_num_threads(self.threads)
+        if not self.int8:
+            return model
+        # whisper.model.Linear only adds a dtype cast (a no-op in fp32);
+        # quantize_dynamic matches exact types, so present them as nn.Linear
+        for module in model.modules():
+            if isinstance(module, torch.nn.Linear) and type(module) is not torch.nn.Linear:
+                module.__class__ = torch.nn.Linear
+        return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def word_error_rate(reference: str, hypothesis: str) -> float:
+    """(substitutions + deletions + insertions) / reference words, case and punctuation insensitive."""
+    ref = [w for w in (_norm(x) for x in reference.split()) if w]
+    hyp = [w for w in (_norm(x) for x in hypothesis.split()) if w]
+    if not ref:
+        return 0.0 if not hyp else 1.0
+    prev = list(range(len(hyp) + 1))
+    for i, r in enumerate(ref, start=1):
+        cur = [i] + [0] * len(hyp)
+        for j, h in enumerate(hyp, start=1):
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (r != h))
+        prev = cur
+    return prev[-1] / len(ref)
+
+
+# --------------------------- splitting ---------------------------
+
+def _frame_energy(audio: np.ndarray, frame: int) -> np.ndarray:
+    """RMS energy per non-overlapping frame (vectorized)."""
+    n = len(audio) // frame
+    if n == 0:
+        return np.zeros(0, dtype=np.float32)
+    frames = audio[: n * frame].reshape(n, frame)
+    return np.sqrt(np.mean(frames.astype(np.float32) ** 2, axis=1))
+
+
+def find_split_points(
+    audio: np.ndarray,
+    chunk_sec: float,
+    search_sec: float = 5.0,
+    frame_ms: int = 30,
+    sr: int = SAMPLE_RATE,
+) -> List[int]:
+    """
+    Sample offsets where to cut: for every multiple of chunk_sec, the
+    quietest frame within +/- search_sec of it.
+    """
+    frame = max(1, int(sr * frame_ms / 1000))
+    energy = _frame_energy(audio, frame)
+    total = len(audio)
+    chunk = int(chunk_sec * sr)
+    search = int(search_sec * sr)
+
+    splits: List[int] = []
+    target = chunk
+    while target < total - chunk // 4:  # avoid a tiny tail chunk
+        lo = max((splits[-1] if splits else 0) + frame, target - search) // frame
+        hi = min(total - 1, target + search) // frame
+        if hi <= lo:
+            pos = target
+        else:
+            pos = (lo + int(np.argmin(energy[lo:hi]))) * frame + frame // 2
+        splits.append(pos)
+        target = pos + chunk
+    return splits
+
+
+def chunk_bounds(total: int, splits: Sequence[int], overlap: int) -> List[Tuple[int, int]]:
+    """(start, end) per chunk; every chunk but the first reaches overlap samples back."""
+    edges = [0, *splits, total]
+    return [(max(0, edges[i] - overlap) if i else 0, edges[i + 1]) for i in range(len(edges) - 1)]
+
+
+# --------------------------- stitching ---------------------------
+
+_WORD_NORM = re.compile(r"[^\w']+", re.UNICODE)
+
+
+def _norm(word: str) -> str:
+    return _WORD_NORM.sub("", word).lower()
+
+
+def stitch_texts(texts: Sequence[str], max_overlap_words: int = 40, min_overlap_words: int = 2) -> str:
+    """
+    Join chunk transcripts in order. Words repeated at a seam because of
+    the audio overlap (longest suffix/prefix match of at least
+    min_overlap_words, so a chunk that merely starts with the word the
+    previous one ended on keeps it) are kept only once.
+    """
+    words: List[str] = []
+    for text in texts:
+        nxt = text.split()
+        if not nxt:
+            continue
+        tail = [_norm(w) for w in words[-max_overlap_words:]]
+        head = [_norm(w) for w in nxt[:max_overlap_words]]
+        drop = 0
+        for k in range(min(len(tail), len(head)), max(1, min_overlap_words) - 1, -1):
+            if tail[-k:] == head[:k]:
+                drop = k
+                break
+        words.extend(nxt[drop:])
+    return " ".join(words)
+
+
+# --------------------------- process pool ---------------------------
+
+_WORKER_MODEL = None
+_WORKER_OPTIONS: Dict = {}
+_POOL: Optional[ProcessPoolExecutor] = None
+_POOL_USERS = 0  # transcriptions currently using _POOL
+_POOL_TIMER: Optional[threading.Timer] = None
+_POOL_LOCK = threading.Lock()
+
+
+def _init_worker(model_name: str, options: Dict, torch_threads: int) -> None:
+    global _WORKER_MODEL, _WORKER_OPTIONS
+    import whisper
+
+    # Share of the cores per pool process; int8 follows WHISPER_INT8 (env is inherited)
+    profile = CpuProfile.from_env()
+    profile.threads = max(1, torch_threads)
+    _WORKER_MODEL = profile.prepare_model(whisper.load_model(model_name))
+    _WORKER_OPTIONS = dict(options)
+
+
+def _transcribe_chunk(audio: np.ndarray) -> Dict:
+    result = _WORKER_MODEL.transcribe(audio, **_WORKER_OPTIONS)
+    return {"text": (result.get("text") or "").strip(), "language": result.get("language") or ""}
+
+
+def _acquire_pool(model_name: str, options: Dict) -> ProcessPoolExecutor:
+    """The process pool, kept between transcriptions so chunk workers keep their model."""
+    global _POOL, _POOL_USERS, _POOL_TIMER
+    with _POOL_LOCK:
+        if _POOL_TIMER is not None:
+            _POOL_TIMER.cancel()
+            _POOL_TIMER = None
+        if _POOL is None:
+            workers = pool_size()
+            cores = max(1, available_cores() // server_processes())  # this server process' share
+            _POOL = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(model_name, options, cores // workers),
+            )
+        _POOL_USERS += 1
+        return _POOL
+
+
+def _release_pool() -> None:
+    """Schedule the shutdown of an idle pool; its processes hold a Whisper model each."""
+    global _POOL_USERS, _POOL_TIMER
+    with _POOL_LOCK:
+        _POOL_USERS -= 1
+        if _POOL_USERS or _POOL is None:
+            return
+        idle = pool_idle_seconds()
+        if idle <= 0:
+            _shutdown_idle_pool_locked()
+            return
+        _POOL_TIMER = threading.Timer(idle, shutdown_idle_pool)
+        _POOL_TIMER.daemon = True
+        _POOL_TIMER.start()
+
+
+def shutdown_idle_pool() -> None:
+    with _POOL_LOCK:
+        _shutdown_idle_pool_locked()
+
+
+def _shutdown_idle_pool_locked() -> None:
+    global _POOL, _POOL_TIMER
+    if _POOL_USERS or _POOL is None:
+        return
+    if _POOL_TIMER is not None:
+        _POOL_TIMER.cancel()
+    pool, _POOL, _POOL_TIMER = _POOL, None, None
+    pool.shutdown(wait=False)
+    logger.info("chunked transcription: idle process pool shut down")
+
+
+def _discard_pool(pool: ProcessPoolExecutor) -> None:
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is pool:
+            _POOL = None
+    pool.shutdown(wait=False)
+
+
+def _run_chunks(
+    pool: Executor,
+    audio: np.ndarray,
+    bounds: Sequence[Tuple[int, int]],
+    on_progress: Optional[Callable[[int, int], None]],
+) -> List[Dict]:
+    futures = {pool.submit(_transcribe_chunk, audio[a:b]): i for i, (a, b) in enumerate(bounds)}
+    results: List[Dict] = [{}] * len(bounds)
+    for done, fut in enumerate(as_completed(futures), start=1):
+        results[futures[fut]] = fut.result()
+        if on_progress:
+            on_progress(done, len(bounds))
+    return results
+
+
+def transcribe_chunked(
+    audio: np.ndarray,
+    model_name: str,
+    options: Dict,
+    executor: Optional[Executor] = None,
+    on_progress: Optional[Callable[[int, int], None]] = None,
+) -> Dict:
+    """
+    Transcribe 16 kHz mono float32 audio in parallel chunks.
+    Returns {"text", "language", "duration"} like a single-call transcription.
+    on_progress(done, total) is called whenever a chunk finishes.
+    """
+    chunk_sec = _env_float("WHISPER_CHUNK_SEC", 300)
+    overlap = int(_env_float("WHISPER_CHUNK_OVERLAP_SEC", 2) * SAMPLE_RATE)
+    bounds = chunk_bounds(len(audio), find_split_points(audio, chunk_sec), overlap)
+    logger.info("chunked transcription: %d chunks of ~%ss", len(bounds), chunk_sec)
+
+    if executor is not None:
+        results = _run_chunks(executor, audio, bounds, on_progress)
+    else:
+        for attempt in (1, 2):
+            pool = _acquire_pool(model_name, options)
+            try:
+                results = _run_chunks(pool, audio, bounds, on_progress)
+                break
+            except BrokenProcessPool:
+                # A chunk process died (e.g. OOM killed): never hand the broken pool out again
+                _discard_pool(pool)
+                if attempt == 2:
+                    raise
+                logger.warning("chunked transcription: process pool broke, retrying with a new pool")
+            finally:
+                _release_pool()
+
+    return {
+        "text": stitch_texts([r["text"] for r in results]).strip(),
+        "language": next((r["language"] for r in results if r["language"]), ""),
+        "duration": len(audio) / SAMPLE_RATE,
+    }
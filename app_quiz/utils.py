@@ -1,22 +1,56 @@
 # app_quiz/utils.py
 from __future__ import annotations
 
-import json
+import logging
+import math
 import os
 import random
 import re
 import tempfile
-from typing import Dict, List, Tuple
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, List, Optional, Tuple, Union
 from urllib.parse import parse_qs, urlparse
 from yt_dlp.utils import DownloadError
 
-import google.generativeai as genai
+import numpy as np
 import yt_dlp
+from tenacity import Retrying, retry_if_exception_type, stop_after_attempt, wait_random_exponential
+
+from app_quiz import (
+    admission,
+    audio,
+    audio_cache,
+    canonical,
+    captions,
+    chunking,
+    llm_json,
+    metrics,
+    payload_cache,
+    providers,
+    singleflight,
+    streaming,
+    transcript_cache,
+    transcription,
+    video_probe,
+)
+from app_quiz.models import GeneratedQuiz, Question, Quiz
+
+logger = logging.getLogger(__name__)
 
 # --------------------------- helpers ---------------------------
 
 _YT_HOSTS = ("youtube.com", "www.youtube.com", "m.youtube.com", "youtu.be")
 
+# progress(stage, **info): stage updates for the streaming createQuiz variant
+Progress = Callable[..., None]
+
+
+def _notify(progress: Optional[Progress], stage: str, **info) -> None:
+    if progress is not None:
+        progress(stage, **info)
+
 # Whisper lazy load (groß & RAM-hungrig -> nur laden, wenn wirklich gebraucht)
 _WHISPER_MODEL_OBJ = None  # globaler Cache für das geladene Whisper-Modell
 
@@ -29,11 +63,38 @@ def _get_whisper_model():
     global _WHISPER_MODEL_OBJ
     if _WHISPER_MODEL_OBJ is None:
         import whisper  # Heavy import nur hier!
-        model_name = os.getenv("WHISPER_MODEL", "base")
-        _WHISPER_MODEL_OBJ = whisper.load_model(model_name)
+        model = whisper.load_model(_whisper_model_name())
+        # CPU-Profil: Threads + optional int8 (WHISPER_INT8, WHISPER_TORCH_THREADS)
+        _WHISPER_MODEL_OBJ = transcription.CpuProfile.from_env().prepare_model(model)
     return _WHISPER_MODEL_OBJ
 
 
+def _whisper_model_name() -> str:
+    return os.getenv("WHISPER_MODEL", "base")
+
+
+def whisper_preload_enabled() -> bool:
+    return os.getenv("WHISPER_PRELOAD", "").strip().lower() in {"1", "true", "yes", "on"}
+
+
+def whisper_model_loaded() -> bool:
+    return _WHISPER_MODEL_OBJ is not None
+
+
+def preload_whisper_model() -> None:
+    """
+    Load Whisper eagerly. Called in the gunicorn master before it forks
+    (WHISPER_PRELOAD + preload_app), so all workers share the weights
+    copy-on-write instead of loading one copy each on their first request.
+    """
+    started = time.perf_counter()
+    _get_whisper_model()
+    logger.info(
+        "Whisper model '%s' preloaded in %.1fs (pid %s)",
+        _whisper_model_name(), time.perf_counter() - started, os.getpid(),
+    )
+
+
 def _parse_video_id(url: str) -> Tuple[str, str]:
     """
     Parse a YouTube URL (watch?v=, youtu.be/<id>, /live/<id>)
@@ -67,14 +128,11 @@ def _parse_video_id(url: str) -> Tuple[str, str]:
     return vid, f"https://www.youtube.com/watch?v={vid}"
 
 
-def _download_audio_to(tempdir: str, video_url: str) -> str:
+def _ydl_base_opts() -> Dict:
     """
-    Download audio using yt_dlp into tempdir as .m4a (requires ffmpeg).
-    Returns absolute path to the produced .m4a file.
+    yt_dlp options shared by every YouTube request (audio, captions).
     Hardened against HTTP 403 by setting headers and options.
     """
-    outtmpl = os.path.join(tempdir, "audio.%(ext)s")
-
     # Allow overriding UA/cookies via env for local quirks
     ua = os.getenv(
         "YTDLP_UA",
@@ -84,13 +142,10 @@ def _download_audio_to(tempdir: str, video_url: str) -> str:
     )
     cookies_browser = os.getenv("YTDLP_COOKIES_FROM_BROWSER", "").strip().lower()  # e.g. "chrome", "edge", "firefox"
 
-    ydl_opts = {
-        "format": "bestaudio/best",
-        "outtmpl": outtmpl,
+    opts = {
         "quiet": True,
         "noprogress": True,
         "noplaylist": True,
-        "concurrent_fragment_downloads": 1,
         "geo_bypass": True,
         "nocheckcertificate": True,
         "http_headers": {
@@ -99,50 +154,231 @@ def _download_audio_to(tempdir: str, video_url: str) -> str:
             "Accept-Language": "en-US,en;q=0.8",
             "Referer": "https://www.youtube.com/",
         },
-        "postprocessors": [
-            {
-                "key": "FFmpegExtractAudio",
-                "preferredcodec": "m4a",
-                "preferredquality": "192",
-            }
-        ],
         # "force_ip": "v4",  # Optional: bei IPv6-Problemen
     }
 
     if cookies_browser in {"chrome", "edge", "firefox"}:
         # Optional: use local browser cookies (helps with age/region/captcha walls)
-        ydl_opts["cookiesfrombrowser"] = (cookies_browser,)
+        opts["cookiesfrombrowser"] = (cookies_browser,)
+    return opts
+
+
+def _download_audio_to(tempdir: str, video_url: str, progress: Optional[Progress] = None) -> str:
+    """
+    Download the best audio stream with yt_dlp into tempdir.
+    With AUDIO_LEAN_DECODE (default) the native container (webm/opus, m4a, …)
+    is kept as-is; the legacy mode re-encodes to a 192k .m4a (requires ffmpeg).
+    progress("downloading", percent=…) is reported from yt-dlp's progress hook.
+    Returns absolute path to the produced file.
+    """
+    outtmpl = os.path.join(tempdir, "audio.%(ext)s")
+    lean = audio.lean_decode_enabled()
+
+    ydl_opts = {
+        **_ydl_base_opts(),
+        "format": "bestaudio/best",
+        "outtmpl": outtmpl,
+        "concurrent_fragment_downloads": 1,
+    }
+    if progress is not None:
+        ydl_opts["progress_hooks"] = [_download_hook(progress)]
+    if not lean:
+        ydl_opts["postprocessors"] = [
+            {
+                "key": "FFmpegExtractAudio",
+                "preferredcodec": "m4a",
+                "preferredquality": "192",
+            }
+        ]
 
     try:
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        with metrics.stage("download"), yt_dlp.YoutubeDL(ydl_opts) as ydl:
             ydl.download([video_url])
     except DownloadError as e:
         # Deutliche Fehlermeldung; View gibt laut Spec weiterhin 500 zurück
         raise RuntimeError(f"yt-dlp failed to fetch audio (possible 403): {e}") from e
 
     for fname in os.listdir(tempdir):
-        if fname.lower().endswith(".m4a"):
+        lower = fname.lower()
+        if lean and lower.startswith("audio.") and not lower.endswith((".part", ".ytdl")):
+            return os.path.join(tempdir, fname)
+        if lower.endswith(".m4a"):
             return os.path.join(tempdir, fname)
-    raise RuntimeError("Audio download succeeded but no .m4a file was produced.")
+    raise RuntimeError("Audio download succeeded but no audio file was produced.")
+
+
+def _download_hook(progress: Progress) -> Callable[[Dict], None]:
+    last = [-1]
+
+    def hook(d: Dict) -> None:
+        if d.get("status") == "finished":
+            percent = 100
+        else:
+            total = d.get("total_bytes") or d.get("total_bytes_estimate")
+            if not total:
+                return
+            percent = min(99, int(d.get("downloaded_bytes", 0) * 100 / total))
+        if percent != last[0]:  # yt-dlp calls the hook for every block
+            last[0] = percent
+            progress("downloading", percent=percent)
+
+    return hook
 
 
 def _transcribe(audio_path: str) -> str:
     """
     Transcribe audio to text using Whisper (lazy-loaded).
     """
+    return _transcribe_result(audio_path)["text"]
+
+
+def _whisper_decode_options() -> Dict:
+    """
+    Decoding settings shared by the single-call and the chunked path:
+    temperature 0 / fp16 off plus the CPU profile (language, beam size,
+    condition_on_previous_text; see transcription.CpuProfile).
+    """
+    return transcription.CpuProfile.from_env().decode_options()
+
+
+def _transcribe_result(source: Union[str, np.ndarray], progress: Optional[Progress] = None) -> Dict:
+    """
+    Like _transcribe, but also returns the detected language and the
+    audio duration (end of the last segment): {"text", "language", "duration"}.
+    source is a file path or already decoded 16 kHz mono float32 samples.
+    Long recordings go through the parallel chunked path when WHISPER_CHUNKED is on;
+    only that path reports intermediate progress (per finished chunk).
+    """
+    options = _whisper_decode_options()
+    _notify(progress, "transcribing", percent=0)
+    if transcription.chunking_enabled():
+        if isinstance(source, str):
+            source = _decode_audio(source)
+        if len(source) / transcription.SAMPLE_RATE >= transcription.min_duration_for_chunking():
+            on_chunk = None
+            if progress is not None:
+                on_chunk = lambda done, total: progress("transcribing", percent=done * 100 // total)  # noqa: E731
+            result = transcription.transcribe_chunked(
+                source, _whisper_model_name(), options, on_progress=on_chunk
+            )
+            if not result["text"]:
+                raise RuntimeError("Transcription produced empty text.")
+            return result
+
     model = _get_whisper_model()
-    # fp16=False für CPU-Container/ohne GPU stabiler
-    result = model.transcribe(audio_path, temperature=0, fp16=False)
+    result = model.transcribe(source, **options)
+    _notify(progress, "transcribing", percent=100)
     text = (result.get("text") or "").strip()
     if not text:
         raise RuntimeError("Transcription produced empty text.")
-    return text
+    segments = result.get("segments") or []
+    duration = float(segments[-1].get("end") or 0.0) if segments else None
+    return {"text": text, "language": result.get("language") or "", "duration": duration}
 
 
-def _build_prompt(transcript: str, title_hint: str) -> str:
+def _decode_audio(audio_path: str, tempdir: Optional[str] = None) -> np.ndarray:
+    """
+    Single ffmpeg pass to Whisper's input format; memory-mapped for very
+    long files (needs tempdir). With AUDIO_LEAN_DECODE=0 Whisper's own
+    loader decodes, as before the lean path existed.
+    """
+    if not audio.lean_decode_enabled():
+        import whisper  # Heavy import nur hier!
+
+        return whisper.load_audio(audio_path)
+    memmap_path = os.path.join(tempdir, "audio.f32") if tempdir and audio.use_memmap(audio_path) else None
+    return audio.decode_pcm(audio_path, memmap_path=memmap_path)
+
+
+CAPTIONS_CACHE_KEY = "captions"  # transcript cache "model" for caption transcripts
+
+
+def _get_transcript(
+    video_id: str,
+    norm_url: str,
+    progress: Optional[Progress] = None,
+    meta: Optional[Dict] = None,
+) -> Dict:
+    """
+    Transcript for video_id as {"text", "source", "cached", "removed_sec"};
+    source is "captions" or "whisper", removed_sec the silence trimmed
+    before Whisper (None when no transcription ran). meta (pre-flight
+    probe) skips the caption lookup for videos without a usable track. Order: cached transcript, YouTube captions
+    (CAPTIONS_FIRST), then audio download + Whisper. Fresh results are
+    stored in the transcript cache for the next request.
+    """
+    model_name = _whisper_model_name()
+    use_cache = transcript_cache.is_enabled()
+    use_captions = captions.captions_enabled() and (meta is None or meta["has_captions"])
+
+    if use_cache:
+        keys = ([CAPTIONS_CACHE_KEY] if use_captions else []) + [model_name]
+        for key in keys:
+            cached = transcript_cache.get_cached_transcript(video_id, key)
+            if cached is not None:
+                metrics.cache_result("transcript", hit=True)
+                source = "captions" if key == CAPTIONS_CACHE_KEY else "whisper"
+                _notify(progress, "transcript", source=source, cached=True)
+                return {"text": cached["text"], "source": source, "cached": True}
+        metrics.cache_result("transcript", hit=False)
+
+    result = None
+    if use_captions:
+        _notify(progress, "captions")
+        with metrics.stage("captions"):
+            result = captions.fetch_captions(norm_url, _ydl_base_opts(), info=(meta or {}).get("info"))
+    if result is not None:
+        source, cache_key = "captions", CAPTIONS_CACHE_KEY
+        logger.info("transcript for %s from %s captions (%s)", video_id, result["kind"], result["language"])
+    else:
+        source, cache_key = "whisper", model_name
+        # Saturated transcription queue: reject now, not after downloading the audio
+        admission.check_capacity("transcribe")
+        with tempfile.TemporaryDirectory() as td:
+            fmt = "bestaudio" if audio.lean_decode_enabled() else "m4a"
+            audio_path = audio_cache.fetch_audio(
+                video_id, fmt, td, lambda d: providers.downloader().download(d, norm_url, progress=progress)
+            )
+            with admission.slot("transcribe"):
+                result = providers.transcriber().transcribe(audio_path, td, progress=progress)
+
+    if use_cache:
+        transcript_cache.store_transcript(
+            video_id,
+            cache_key,
+            result["text"],
+            language=result.get("language") or "",
+            duration=result.get("duration"),
+        )
+    return {"text": result["text"], "source": source, "cached": False, "removed_sec": result.get("removed_sec")}
+
+
+# Part of the canonical quiz key: bump when the prompt or the output
+# post-processing changes, so older canonical quizzes are not reused.
+PROMPT_VERSION = "1"
+
+
+def _prompt_version() -> str:
+    return f"{PROMPT_VERSION}-q{_question_count()}"
+
+
+def _build_prompt(
+    transcript: str,
+    title_hint: str,
+    num_questions: int = 10,
+    part: Optional[Tuple[int, int]] = None,
+) -> str:
     """
     Prompt for Gemini to produce MC questions as strict JSON.
+    part=(i, n) marks one chunk of a longer transcript; callers keep the
+    transcript within the token budget (see app_quiz.chunking).
     """
+    scope = ""
+    if part:
+        scope = (
+            f"- The transcript is part {part[0]} of {part[1]} of the video; "
+            "ask only about this part, but title/description describe the whole video.\n"
+        )
     return f"""
 You are a quiz generator. Create multiple-choice questions from the given transcript.
 Rules:
@@ -159,54 +395,273 @@ Rules:
     }}
   ]
 }}
-- Produce 10 questions.
+- Produce {num_questions} questions.
 - Options must be concise; one correct answer, three plausible distractors.
 - Keep the language of the transcript.
-
+{scope}
 title_hint: "{title_hint}"
 
 transcript:
-\"\"\"{transcript[:12000]}\"\"\"  // truncated for safety
+\"\"\"{transcript}\"\"\"
 """
 
 
 def _call_gemini(prompt: str, api_key: str) -> str:
     """
     Call Gemini and return the (possibly fenced) text.
+    Goes through the configured LLM provider (app_quiz.providers); the
+    Gemini client, model detection and model objects are cached
+    process-wide (see app_quiz.gemini).
     """
-    model_name = os.getenv("GEMINI_MODEL")
-    if not model_name:
-        # Auto-Detect ein passendes Modell mit generateContent
-        try:
-            avail = [
-                (m.name.split("/")[-1], getattr(m, "supported_generation_methods", []))
-                for m in genai.list_models()
-            ]
-            supported = [name for (name, methods) in avail if "generateContent" in methods]
-            preferred = [
-                "gemini-2.5-flash",
-                "gemini-2.0-flash",
-                "gemini-flash-latest",
-                "gemini-pro-latest",
-                "gemini-2.5-pro",
-                "gemini-2.0-pro",
-            ]
-            for cand in preferred:
-                if cand in supported:
-                    model_name = cand
-                    break
-            if not model_name and supported:
-                model_name = supported[0]
-        except Exception:
-            model_name = "gemini-flash-latest"
-
-    model = genai.GenerativeModel(model_name)
-    resp = model.generate_content(prompt)
-
-    txt = (getattr(resp, "text", None) or "").strip()
+    with admission.slot("llm"), metrics.stage("gemini"):
+        txt = providers.llm().generate(prompt, api_key)
+    return _strip_fences(txt)
+
+
+def _strip_fences(txt: str) -> str:
     # Entferne evtl. ```json fences
-    txt = re.sub(r"^```json\s*|\s*```$", "", txt, flags=re.IGNORECASE | re.MULTILINE)
-    return txt
+    return re.sub(r"^```json\s*|\s*```$", "", txt, flags=re.IGNORECASE | re.MULTILINE)
+
+
+def _call_gemini_streaming(prompt: str, api_key: str, on_question: Callable[[Dict], None]) -> Dict:
+    """
+    Streaming Gemini call: every question object is handed to on_question
+    as soon as it is complete in the stream. Returns the parsed document;
+    if the full text does not parse, the questions seen so far are kept.
+    """
+    parser = streaming.QuestionStreamParser()
+    parts: List[str] = []
+    with admission.slot("llm"), metrics.stage("gemini"):
+        for piece in providers.llm().generate_stream(prompt, api_key):
+            parts.append(piece)
+            for q in parser.feed(piece):
+                on_question(q)
+    try:
+        return _parse_quiz_json("".join(parts))
+    except GeminiOutputError:
+        if parser.questions:
+            return {"questions": parser.questions}
+        raise
+
+
+class GeminiOutputError(RuntimeError):
+    """Gemini answered, but no JSON object could be recovered from the text."""
+
+
+def _parse_quiz_json(raw: str) -> Dict:
+    """Largest JSON object in the output (prose, fences, trailing commas and truncation tolerated)."""
+    with metrics.stage("json_parse"):
+        parsed = llm_json.extract_json_object(raw)
+    if parsed is None:
+        raise GeminiOutputError("Gemini did not return valid JSON.")
+    return parsed
+
+
+try:  # transient API errors worth a re-ask (google-api-core ships with google-generativeai)
+    from google.api_core import exceptions as _gapi
+
+    _TRANSIENT_LLM_ERRORS: Tuple[type, ...] = (
+        _gapi.ResourceExhausted,
+        _gapi.ServiceUnavailable,
+        _gapi.DeadlineExceeded,
+        _gapi.InternalServerError,
+    )
+except ImportError:
+    _TRANSIENT_LLM_ERRORS = ()
+
+
+def _llm_retrying() -> Retrying:
+    """
+    Bounded re-ask of the Gemini step only (the transcript is reused):
+    GEMINI_MAX_ATTEMPTS tries with jittered exponential backoff starting
+    at GEMINI_RETRY_BASE_SEC, on unparseable output or transient API errors.
+    """
+    try:
+        attempts = max(1, int(os.getenv("GEMINI_MAX_ATTEMPTS", "3")))
+    except ValueError:
+        attempts = 3
+    try:
+        base = float(os.getenv("GEMINI_RETRY_BASE_SEC", "1"))
+    except ValueError:
+        base = 1.0
+
+    def before_sleep(state) -> None:
+        exc = state.outcome.exception()
+        reason = "invalid_output" if isinstance(exc, GeminiOutputError) else "api_error"
+        metrics.LLM_RETRIES.inc(reason=reason)
+        logger.warning("gemini attempt %d failed (%s), asking again", state.attempt_number, exc)
+
+    return Retrying(
+        stop=stop_after_attempt(attempts),
+        wait=wait_random_exponential(multiplier=base, max=max(base, 30)),
+        retry=retry_if_exception_type((GeminiOutputError, *_TRANSIENT_LLM_ERRORS)),
+        before_sleep=before_sleep,
+        reraise=True,
+    )
+
+
+def _question_count() -> int:
+    try:
+        return max(1, int(os.getenv("QUIZ_QUESTION_COUNT", "10")))
+    except ValueError:
+        return 10
+
+
+def _llm_concurrency() -> int:
+    try:
+        return max(1, int(os.getenv("QUIZ_LLM_CONCURRENCY", "4")))
+    except ValueError:
+        return 4
+
+
+_QUESTION_KEY = re.compile(r"[^\w]+", re.UNICODE)
+
+
+def _question_key(q: Dict) -> str:
+    return _QUESTION_KEY.sub(" ", str(q.get("question_title") or "")).strip().lower()
+
+
+def _first_text(results: List[Dict], field: str) -> str:
+    return next((r.get(field) for r in results if (r.get(field) or "").strip()), "")
+
+
+def _merge_chunk_quizzes(results: List[Dict], target: int) -> Dict:
+    """
+    Reduce step: title/description from the first chunk that has them,
+    questions de-duplicated by normalized title and picked round-robin
+    across chunks so the whole video is covered.
+    """
+    seen = set()
+    per_chunk: List[List[Dict]] = []
+    for r in results:
+        unique = []
+        for q in r.get("questions") or []:
+            if not isinstance(q, dict):
+                continue
+            key = _question_key(q)
+            if key and key not in seen:
+                seen.add(key)
+                unique.append(q)
+        per_chunk.append(unique)
+
+    picked: List[Dict] = []
+    depth = 0
+    while len(picked) < target and any(depth < len(qs) for qs in per_chunk):
+        for qs in per_chunk:
+            if depth < len(qs) and len(picked) < target:
+                picked.append(qs[depth])
+        depth += 1
+    return {
+        "title": _first_text(results, "title"),
+        "description": _first_text(results, "description"),
+        "questions": picked,
+    }
+
+
+class _StreamedQuestions:
+    """
+    Streaming counterpart of _merge_chunk_quizzes. Questions are accepted
+    (normalized, de-duplicated) the moment a chunk's stream completes
+    them; each chunk gets an equal share of the target so the first chunk
+    to answer cannot take all slots. finish() fills the remaining slots
+    from whatever the chunks returned beyond their share.
+    """
+
+    def __init__(self, target: int, chunks: int, emit: Callable[[Dict, int], None]):
+        self.target = target
+        self.share = max(1, target // chunks)
+        self.picked: List[Dict] = []
+        self._per_chunk = [0] * chunks
+        self._seen = set()
+        self._emit = emit
+        self._lock = threading.Lock()
+
+    def offer(self, chunk: int, q, within_share: bool = True) -> None:
+        fixed = _fix_question(q) if isinstance(q, dict) else None
+        if fixed is None:
+            return
+        key = _question_key(fixed)
+        with self._lock:
+            if key in self._seen or len(self.picked) >= self.target:
+                return
+            if within_share and self._per_chunk[chunk] >= self.share:
+                return
+            self._seen.add(key)
+            self._per_chunk[chunk] += 1
+            self.picked.append(fixed)
+            self._emit(fixed, len(self.picked) - 1)
+
+    def finish(self, results: List[Optional[Dict]]) -> None:
+        for i, r in enumerate(results):
+            for q in (r or {}).get("questions") or []:
+                self.offer(i, q, within_share=False)
+
+
+def _generate_quiz_payload(
+    transcript: str,
+    title_hint: str,
+    api_key: str,
+    on_question: Optional[Callable[[Dict, int], None]] = None,
+    progress: Optional[Progress] = None,
+) -> Dict:
+    """
+    Map-reduce question generation: the transcript is split into token-
+    budgeted chunks, every chunk is sent to Gemini concurrently (at most
+    QUIZ_LLM_CONCURRENCY in flight), and the answers are merged and
+    normalized by _validate_and_fix. Failed chunks are skipped as long
+    as at least one chunk produced questions.
+
+    With on_question(question, index) Gemini is called in streaming mode
+    and every accepted question is reported as soon as it is complete.
+    """
+    target = _question_count()
+    chunks = chunking.split_transcript(transcript) or [transcript]
+    total = len(chunks)
+    _notify(progress, "generating", chunks=total)
+    per_chunk = target if total == 1 else max(2, math.ceil(target * 1.5 / total))  # slack for duplicates
+    collector = _StreamedQuestions(target, total, on_question) if on_question else None
+
+    def ask(i: int) -> Dict:
+        part = (i + 1, total) if total > 1 else None
+        prompt = _build_prompt(chunks[i], title_hint, per_chunk, part=part)
+        for attempt in _llm_retrying():
+            with attempt:
+                if collector is not None:
+                    return _call_gemini_streaming(prompt, api_key, lambda q: collector.offer(i, q))
+                return _parse_quiz_json(_call_gemini(prompt, api_key))
+
+    if total == 1 and on_question is None:
+        return _validate_and_fix(ask(0))
+
+    results: List[Optional[Dict]] = [None] * total
+    errors: List[Exception] = []
+    with ThreadPoolExecutor(max_workers=min(_llm_concurrency(), total)) as pool:
+        futures = {pool.submit(ask, i): i for i in range(total)}
+        for fut in as_completed(futures):
+            try:
+                results[futures[fut]] = fut.result()
+            except Exception as e:
+                logger.warning("question generation failed for chunk %d/%d: %s", futures[fut] + 1, total, e)
+                errors.append(e)
+
+    ok = [r for r in results if isinstance(r, dict)]
+    if not ok:
+        if not errors:
+            raise RuntimeError("Gemini did not return valid JSON.")
+        # Overload is reported as such (503), not as a generation failure
+        raise next((e for e in errors if isinstance(e, admission.Rejected)), errors[0])
+    logger.info("generated questions from %d/%d transcript chunks", len(ok), total)
+    if collector is None:
+        return _validate_and_fix(_merge_chunk_quizzes(ok, target))
+
+    collector.finish(results)
+    return _validate_and_fix(
+        {
+            "title": _first_text(ok, "title"),
+            "description": _first_text(ok, "description"),
+            "questions": collector.picked,
+        }
+    )
 
 
 def _validate_and_fix(payload: Dict) -> Dict:
@@ -221,35 +676,9 @@ def _validate_and_fix(payload: Dict) -> Dict:
     rng = random.Random(42)  # (bereit für evtl. Randomisierung/Shuffle)
 
     for q in questions_in:
-        qt = (q.get("question_title") or "").strip()
-        opts = q.get("question_options") or []
-        ans = (q.get("answer") or "").strip()
-
-        opts = [str(o).strip() for o in opts if str(o).strip()]
-
-        # Ensure exactly 4 options
-        if len(opts) < 4:
-            while len(opts) < 4:
-                opts.append(f"Option {chr(ord('A') + len(opts))}")
-        elif len(opts) > 4:
-            if ans in opts:
-                keep = [ans] + [o for o in opts if o != ans]
-                opts = keep[:4]
-            else:
-                opts = opts[:4]
-
-        # Ensure answer is in options
-        if ans not in opts:
-            ans = opts[0]
-
-        if qt:
-            out_questions.append(
-                {
-                    "question_title": qt,
-                    "question_options": opts,
-                    "answer": ans,
-                }
-            )
+        fixed = _fix_question(q)
+        if fixed is not None:
+            out_questions.append(fixed)
 
     if not out_questions:
         out_questions = [
@@ -263,45 +692,190 @@ def _validate_and_fix(payload: Dict) -> Dict:
     return {"title": title, "description": description, "questions": out_questions}
 
 
+def _fix_question(q: Dict) -> Optional[Dict]:
+    """One question normalized like in _validate_and_fix; None without a title."""
+    qt = (q.get("question_title") or "").strip()
+    opts = q.get("question_options") or []
+    ans = (q.get("answer") or "").strip()
+
+    opts = [str(o).strip() for o in opts if str(o).strip()]
+
+    # Ensure exactly 4 options
+    if len(opts) < 4:
+        while len(opts) < 4:
+            opts.append(f"Option {chr(ord('A') + len(opts))}")
+    elif len(opts) > 4:
+        if ans in opts:
+            keep = [ans] + [o for o in opts if o != ans]
+            opts = keep[:4]
+        else:
+            opts = opts[:4]
+
+    # Ensure answer is in options
+    if ans not in opts:
+        ans = opts[0]
+
+    if not qt:
+        return None
+    return {
+        "question_title": qt,
+        "question_options": opts,
+        "answer": ans,
+    }
+
+
 # ------------------------ public entry point ------------------------
 
-def generate_quiz_from_youtube(url: str) -> Dict:
+def generate_quiz_from_youtube(
+    url: str,
+    progress: Optional[Progress] = None,
+    on_question: Optional[Callable[[Dict, int], None]] = None,
+) -> Dict:
     """
     Full implementation:
     - validate/parse YouTube URL
-    - download audio with yt_dlp (ffmpeg required)
-    - transcribe with Whisper
+    - probe the video metadata (cached): reject over-long videos and live
+      streams, skip the caption lookup if there are none, real title
+    - reuse a cached transcript for the video, or use YouTube captions, or
+      download audio with yt_dlp (ffmpeg required) and transcribe with Whisper
     - generate MC-questions via Gemini (JSON)
     - validate/normalize output
 
-    Returns dict with keys: title, description, questions[].
+    Returns dict with keys: title, description, questions[] and meta
+    (video_id, transcript_source "captions"/"whisper", transcript_cached,
+    audio_trimmed_sec: silence removed before Whisper, None without Whisper).
     Raises ValueError/RuntimeError on failures.
+
+    progress(stage, **info) receives stage updates and on_question(question,
+    index) every final question as soon as Gemini has streamed it (used by
+    the streaming createQuiz view).
     """
-    video_id, norm_url = _parse_video_id(url)
+    with metrics.stage("url_parse"):
+        video_id, norm_url = _parse_video_id(url)
     if not video_id:
         raise ValueError("Invalid YouTube URL.")
 
-    # 1) Download + Transcribe
-    with tempfile.TemporaryDirectory() as td:
-        audio_path = _download_audio_to(td, norm_url)
-        transcript = _transcribe(audio_path)
+    # 0) Pre-flight: metadata (cached per video) before any audio is downloaded
+    meta = None
+    if video_probe.probe_enabled():
+        with metrics.stage("probe"):
+            meta = video_probe.probe(video_id, norm_url, _ydl_base_opts())
+        video_probe.check_limits(meta)
+        if meta:
+            _notify(progress, "metadata", title=meta["title"], duration=meta["duration"])
+
+    # 1) Transcript: cache, YouTube captions or download + Whisper
+    transcript_info = _get_transcript(video_id, norm_url, progress=progress, meta=meta)
+    transcript = transcript_info["text"]
 
     # 2) Ask Gemini to produce quiz JSON
     api_key = os.getenv("GEMINI_API_KEY")
     if not api_key:
         raise RuntimeError("GEMINI_API_KEY not configured.")
 
-    title_hint = f"YouTube Video {video_id}"
-    prompt = _build_prompt(transcript, title_hint)
-    raw = _call_gemini(prompt, api_key)
+    title_hint = (meta or {}).get("title") or f"YouTube Video {video_id}"
+    quiz = _generate_quiz_payload(transcript, title_hint, api_key, on_question=on_question, progress=progress)
+    # Not persisted on the quiz; reported via job record / response header
+    quiz["meta"] = {
+        "video_id": video_id,
+        "transcript_source": transcript_info["source"],
+        "transcript_cached": transcript_info["cached"],
+        "audio_trimmed_sec": transcript_info.get("removed_sec"),
+    }
+    return quiz
 
-    try:
-        parsed = json.loads(raw)
-    except json.JSONDecodeError:
-        raw_strip = raw.strip()
-        if raw_strip.startswith("{") and raw_strip.endswith("}"):
-            parsed = json.loads(raw_strip)
-        else:
-            raise RuntimeError("Gemini did not return valid JSON.")
 
-    return _validate_and_fix(parsed)
+def generate_quiz_coalesced(url: str) -> Dict:
+    """
+    generate_quiz_from_youtube behind a single-flight: concurrent calls for
+    the same video id (any URL form, any worker process) share one run.
+    Disable with SINGLEFLIGHT=0.
+    """
+    video_id, _ = _parse_video_id(url)
+    if not video_id:
+        raise ValueError("Invalid YouTube URL.")
+    if os.getenv("SINGLEFLIGHT", "1").strip().lower() in {"0", "false", "no", "off"}:
+        return generate_quiz_from_youtube(url)
+    return singleflight.run_once(f"quiz:{video_id}", lambda: generate_quiz_from_youtube(url))
+
+
+def reuse_canonical_quiz(owner, url: str) -> Optional[Tuple[Quiz, GeneratedQuiz]]:
+    """
+    (new quiz of owner, canonical record) when a fresh canonical quiz of
+    the video exists for the current prompt version and model, else None.
+    Raises ValueError for invalid URLs like the pipeline does.
+    """
+    if not canonical.reuse_enabled():
+        return None
+    video_id, _ = _parse_video_id(url)
+    if not video_id:
+        raise ValueError("Invalid YouTube URL.")
+    record = canonical.lookup(video_id, _prompt_version(), providers.llm().model_name())
+    metrics.cache_result("quiz", hit=record is not None)
+    if record is None:
+        return None
+    return canonical.clone(record, owner, url), record
+
+
+# ------------------------ persistence ------------------------
+
+def _valid_questions(generated: Dict) -> List[Dict]:
+    """Questions worth storing (title, non-empty option list, answer), stripped."""
+    out = []
+    for q in generated.get("questions") or []:
+        q_title = (q.get("question_title") or "").strip()
+        q_options = q.get("question_options") or []
+        q_answer = (q.get("answer") or "").strip()
+
+        # Basic server-side sanity checks to avoid empty records
+        if not q_title or not isinstance(q_options, list) or not q_options or not q_answer:
+            continue
+        out.append({"question_title": q_title, "question_options": q_options, "answer": q_answer})
+    return out
+
+
+@metrics.stage("db_persist")
+def persist_generated_quiz(owner, video_url: str, generated: Dict) -> Quiz:
+    """
+    Store a generated quiz (title, description, questions[]) for owner.
+    Shared by the synchronous createQuiz view and the background job runner.
+    Pipeline results (meta.video_id) also become the video's canonical quiz.
+    """
+    title = (generated.get("title") or "").strip()
+    if not title:
+        raise RuntimeError("Invalid generated data: title missing.")
+
+    video_id = (generated.get("meta") or {}).get("video_id")
+    if not video_id:
+        try:
+            video_id, _ = _parse_video_id(video_url)
+        except ValueError:
+            video_id = ""
+
+    quiz = Quiz.objects.create(
+        owner=owner,
+        title=title,
+        description=generated.get("description") or "",
+        video_url=video_url,
+        video_id=video_id,
+    )
+
+    questions = _valid_questions(generated)
+    question_objs = [Question(quiz=quiz, **q) for q in questions]
+    if question_objs:
+        Question.objects.bulk_create(question_objs)
+        payload_cache.invalidate_quiz(quiz)  # bulk_create sends no signals
+
+    meta = generated.get("meta") or {}
+    if meta.get("video_id") and canonical.reuse_enabled():
+        # Pipeline result -> canonical quiz of the video for later requests
+        canonical.store(
+            meta["video_id"],
+            _prompt_version(),
+            providers.llm().model_name(),
+            title,
+            quiz.description,
+            questions,
+            transcript_source=meta.get("transcript_source", ""),
+        )
+    return quiz
@@ -0,0 +1,138 @@
+# app_quiz/vad.py
+"""
+Energy-based voice activity trimming before transcription.
+
+Lecture recordings carry long pauses and dead air that Whisper would
+decode for nothing. trim_silence() computes the RMS level per frame
+(vectorized over the whole 16 kHz array), marks frames clearly above the
+recording's noise floor as speech, pads and merges the regions, and
+concatenates them. Gaps shorter than VAD_MIN_SILENCE_MS stay in, so
+normal pauses between sentences are not cut.
+
+The returned SpeechMap maps timestamps of the trimmed audio back to the
+original recording. Pure energy cannot tell music from speech: loud
+intro music is kept, only quiet stretches are removed.
+
+Kept free of Django imports (like transcription.py).
+"""
+from __future__ import annotations
+
+import bisect
+import os
+from dataclasses import dataclass, field
+from typing import List, Tuple
+
+import numpy as np
+
+from app_quiz.transcription import SAMPLE_RATE
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, str(default)))
+    except ValueError:
+        return default
+
+
+def vad_enabled() -> bool:
+    return os.getenv("AUDIO_VAD", "1").strip().lower() not in {"0", "false", "no", "off"}
+
+
+@dataclass
+class SpeechMap:
+    """
+    Kept regions as (trimmed_start, original_start, length) in seconds,
+    ordered by position.
+    """
+
+    segments: List[Tuple[float, float, float]] = field(default_factory=list)
+    original_sec: float = 0.0
+
+    @property
+    def kept_sec(self) -> float:
+        return sum(length for _, _, length in self.segments)
+
+    @property
+    def removed_sec(self) -> float:
+        return max(0.0, self.original_sec - self.kept_sec)
+
+    def to_original(self, t: float) -> float:
+        """Position in the original recording of second t of the trimmed audio."""
+        if not self.segments:
+            return t
+        starts = [s[0] for s in self.segments]
+        i = max(0, bisect.bisect_right(starts, t) - 1)
+        trimmed_start, original_start, length = self.segments[i]
+        return original_start + min(max(t - trimmed_start, 0.0), length)
+
+    def as_list(self) -> List[List[float]]:
+        return [[round(a, 3), round(b, 3), round(c, 3)] for a, b, c in self.segments]
+
+
+def _frame_db(samples: np.ndarray, frame: int) -> np.ndarray:
+    n = len(samples) // frame
+    frames = np.asarray(samples[: n * frame], dtype=np.float32).reshape(n, frame)
+    power = np.einsum("ij,ij->i", frames, frames) / frame  # mean square without a squared copy
+    return 10.0 * np.log10(np.maximum(power, 1e-10))
+
+
+def speech_regions(samples: np.ndarray, sample_rate: int = SAMPLE_RATE) -> List[Tuple[int, int]]:
+    """Sample ranges [start, end) to keep; empty when no frame looks like speech."""
+    frame = max(1, int(sample_rate * _env_float("VAD_FRAME_MS", 30) / 1000))
+    if len(samples) < frame:
+        return [(0, len(samples))] if len(samples) else []
+
+    db = _frame_db(samples, frame)
+    noise_floor = np.percentile(db, 10)
+    speech_level = np.percentile(db, 90)
+    # Above the noise floor, but never so high that recordings without
+    # pauses (floor ~ speech level) lose their quieter speech
+    threshold = min(noise_floor + _env_float("VAD_THRESHOLD_DB", 12), speech_level - 20)
+    threshold = max(threshold, _env_float("VAD_MIN_DB", -60))
+    speech = db > threshold
+    if not speech.any():
+        return []
+
+    pad = int(_env_float("VAD_PAD_MS", 200) * sample_rate / 1000 / frame)
+    if pad:
+        speech = np.convolve(speech, np.ones(2 * pad + 1), mode="same") > 0
+
+    edges = np.diff(np.concatenate(([0], speech.astype(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+
+    # Close gaps shorter than the minimum silence (also at the very start/end)
+    min_gap = int(_env_float("VAD_MIN_SILENCE_MS", 1000) * sample_rate / 1000 / frame)
+    keep = (starts[1:] - ends[:-1]) >= min_gap
+    starts = np.concatenate((starts[:1], starts[1:][keep]))
+    ends = np.concatenate((ends[:-1][keep], ends[-1:]))
+    n = len(db)
+    if starts[0] < min_gap:
+        starts[0] = 0
+    if n - ends[-1] < min_gap:
+        ends[-1] = n
+
+    regions = [(int(s) * frame, int(e) * frame) for s, e in zip(starts, ends)]
+    if regions[-1][1] == n * frame:
+        regions[-1] = (regions[-1][0], len(samples))  # include the partial last frame
+    return regions
+
+
+def trim_silence(samples: np.ndarray, sample_rate: int = SAMPLE_RATE) -> Tuple[np.ndarray, SpeechMap]:
+    """
+    (speech-only samples, map back to the original). Audio without any
+    detected speech is returned unchanged: Whisper decides on it then.
+    """
+    total = len(samples)
+    original_sec = total / sample_rate
+    regions = speech_regions(samples, sample_rate)
+    if not regions or regions == [(0, total)]:
+        return samples, SpeechMap([(0.0, 0.0, original_sec)] if total else [], original_sec)
+
+    segments = []
+    position = 0
+    for start, end in regions:
+        segments.append((position / sample_rate, start / sample_rate, (end - start) / sample_rate))
+        position += end - start
+    trimmed = np.concatenate([samples[start:end] for start, end in regions]).astype(np.float32, copy=False)
+    return trimmed, SpeechMap(segments, original_sec)
@@ -0,0 +1,112 @@
+# app_quiz/video_probe.py
+"""
+Pre-flight metadata probe: one extract_info(download=False) per video id
+before any audio is downloaded.
+
+The result (title, duration, language, live flag, caption languages) is
+stored in VideoMetadata and reused for VIDEO_METADATA_TTL_SEC (live
+streams only for VIDEO_METADATA_LIVE_TTL_SEC, they end eventually). The
+pipeline uses it to reject videos over QUIZ_MAX_VIDEO_SEC, to skip the
+caption lookup for videos without a usable track, and to give Gemini the
+real title instead of a placeholder.
+"""
+from __future__ import annotations
+
+import logging
+import os
+from datetime import timedelta
+from typing import Dict, Optional
+
+import yt_dlp
+from django.utils import timezone
+
+from app_quiz import captions, metrics
+from app_quiz.models import VideoMetadata
+
+logger = logging.getLogger(__name__)
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, str(default)))
+    except ValueError:
+        return default
+
+
+def probe_enabled() -> bool:
+    return os.getenv("VIDEO_PROBE", "1").strip().lower() not in {"0", "false", "no", "off"}
+
+
+def max_duration() -> float:
+    """Longest accepted video in seconds; 0 disables the limit."""
+    return _env_float("QUIZ_MAX_VIDEO_SEC", 3 * 3600)
+
+
+def _as_dict(row: VideoMetadata, cached: bool, info: Optional[Dict] = None) -> Dict:
+    return {
+        "title": row.title,
+        "duration": row.duration_sec,
+        "language": row.language,
+        "is_live": row.is_live,
+        "has_captions": captions.has_usable_track(
+            row.subtitle_languages, row.automatic_caption_languages, captions.preferred_languages()
+        ),
+        "cached": cached,
+        "info": info,  # raw yt-dlp metadata, only on a fresh probe (reused by the caption lookup)
+    }
+
+
+def probe(video_id: str, video_url: str, ydl_opts: Dict) -> Optional[Dict]:
+    """
+    Metadata {"title", "duration", "language", "is_live", "has_captions",
+    "cached", "info"} for video_id, or None when yt-dlp could not tell
+    (the pipeline then proceeds as without a probe).
+    """
+    row = VideoMetadata.objects.filter(video_id=video_id).first()
+    if row is not None and row.is_live:
+        # "Try again once the stream has ended" must work without waiting out the normal TTL
+        ttl = _env_float("VIDEO_METADATA_LIVE_TTL_SEC", 300)
+    else:
+        ttl = _env_float("VIDEO_METADATA_TTL_SEC", 7 * 24 * 3600)
+    if row is not None and row.fetched_at >= timezone.now() - timedelta(seconds=ttl):
+        metrics.cache_result("metadata", hit=True)
+        return _as_dict(row, cached=True)
+    metrics.cache_result("metadata", hit=False)
+
+    try:
+        with yt_dlp.YoutubeDL({**ydl_opts, "skip_download": True}) as ydl:
+            info = ydl.extract_info(video_url, download=False) or {}
+    except Exception as e:
+        logger.warning("metadata probe failed for %s: %s", video_url, e)
+        return None
+    if not info:
+        return None
+
+    manual, automatic = captions.track_languages(info)
+    duration = info.get("duration")
+    row, _ = VideoMetadata.objects.update_or_create(
+        video_id=video_id,
+        defaults={
+            "title": (info.get("title") or "")[:300],
+            "duration_sec": float(duration) if duration else None,
+            "language": (info.get("language") or "")[:16],
+            "is_live": bool(info.get("is_live")),
+            "subtitle_languages": manual,
+            "automatic_caption_languages": automatic,
+            "fetched_at": timezone.now(),
+        },
+    )
+    return _as_dict(row, cached=False, info=info)
+
+
+def check_limits(meta: Optional[Dict]) -> None:
+    """Raise ValueError (user error) for videos the pipeline will not process."""
+    if not meta:
+        return
+    if meta["is_live"]:
+        raise ValueError("Live streams are not supported; try again once the stream has ended.")
+    limit = max_duration()
+    if limit and meta["duration"] and meta["duration"] > limit:
+        raise ValueError(
+            f"Video is too long ({meta['duration'] / 60:.0f} min); the limit is {limit / 60:.0f} min."
+        )
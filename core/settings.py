@@ -1,5 +1,6 @@
 # core/settings.py
 import os
+import tempfile
 from dotenv import load_dotenv
 from datetime import timedelta
 from pathlib import Path
@@ -29,6 +30,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "app_quiz.middleware.MetricsMiddleware",  # outermost: latency includes the whole stack
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -101,6 +103,32 @@ LOGGING = {
     "root": {"handlers": ["console"], "level": "INFO"},
 }
 
+# Rendered quiz read responses (app_quiz.payload_cache). "file" is shared by
+# all gunicorn workers of a host, "redis" by all hosts (needs redis-py);
+# "locmem" is per process and therefore only safe with a single worker.
+_PAYLOAD_CACHE = os.getenv("QUIZ_PAYLOAD_CACHE", "file").strip().lower()
+if _PAYLOAD_CACHE == "redis":
+    _PAYLOAD_CACHE_CONFIG = {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": os.getenv("QUIZ_PAYLOAD_CACHE_LOCATION", "redis://127.0.0.1:6379/1"),
+    }
+elif _PAYLOAD_CACHE == "locmem":
+    _PAYLOAD_CACHE_CONFIG = {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "quiz-payloads"}
+elif _PAYLOAD_CACHE in {"0", "false", "no", "off"}:
+    _PAYLOAD_CACHE_CONFIG = {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}
+else:
+    _PAYLOAD_CACHE_CONFIG = {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": os.getenv(
+            "QUIZ_PAYLOAD_CACHE_LOCATION", os.path.join(tempfile.gettempdir(), "quizly-payload-cache")
+        ),
+        "OPTIONS": {"MAX_ENTRIES": int(os.getenv("QUIZ_PAYLOAD_CACHE_MAX_ENTRIES", "10000"))},
+    }
+CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "quiz_payloads": _PAYLOAD_CACHE_CONFIG,
+}
+
 FFMPEG_PATH = os.getenv("FFMPEG_PATH", "ffmpeg")  
 WHISPER_MODEL = os.getenv("WHISPER_MODEL", "base")
 GOOGLE_GENAI_API_KEY = os.getenv("GOOGLE_GENAI_API_KEY", "")
@@ -19,9 +19,11 @@ from django.urls import path, include
 from django.conf.urls.static import static
 from django.conf import settings
 from django.contrib.staticfiles.urls import staticfiles_urlpatterns
+from app_quiz.api.views import MetricsView
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('app_auth.api.urls')),
     path('api/', include('app_quiz.api.urls')),
+    path('metrics', MetricsView.as_view(), name='metrics'),
 ] + staticfiles_urlpatterns()
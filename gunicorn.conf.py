@@ -0,0 +1,34 @@
+# gunicorn.conf.py
+# Used by the Dockerfile: gunicorn core.wsgi:application -c gunicorn.conf.py
+import gc
+import os
+
+# Tells app_quiz.apps that Django is starting inside the gunicorn server
+os.environ.setdefault("QUIZLY_SERVER_PROCESS", "gunicorn")
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8001")
+workers = int(os.getenv("GUNICORN_WORKERS", "3"))
+threads = int(os.getenv("GUNICORN_THREADS", "2"))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "1800"))
+
+# WHISPER_PRELOAD=1: import the app (and thereby load Whisper in
+# AppQuizConfig.ready) in the master before forking. Workers then share
+# the model weights copy-on-write instead of holding one copy each.
+preload_app = os.getenv("WHISPER_PRELOAD", "").strip().lower() in {"1", "true", "yes", "on"}
+
+
+def when_ready(server):
+    if preload_app:
+        # Move everything loaded so far out of the GC's reach, so collections
+        # in the workers do not touch (and thereby copy) the shared pages.
+        gc.freeze()
+        server.log.info("Preloaded app frozen for copy-on-write sharing (%s objects)", gc.get_freeze_count())
+
+
+def on_starting(server):
+    # Per-process metric snapshots from a previous run would be summed into this one
+    import shutil
+
+    from app_quiz.metrics import metrics_dir
+
+    shutil.rmtree(metrics_dir(), ignore_errors=True)
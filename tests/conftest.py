@@ -12,6 +12,7 @@ class _FakeYDL:
     def __enter__(self): return self
     def __exit__(self, exc_type, exc, tb): pass
     def download(self, *args, **kwargs): return 0  # pretend success
+    def extract_info(self, *args, **kwargs): return {}  # no captions, no metadata
 
 yt_dlp_mod.YoutubeDL = _FakeYDL
 sys.modules["yt_dlp"] = yt_dlp_mod
@@ -53,9 +54,17 @@ class _FakeResp:
         '"answer":"Option A"}]}'
     )
 
+class _FakeChunk:
+    def __init__(self, text): self.text = text
+
 class GenerativeModel:
     def __init__(self, name): self.name = name
-    def generate_content(self, prompt): return _FakeResp()
+    def generate_content(self, prompt, generation_config=None, stream=False):
+        if stream:
+            # small pieces, cut mid-token like the real stream
+            text = _FakeResp.text
+            return [_FakeChunk(text[i:i + 17]) for i in range(0, len(text), 17)]
+        return _FakeResp()
 
 genai_mod.configure = configure
 genai_mod.GenerativeModel = GenerativeModel
@@ -70,3 +79,39 @@ sys.modules["google"] = google_pkg
 @pytest.fixture
 def api_client():
     return APIClient()
+
+
+@pytest.fixture(autouse=True)
+def _isolated_singleflight_dir(tmp_path, monkeypatch):
+    # Coalesced results live on disk; keep them from leaking between tests
+    monkeypatch.setenv("SINGLEFLIGHT_DIR", str(tmp_path / "singleflight"))
+    monkeypatch.setenv("ADMISSION_DIR", str(tmp_path / "admission"))
+
+
+@pytest.fixture(autouse=True)
+def _no_ffmpeg_decode(request, monkeypatch):
+    # ffmpeg is not available in CI; the Whisper stub ignores the samples anyway.
+    # Tests marked real_decode run the decode wiring and fake only the ffmpeg process.
+    if request.node.get_closest_marker("real_decode"):
+        return
+    import numpy as np
+    import app_quiz.utils as utils
+
+    monkeypatch.setattr(utils, "_decode_audio", lambda path, tempdir=None: np.zeros(16000, dtype=np.float32))
+
+
+@pytest.fixture(autouse=True)
+def _isolated_metrics(tmp_path, monkeypatch):
+    # Snapshots are summed over all files in METRICS_DIR
+    from app_quiz import metrics
+
+    monkeypatch.setenv("METRICS_DIR", str(tmp_path / "metrics"))
+    metrics.registry.reset()
+
+
+@pytest.fixture(autouse=True)
+def _empty_payload_cache():
+    # The quiz payload cache outlives the per-test database
+    from django.core.cache import caches
+
+    caches["quiz_payloads"].clear()
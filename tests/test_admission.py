@@ -0,0 +1,155 @@
+# tests/test_admission.py
+import threading
+import time
+
+import pytest
+from django.contrib.auth import get_user_model
+
+import app_quiz.utils as utils
+from app_quiz import admission, captions, metrics
+from app_quiz.jobs import claim_next_job, run_job
+from app_quiz.models import QuizJob
+
+User = get_user_model()
+
+
+@pytest.fixture
+def user_a(db):
+    return User.objects.create_user(username="alice", password="password123")
+
+
+def login(client, user, password="password123"):
+    resp = client.post("/api/login/", {"username": user.username, "password": password}, format="json")
+    assert resp.status_code == 200
+    return client
+
+
+@pytest.fixture
+def one_transcription(monkeypatch):
+    monkeypatch.setenv("ADMISSION_TRANSCRIBE_SLOTS", "1")
+    monkeypatch.setenv("ADMISSION_RETRY_AFTER_SEC", "7")
+
+
+@pytest.fixture
+def whisper_pipeline(monkeypatch, tmp_path):
+    monkeypatch.setenv("GEMINI_API_KEY", "test-key")
+    monkeypatch.setattr(captions, "fetch_captions", lambda url, opts, info=None: None)
+
+    def fake_download(tempdir, url, progress=None):
+        path = tmp_path / "audio.m4a"
+        path.write_bytes(b"\0")
+        return str(path)
+
+    monkeypatch.setattr(utils, "_download_audio_to", fake_download)
+
+
+def test_full_queue_is_rejected_immediately(one_transcription, monkeypatch):
+    monkeypatch.setenv("ADMISSION_QUEUE_MAX", "0")
+    with admission.slot("transcribe"):
+        with pytest.raises(admission.Rejected) as exc:
+            with admission.slot("transcribe"):
+                pass
+    assert exc.value.status == 503 and exc.value.retry_after == 7
+    with admission.slot("transcribe"):  # released again
+        pass
+
+
+def test_wait_times_out(one_transcription, monkeypatch):
+    monkeypatch.setenv("ADMISSION_WAIT_SEC", "0.2")
+    with admission.slot("transcribe"):
+        started = time.monotonic()
+        with pytest.raises(admission.Rejected):
+            with admission.slot("transcribe"):
+                pass
+        assert time.monotonic() - started >= 0.2
+    assert admission.queue_depth("transcribe") == 0
+
+
+def test_waiter_gets_released_slot_and_depth_is_exported(one_transcription):
+    admitted = threading.Event()
+
+    def waiter():
+        with admission.slot("transcribe"):
+            admitted.set()
+
+    with admission.slot("transcribe"):
+        thread = threading.Thread(target=waiter)
+        thread.start()
+        deadline = time.monotonic() + 5
+        while admission.queue_depth("transcribe") == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert 'quizly_admission_queue_depth{resource="transcribe"} 1' in metrics.registry.render()
+        assert not admitted.is_set()
+    thread.join(5)
+    assert admitted.is_set()
+    text = metrics.registry.render()
+    assert 'quizly_admission_queue_depth{resource="transcribe"} 0' in text
+    assert 'quizly_admission_wait_seconds_count{outcome="admitted",resource="transcribe"} 2' in text
+
+
+def test_user_slot_limit(monkeypatch):
+    monkeypatch.setenv("ADMISSION_USER_INFLIGHT", "1")
+    with admission.user_slot(1):
+        with pytest.raises(admission.Rejected) as exc:
+            admission.user_slot(1)
+        assert exc.value.status == 429
+        admission.user_slot(2).release()  # other users are not affected
+    admission.user_slot(1).release()
+
+
+@pytest.mark.django_db
+def test_create_quiz_returns_429_over_user_limit(api_client, user_a, monkeypatch):
+    monkeypatch.setenv("ADMISSION_USER_INFLIGHT", "1")
+    login(api_client, user_a)
+    with admission.user_slot(user_a.id):
+        resp = api_client.post("/api/createQuiz/", {"url": "https://www.youtube.com/watch?v=busy"}, format="json")
+        stream = api_client.post(
+            "/api/createQuiz/stream/", {"url": "https://www.youtube.com/watch?v=busy"}, format="json"
+        )
+    assert resp.status_code == 429 and resp["Retry-After"] == "30"
+    assert stream.status_code == 429
+
+
+@pytest.mark.django_db
+def test_create_quiz_returns_503_when_transcription_queue_is_full(
+    api_client, user_a, one_transcription, whisper_pipeline, monkeypatch
+):
+    monkeypatch.setenv("ADMISSION_QUEUE_MAX", "0")
+    login(api_client, user_a)
+    with admission.slot("transcribe"):
+        resp = api_client.post("/api/createQuiz/", {"url": "https://www.youtube.com/watch?v=busy"}, format="json")
+    assert resp.status_code == 503 and resp["Retry-After"] == "7"
+
+    resp = api_client.post("/api/createQuiz/", {"url": "https://www.youtube.com/watch?v=busy"}, format="json")
+    assert resp.status_code == 201
+
+
+@pytest.mark.django_db
+def test_full_transcription_queue_is_rejected_before_download(one_transcription, whisper_pipeline, monkeypatch):
+    monkeypatch.setenv("ADMISSION_QUEUE_MAX", "0")
+    monkeypatch.setattr(utils, "_download_audio_to", lambda *a, **k: pytest.fail("audio must not be downloaded"))
+    with admission.slot("transcribe"):
+        with pytest.raises(admission.Rejected) as exc:
+            utils.generate_quiz_from_youtube("https://www.youtube.com/watch?v=busy")
+    assert exc.value.status == 503
+
+
+def test_check_capacity_passes_with_a_free_slot(one_transcription, monkeypatch):
+    monkeypatch.setenv("ADMISSION_QUEUE_MAX", "0")
+    admission.check_capacity("transcribe")
+    with admission.slot("transcribe"):  # the probe released its slot again
+        with pytest.raises(admission.Rejected):
+            admission.check_capacity("transcribe")
+
+
+@pytest.mark.django_db
+def test_rejected_job_goes_back_to_the_queue(user_a, one_transcription, whisper_pipeline, monkeypatch):
+    monkeypatch.setenv("ADMISSION_QUEUE_MAX", "0")
+    monkeypatch.setenv("ADMISSION_RETRY_AFTER_SEC", "0")
+    QuizJob.objects.create(owner=user_a, video_url="https://www.youtube.com/watch?v=busy")
+    with admission.slot("transcribe"):
+        job = run_job(claim_next_job())
+    assert job.status == QuizJob.STATUS_QUEUED and job.attempts == 0
+
+    job = run_job(claim_next_job())
+    assert job.status == QuizJob.STATUS_SUCCEEDED
@@ -0,0 +1,89 @@
+# tests/test_audio_cache.py
+import os
+
+import pytest
+
+from app_quiz import audio_cache
+
+
+@pytest.fixture
+def cache_root(tmp_path, monkeypatch):
+    root = tmp_path / "audio-cache"
+    monkeypatch.setenv("AUDIO_CACHE_DIR", str(root))
+    return root
+
+
+def make_download(payload: bytes, calls: list):
+    def _download(tempdir):
+        calls.append(tempdir)
+        path = os.path.join(tempdir, "audio.m4a")
+        with open(path, "wb") as fh:
+            fh.write(payload)
+        return path
+    return _download
+
+
+def cached_files(root):
+    return [
+        p for p in root.rglob("*")
+        if p.is_file() and not p.name.endswith(".lock")
+    ]
+
+
+def test_disabled_without_dir(tmp_path, monkeypatch):
+    monkeypatch.delenv("AUDIO_CACHE_DIR", raising=False)
+    calls = []
+    path = audio_cache.fetch_audio("vid", "m4a", str(tmp_path), make_download(b"abc", calls))
+    assert open(path, "rb").read() == b"abc"
+    assert len(calls) == 1
+
+
+def test_second_fetch_is_served_from_cache(cache_root, tmp_path):
+    calls = []
+    first_dir = tmp_path / "t1"
+    second_dir = tmp_path / "t2"
+    first_dir.mkdir()
+    second_dir.mkdir()
+
+    audio_cache.fetch_audio("vid", "m4a", str(first_dir), make_download(b"audio-bytes", calls))
+    path = audio_cache.fetch_audio("vid", "m4a", str(second_dir), make_download(b"other", calls))
+
+    assert len(calls) == 1
+    assert path.startswith(str(second_dir))
+    assert open(path, "rb").read() == b"audio-bytes"
+    files = cached_files(cache_root)
+    assert len(files) == 1  # no temp leftovers
+    assert files[0].suffix == ".m4a"
+
+
+def test_format_is_part_of_the_key(cache_root, tmp_path):
+    calls = []
+    audio_cache.fetch_audio("vid", "m4a", str(tmp_path), make_download(b"a", calls))
+    audio_cache.fetch_audio("vid", "webm", str(tmp_path), make_download(b"b", calls))
+    assert len(calls) == 2
+
+
+def test_lru_eviction_respects_budget(cache_root, tmp_path, monkeypatch):
+    monkeypatch.setenv("AUDIO_CACHE_MAX_MB", str(250 / (1024 * 1024)))  # 250 bytes
+    calls = []
+    for i, vid in enumerate(["a", "b", "c"]):
+        d = tmp_path / vid
+        d.mkdir()
+        audio_cache.fetch_audio(vid, "m4a", str(d), make_download(b"x" * 100, calls))
+        entry = audio_cache._entry_path(str(cache_root), vid, "m4a")
+        os.utime(entry, (1000 + i, 1000 + i))
+
+    # "a" is the oldest entry and got evicted when "c" was stored
+    assert not os.path.exists(audio_cache._entry_path(str(cache_root), "a", "m4a"))
+    assert os.path.exists(audio_cache._entry_path(str(cache_root), "c", "m4a"))
+    assert sum(p.stat().st_size for p in cached_files(cache_root)) <= 250
+
+
+def test_eviction_does_not_leave_lock_files_behind(cache_root, tmp_path, monkeypatch):
+    monkeypatch.setenv("AUDIO_CACHE_MAX_MB", str(150 / (1024 * 1024)))  # one entry
+    calls = []
+    for i in range(600):
+        audio_cache.fetch_audio(f"v{i}", "m4a", str(tmp_path), make_download(b"x" * 100, calls))
+    assert len(cached_files(cache_root)) == 1
+    locks = [p for p in cache_root.rglob("*.lock") if p.name != ".evict.lock"]
+    assert len(locks) <= 256  # bounded by the shard directories, not by the videos ever cached
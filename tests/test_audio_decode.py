@@ -0,0 +1,164 @@
+# tests/test_audio_decode.py
+import io
+import subprocess
+
+import numpy as np
+import pytest
+
+from app_quiz import audio
+
+
+class _FakePopen:
+    calls = []
+    error = b""  # written to stderr with a non-zero exit status
+
+    def __init__(self, cmd, stdout=None, stderr=None):
+        self.calls.append(cmd)
+        assert stderr is not subprocess.PIPE  # an unread stderr pipe can fill up and block ffmpeg
+        self.stdout = io.BytesIO(b"" if self.error else np.arange(5, dtype=np.float32).tobytes() + b"\x01")
+        if self.error:
+            stderr.write(self.error)
+        self.returncode = 1 if self.error else 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+def test_decode_pcm_single_pass_to_whisper_format(monkeypatch):
+    _FakePopen.calls = []
+    monkeypatch.setattr(subprocess, "Popen", _FakePopen)
+    monkeypatch.setenv("FFMPEG_PATH", "/opt/ffmpeg")
+
+    samples = audio.decode_pcm("/tmp/audio.webm")
+
+    cmd = _FakePopen.calls[0]
+    assert cmd[0] == "/opt/ffmpeg"
+    assert cmd[cmd.index("-ar") + 1] == "16000"
+    assert cmd[cmd.index("-ac") + 1] == "1"
+    assert cmd[cmd.index("-f") + 1] == "f32le"
+    assert cmd[-1] == "-"
+    assert samples.dtype == np.float32
+    assert samples.tolist() == [0, 1, 2, 3, 4]  # trailing partial sample dropped
+    assert samples.flags.writeable
+
+
+def test_decode_pcm_reports_large_ffmpeg_errors(monkeypatch):
+    _FakePopen.calls = []
+    monkeypatch.setattr(subprocess, "Popen", _FakePopen)
+    monkeypatch.setattr(_FakePopen, "error", b"Invalid data found when processing input\n" * 5000)
+    with pytest.raises(RuntimeError, match="ffmpeg failed to decode audio: Invalid data"):
+        audio.decode_pcm("/tmp/corrupt.webm")
+
+
+def test_decode_pcm_memmap(monkeypatch, tmp_path):
+    raw = tmp_path / "audio.f32"
+
+    def fake_run(cmd, check, capture_output):
+        assert cmd[-1] == str(raw)
+        raw.write_bytes(np.ones(3, dtype=np.float32).tobytes())
+
+    monkeypatch.setattr(subprocess, "run", fake_run)
+    samples = audio.decode_pcm("/tmp/audio.webm", memmap_path=str(raw))
+    assert isinstance(samples, np.memmap)
+    assert samples.tolist() == [1.0, 1.0, 1.0]
+
+
+def test_missing_ffmpeg_is_runtime_error(monkeypatch):
+    monkeypatch.setenv("FFMPEG_PATH", "/nonexistent/ffmpeg")
+    with pytest.raises(RuntimeError, match="ffmpeg not found"):
+        audio.decode_pcm("/tmp/audio.webm")
+
+
+def test_use_memmap_threshold(monkeypatch, tmp_path):
+    path = tmp_path / "audio.webm"
+    path.write_bytes(b"\0" * 2 * 1024 * 1024)
+    assert audio.use_memmap(str(path)) is False  # default: never
+    monkeypatch.setenv("AUDIO_PCM_MEMMAP_MB", "1")
+    assert audio.use_memmap(str(path)) is True
+
+
+def test_legacy_mode_lets_whisper_decode_the_file(monkeypatch, tmp_path):
+    import app_quiz.utils as utils
+    from app_quiz import providers
+
+    monkeypatch.setenv("AUDIO_LEAN_DECODE", "0")
+    monkeypatch.setenv("AUDIO_VAD", "0")
+    monkeypatch.setattr(utils, "_decode_audio", lambda *a, **k: pytest.fail("must not decode before Whisper"))
+    seen = []
+
+    class _Model:
+        def transcribe(self, source, **options):
+            seen.append(source)
+            return {"text": "legacy transcript", "language": "en", "segments": []}
+
+    monkeypatch.setattr(utils, "_get_whisper_model", lambda: _Model())
+    path = str(tmp_path / "audio.m4a")
+    result = providers.WhisperTranscriber().transcribe(path, str(tmp_path))
+    assert seen == [path]
+    assert result["text"] == "legacy transcript"
+
+
+def _tone(seconds: float) -> np.ndarray:
+    t = np.arange(int(seconds * audio.SAMPLE_RATE)) / audio.SAMPLE_RATE
+    return (0.5 * np.sin(2 * np.pi * 220 * t)).astype(np.float32)
+
+
+class _RecordingModel:
+    def __init__(self):
+        self.sources = []
+
+    def transcribe(self, source, **options):
+        self.sources.append(source)
+        return {"text": "decoded transcript", "language": "en", "segments": [{"end": 2.0}]}
+
+
+@pytest.mark.real_decode
+def test_transcriber_decodes_through_ffmpeg_once(monkeypatch, tmp_path):
+    import app_quiz.utils as utils
+    from app_quiz import providers
+
+    pcm = _tone(2.0)
+    commands = []
+
+    class _PcmPopen(_FakePopen):
+        def __init__(self, cmd, stdout=None, stderr=None):
+            commands.append(cmd)
+            self.stdout = io.BytesIO(pcm.tobytes())
+            self.returncode = 0
+
+    monkeypatch.setattr(subprocess, "Popen", _PcmPopen)
+    monkeypatch.setenv("AUDIO_VAD", "0")
+    model = _RecordingModel()
+    monkeypatch.setattr(utils, "_get_whisper_model", lambda: model)
+    path = tmp_path / "audio.webm"
+    path.write_bytes(b"\0")
+
+    result = providers.WhisperTranscriber().transcribe(str(path), str(tmp_path))
+
+    assert len(commands) == 1 and commands[0][commands[0].index("-i") + 1] == str(path)
+    assert len(model.sources) == 1
+    assert isinstance(model.sources[0], np.ndarray)
+    np.testing.assert_array_equal(model.sources[0], pcm)
+    assert result["text"] == "decoded transcript"
+
+
+@pytest.mark.real_decode
+def test_legacy_mode_loads_samples_with_whisper_for_vad(monkeypatch, tmp_path):
+    import whisper
+
+    import app_quiz.utils as utils
+    from app_quiz import providers
+
+    monkeypatch.setenv("AUDIO_LEAN_DECODE", "0")
+    monkeypatch.setattr(subprocess, "Popen", lambda *a, **k: pytest.fail("lean ffmpeg pass must not run"))
+    loaded = []
+    monkeypatch.setattr(whisper, "load_audio", lambda path: loaded.append(path) or _tone(2.0), raising=False)
+    model = _RecordingModel()
+    monkeypatch.setattr(utils, "_get_whisper_model", lambda: model)
+
+    providers.WhisperTranscriber().transcribe(str(tmp_path / "audio.m4a"), str(tmp_path))
+    assert loaded == [str(tmp_path / "audio.m4a")]
+    assert isinstance(model.sources[0], np.ndarray)
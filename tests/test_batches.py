@@ -0,0 +1,178 @@
+# tests/test_batches.py
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from rest_framework.test import APIClient
+
+from app_quiz import batches
+from app_quiz.jobs import claim_next_job, enqueue_quiz_job
+from app_quiz.models import Quiz, QuizBatch, QuizJob
+
+User = get_user_model()
+
+
+@pytest.fixture
+def api_client():
+    return APIClient()
+
+
+@pytest.fixture
+def user_a(db):
+    return User.objects.create_user(username="alice", password="password123")
+
+
+@pytest.fixture
+def user_b(db):
+    return User.objects.create_user(username="bob", password="password123")
+
+
+def login(client, user, password="password123"):
+    resp = client.post("/api/login/", {"username": user.username, "password": password}, format="json")
+    assert resp.status_code == 200
+    return client
+
+
+def fake_generate(url: str):
+    return {
+        "title": "Quiz Title",
+        "description": "Quiz Description",
+        "questions": [
+            {
+                "question_title": "Question 1",
+                "question_options": ["Option A", "Option B", "Option C", "Option D"],
+                "answer": "Option A",
+            }
+        ],
+    }
+
+
+@pytest.fixture
+def fake_playlist(monkeypatch):
+    seen_opts = []
+
+    class _PlaylistYDL:
+        def __init__(self, opts):
+            seen_opts.append(opts)
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+        def extract_info(self, url, download=False):
+            return {"entries": [{"id": "pl1"}, {"id": "pl2"}, None, {"id": "vid1"}]}
+
+    monkeypatch.setattr(batches.yt_dlp, "YoutubeDL", _PlaylistYDL)
+    return seen_opts
+
+
+def test_resolve_dedupes_and_expands_playlists(fake_playlist):
+    ids, invalid = batches.resolve([
+        "https://www.youtube.com/watch?v=vid1",
+        "https://youtu.be/vid1",
+        "https://www.youtube.com/playlist?list=PL123",
+        "https://example.com/nope",
+        "",
+    ])
+    assert ids == ["vid1", "pl1", "pl2"]
+    assert [entry["url"] for entry in invalid] == ["https://example.com/nope"]
+    assert fake_playlist[0]["noplaylist"] is False
+
+
+@pytest.mark.django_db
+def test_create_batch_skips_existing_quizzes_and_pending_jobs(user_a):
+    Quiz.objects.create(owner=user_a, title="t", video_url="https://youtu.be/done1", video_id="done1")
+    enqueue_quiz_job(user_a, "https://www.youtube.com/watch?v=busy1")
+
+    batch, summary = batches.create_batch(
+        user_a,
+        ["https://youtu.be/done1", "https://youtu.be/busy1", "https://youtu.be/new1", "https://youtu.be/new2"],
+    )
+    assert summary["queued"] == 2
+    assert summary["already_generated"] == ["done1"]
+    assert summary["in_progress"] == ["busy1"]
+    assert list(batch.jobs.order_by("id").values_list("video_url", flat=True)) == [
+        "https://www.youtube.com/watch?v=new1",
+        "https://www.youtube.com/watch?v=new2",
+    ]
+
+
+@pytest.mark.django_db
+def test_create_batch_matches_pending_jobs_by_video_id(api_client, user_a):
+    login(api_client, user_a)
+    for url in ["https://youtu.be/busy1?t=30", "https://m.youtube.com/watch?v=busy2&t=42&list=PLx"]:
+        assert api_client.post("/api/createQuiz/?async=true", {"url": url}, format="json").status_code == 202
+
+    _, summary = batches.create_batch(
+        user_a, ["https://www.youtube.com/watch?v=busy1", "https://youtu.be/busy2", "https://youtu.be/new1"]
+    )
+    assert summary["in_progress"] == ["busy1", "busy2"]
+    assert summary["queued"] == 1
+
+
+@pytest.mark.django_db
+def test_create_batch_enforces_limit(user_a, monkeypatch):
+    monkeypatch.setenv("BATCH_MAX_ITEMS", "1")
+    with pytest.raises(ValueError):
+        batches.create_batch(user_a, ["https://youtu.be/a1", "https://youtu.be/b2"])
+    assert not QuizBatch.objects.exists()
+
+
+@pytest.mark.django_db
+def test_batch_endpoint_queues_jobs_and_reports_progress(api_client, user_a, fake_playlist):
+    login(api_client, user_a)
+    resp = api_client.post(
+        "/api/batches/",
+        {"urls": ["https://youtu.be/vid1"], "playlist_url": "https://www.youtube.com/playlist?list=PL123"},
+        format="json",
+    )
+    assert resp.status_code == 202
+    assert resp["Location"] == resp.data["status_url"]
+    assert resp.data["summary"]["queued"] == 3
+    assert resp.data["progress"] == {"total": 3, "queued": 3, "running": 0, "succeeded": 0, "failed": 0}
+    assert resp.data["finished"] is False
+
+    detail = api_client.get(resp["Location"])
+    assert detail.status_code == 200
+    assert len(detail.data["jobs"]) == 3
+    assert QuizBatch.objects.get().source == "https://www.youtube.com/playlist?list=PL123"
+
+
+@pytest.mark.django_db
+def test_batch_endpoint_validation_and_ownership(api_client, user_a, user_b):
+    login(api_client, user_a)
+    assert api_client.post("/api/batches/", {"urls": []}, format="json").status_code == 400
+
+    other = QuizBatch.objects.create(owner=user_b)
+    assert api_client.get(f"/api/batches/{other.id}/").status_code == 403
+    assert api_client.get("/api/batches/9999/").status_code == 404
+
+
+@pytest.mark.django_db
+def test_claim_is_limited_to_batch(user_a):
+    QuizJob.objects.create(owner=user_a, video_url="https://www.youtube.com/watch?v=other")
+    batch, _ = batches.create_batch(user_a, ["https://youtu.be/inbatch"])
+
+    job = claim_next_job(batch)
+    assert job.batch_id == batch.id
+    assert claim_next_job(batch) is None
+    assert QuizJob.objects.get(video_url__endswith="other").status == QuizJob.STATUS_QUEUED
+
+
+@pytest.mark.django_db(transaction=True)
+def test_ingest_command_processes_and_resumes(user_a, monkeypatch, tmp_path):
+    monkeypatch.setattr("app_quiz.jobs.utils.generate_quiz_from_youtube", fake_generate)
+    url_file = tmp_path / "urls.txt"
+    url_file.write_text("# seed list\nhttps://youtu.be/f1\nhttps://youtu.be/f2  # dup below\nhttps://youtu.be/f1\n")
+
+    call_command("ingest_quizzes", "--owner", "alice", "--file", str(url_file), "--enqueue-only")
+    batch = QuizBatch.objects.get()
+    assert batch.jobs.count() == 2
+
+    # Simulate an interrupted run: one job was left "running"
+    QuizJob.objects.filter(video_url__endswith="f1").update(status=QuizJob.STATUS_RUNNING)
+    call_command("ingest_quizzes", "--owner", "alice", "--resume", str(batch.id), "--concurrency", "1")
+
+    assert batches.progress(batch)["succeeded"] == 2
+    assert Quiz.objects.filter(owner=user_a).count() == 2
@@ -0,0 +1,50 @@
+# tests/test_benchmark_pipeline.py
+import io
+import json
+
+from django.core.management import call_command
+
+from app_quiz import providers
+
+
+def run_benchmark(*args):
+    out = io.StringIO()
+    call_command(
+        "benchmark_pipeline", "--json", "--download-latency", "0", "--transcribe-latency", "0",
+        "--llm-latency", "0", "--transcript-words", "200", *args, stdout=out,
+    )
+    return json.loads(out.getvalue())
+
+
+def test_reports_throughput_and_percentiles():
+    report = run_benchmark("--requests", "8", "--concurrency", "3")
+    assert report["succeeded"] == 8 and report["failed"] == 0
+    assert report["throughput_per_sec"] > 0
+    assert report["p50_sec"] <= report["p95_sec"] <= report["p99_sec"]
+    assert report["peak_rss_mb"] > 0
+
+
+def test_failure_rate_is_counted():
+    report = run_benchmark("--requests", "5", "--download-failure-rate", "1")
+    assert report["failed"] == 5
+
+
+def test_override_restores_real_backends():
+    real = providers.downloader()
+    with providers.override(downloader=providers.FakeDownloader()):
+        assert isinstance(providers.downloader(), providers.FakeDownloader)
+    assert providers.downloader() is real
+
+
+def test_fakes_are_deterministic(tmp_path):
+    def transcript(seed):
+        d = tmp_path / str(seed)
+        d.mkdir(exist_ok=True)
+        path = providers.FakeDownloader(size_kb=4, seed=seed).download(str(d), "https://youtu.be/x")
+        return providers.FakeTranscriber(words=50, seed=seed).transcribe(path, str(d))["text"]
+
+    assert transcript(1) == transcript(1)
+    assert transcript(1) != transcript(2)
+    llm = providers.FakeLLM(questions=3)
+    quiz = json.loads("".join(llm.generate_stream("prompt", "key")))
+    assert len(quiz["questions"]) == 3
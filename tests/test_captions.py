@@ -0,0 +1,101 @@
+# tests/test_captions.py
+import pytest
+
+import app_quiz.utils as utils
+from app_quiz import captions
+
+VTT = """WEBVTT
+Kind: captions
+Language: en
+
+NOTE generated by a robot
+and spanning two lines
+
+00:00:00.000 --> 00:00:02.000 align:start position:0%
+welcome<00:00:00.500><c> to</c><00:00:01.000><c> the</c>
+
+00:00:02.000 --> 00:00:04.000
+welcome to the
+lecture on &amp; about graphs
+
+3
+00:00:04.000 --> 00:00:06.000
+lecture on &amp; about graphs
+"""
+
+
+def track(ext="vtt"):
+    return [{"ext": "json3", "url": "https://x/json3"}, {"ext": ext, "url": f"https://x/{ext}"}]
+
+
+def test_vtt_to_text_strips_markup_and_rolling_repeats():
+    assert captions.vtt_to_text(VTT) == "welcome to the lecture on & about graphs"
+
+
+def test_manual_subtitles_win_over_automatic():
+    info = {
+        "subtitles": {"de": track()},
+        "automatic_captions": {"en": track()},
+    }
+    lang, kind, fmt = captions.pick_track(info, ["en", "de"])
+    assert (lang, kind, fmt["ext"]) == ("de", "manual", "vtt")
+
+
+def test_automatic_prefers_spoken_language_track():
+    info = {
+        "language": "de",
+        "automatic_captions": {"en": track(), "de-orig": track(), "de": track()},
+    }
+    lang, kind, _ = captions.pick_track(info, ["en", "de"])
+    assert (lang, kind) == ("de-orig", "automatic")
+
+
+def test_regional_variant_matches_language():
+    info = {"subtitles": {"en-GB": track()}}
+    assert captions.pick_track(info, ["en"])[0] == "en-GB"
+
+
+def test_no_usable_track():
+    assert captions.pick_track({"subtitles": {"fr": track()}}, ["en"]) is None
+    assert captions.pick_track({"subtitles": {"en": [{"ext": "json3", "url": "u"}]}}, ["en"]) is None
+
+
+@pytest.mark.django_db
+def test_pipeline_uses_captions_and_skips_audio(monkeypatch):
+    monkeypatch.setenv("GEMINI_API_KEY", "test-key")
+    monkeypatch.setattr(
+        captions, "fetch_captions",
+        lambda url, opts, info=None: {"text": "caption transcript", "language": "en", "kind": "manual"},
+    )
+
+    def no_download(*args, **kwargs):
+        raise AssertionError("audio must not be downloaded when captions exist")
+
+    monkeypatch.setattr(utils, "_download_audio_to", no_download)
+
+    quiz = utils.generate_quiz_from_youtube("https://www.youtube.com/watch?v=capvid")
+    assert quiz["meta"]["transcript_source"] == "captions"
+    assert quiz["meta"]["transcript_cached"] is False
+
+    again = utils.generate_quiz_from_youtube("https://www.youtube.com/watch?v=capvid")
+    assert again["meta"] == {
+        "video_id": "capvid",
+        "transcript_source": "captions",
+        "transcript_cached": True,
+        "audio_trimmed_sec": None,
+    }
+
+
+@pytest.mark.django_db
+def test_pipeline_falls_back_to_whisper(monkeypatch, tmp_path):
+    monkeypatch.setenv("GEMINI_API_KEY", "test-key")
+    monkeypatch.setattr(captions, "fetch_captions", lambda url, opts, info=None: None)
+
+    def fake_download(tempdir, url, progress=None):
+        path = tmp_path / "audio.m4a"
+        path.write_bytes(b"\0")
+        return str(path)
+
+    monkeypatch.setattr(utils, "_download_audio_to", fake_download)
+    quiz = utils.generate_quiz_from_youtube("https://www.youtube.com/watch?v=novid")
+    assert quiz["meta"]["transcript_source"] == "whisper"
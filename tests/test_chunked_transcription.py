@@ -0,0 +1,154 @@
+# tests/test_chunked_transcription.py
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+import pytest
+
+from app_quiz import transcription
+from app_quiz.transcription import SAMPLE_RATE
+
+
+def tone_with_gaps(seconds: float, silences):
+    """1 s tone blocks with (start, end) silent stretches in seconds."""
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    audio = (0.5 * np.sin(2 * np.pi * 220 * t)).astype(np.float32)
+    for start, end in silences:
+        audio[int(start * SAMPLE_RATE):int(end * SAMPLE_RATE)] = 0.0
+    return audio
+
+
+def test_split_points_snap_to_silence():
+    audio = tone_with_gaps(60, [(18.5, 19.5), (41.0, 42.0)])
+    splits = transcription.find_split_points(audio, chunk_sec=20, search_sec=3)
+    assert len(splits) == 2
+    assert 18.5 * SAMPLE_RATE <= splits[0] <= 19.5 * SAMPLE_RATE
+    assert 41.0 * SAMPLE_RATE <= splits[1] <= 42.0 * SAMPLE_RATE
+
+
+def test_chunk_bounds_overlap_previous_chunk():
+    bounds = transcription.chunk_bounds(1000, [400, 800], overlap=50)
+    assert bounds == [(0, 400), (350, 800), (750, 1000)]
+
+
+@pytest.mark.parametrize(
+    "texts, expected",
+    [
+        (["the quick brown fox", "brown fox jumps over"], "the quick brown fox jumps over"),
+        (["Hello big world.", "Big World, again"], "Hello big world. again"),
+        (["he looked at the", "the end"], "he looked at the the end"),  # one word is not an overlap
+        (["no overlap here", "next part"], "no overlap here next part"),
+        (["", "only second"], "only second"),
+    ],
+)
+def test_stitch_texts_removes_seam_duplicates(texts, expected):
+    assert transcription.stitch_texts(texts) == expected
+
+
+def test_transcribe_chunked_keeps_order(monkeypatch):
+    monkeypatch.setenv("WHISPER_CHUNK_SEC", "10")
+    monkeypatch.setenv("WHISPER_CHUNK_OVERLAP_SEC", "0")
+    audio = tone_with_gaps(35, [(8.0, 8.5), (19.0, 19.5), (28.0, 28.5)])
+
+    def fake_chunk(chunk):
+        # Encode the chunk length so the stitched order is visible
+        return {"text": f"part{round(len(chunk) / SAMPLE_RATE)}", "language": "en"}
+
+    monkeypatch.setattr(transcription, "_transcribe_chunk", fake_chunk)
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        result = transcription.transcribe_chunked(audio, "base", {}, executor=pool)
+
+    assert result["text"] == "part8 part11 part9 part7"
+    assert result["language"] == "en"
+    assert result["duration"] == pytest.approx(35)
+
+
+def test_pool_size_shares_cores_among_gunicorn_workers(monkeypatch):
+    monkeypatch.delenv("WHISPER_CHUNK_WORKERS", raising=False)
+    monkeypatch.setattr(transcription, "available_cores", lambda: 8)
+    monkeypatch.delenv("QUIZLY_SERVER_PROCESS", raising=False)
+    assert transcription.pool_size() == 8
+    monkeypatch.setenv("QUIZLY_SERVER_PROCESS", "gunicorn")
+    monkeypatch.setenv("GUNICORN_WORKERS", "3")
+    assert transcription.pool_size() == 2
+    monkeypatch.setenv("GUNICORN_WORKERS", "16")
+    assert transcription.pool_size() == 1
+    monkeypatch.setenv("WHISPER_CHUNK_WORKERS", "4")
+    assert transcription.pool_size() == 4
+
+
+class _FakeProcessPool(ThreadPoolExecutor):
+    created = []
+
+    def __init__(self, max_workers, mp_context=None, initializer=None, initargs=()):
+        super().__init__(max_workers=max_workers)
+        self.shut_down = False
+        _FakeProcessPool.created.append(self)
+
+    def shutdown(self, wait=True, **kwargs):
+        self.shut_down = True
+        super().shutdown(wait=wait, **kwargs)
+
+
+@pytest.fixture
+def fake_process_pool(monkeypatch):
+    _FakeProcessPool.created = []
+    monkeypatch.setattr(transcription, "ProcessPoolExecutor", _FakeProcessPool)
+    monkeypatch.setattr(transcription, "_transcribe_chunk", lambda chunk: {"text": "part", "language": "en"})
+    monkeypatch.setenv("WHISPER_CHUNK_SEC", "10")
+    yield _FakeProcessPool.created
+    transcription.shutdown_idle_pool()
+
+
+def test_pool_is_shut_down_after_each_job_without_idle_time(monkeypatch, fake_process_pool):
+    monkeypatch.setenv("WHISPER_POOL_IDLE_SEC", "0")
+    audio = tone_with_gaps(25, [(9.0, 9.5)])
+    transcription.transcribe_chunked(audio, "base", {})
+    transcription.transcribe_chunked(audio, "base", {})
+    assert len(fake_process_pool) == 2
+    assert all(pool.shut_down for pool in fake_process_pool)
+    assert transcription._POOL is None
+
+
+def test_idle_pool_is_reused_then_shut_down(monkeypatch, fake_process_pool):
+    monkeypatch.setenv("WHISPER_POOL_IDLE_SEC", "60")
+    audio = tone_with_gaps(25, [(9.0, 9.5)])
+    transcription.transcribe_chunked(audio, "base", {})
+    transcription.transcribe_chunked(audio, "base", {})
+    assert len(fake_process_pool) == 1 and not fake_process_pool[0].shut_down
+    assert transcription._POOL_TIMER is not None  # pending idle shutdown
+
+    transcription.shutdown_idle_pool()  # what the timer runs
+    assert fake_process_pool[0].shut_down and transcription._POOL is None
+
+
+def test_broken_pool_is_replaced_once(monkeypatch, fake_process_pool):
+    monkeypatch.setenv("WHISPER_POOL_IDLE_SEC", "60")
+    audio = tone_with_gaps(25, [(9.0, 9.5)])
+    calls = []
+
+    def dies_once(chunk):
+        calls.append(1)
+        if len(calls) == 1:
+            raise BrokenProcessPool("a child process terminated abruptly")
+        return {"text": "part", "language": "en"}
+
+    monkeypatch.setattr(transcription, "_transcribe_chunk", dies_once)
+    result = transcription.transcribe_chunked(audio, "base", {})
+    assert result["text"] == "part part part"
+    assert len(fake_process_pool) == 2
+    assert fake_process_pool[0].shut_down and not fake_process_pool[1].shut_down
+    assert transcription._POOL is fake_process_pool[1]
+
+
+def test_pool_broken_twice_fails_and_is_not_kept(monkeypatch, fake_process_pool):
+    monkeypatch.setenv("WHISPER_POOL_IDLE_SEC", "60")
+
+    def always_dies(chunk):
+        raise BrokenProcessPool("a child process terminated abruptly")
+
+    monkeypatch.setattr(transcription, "_transcribe_chunk", always_dies)
+    with pytest.raises(BrokenProcessPool):
+        transcription.transcribe_chunked(tone_with_gaps(25, [(9.0, 9.5)]), "base", {})
+    assert len(fake_process_pool) == 2 and all(pool.shut_down for pool in fake_process_pool)
+    assert transcription._POOL is None and transcription._POOL_USERS == 0
@@ -0,0 +1,101 @@
+# tests/test_conditional_get.py
+import pytest
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from app_quiz.models import Question, Quiz
+
+User = get_user_model()
+
+
+@pytest.fixture
+def api_client():
+    return APIClient()
+
+
+@pytest.fixture
+def user_a(db):
+    return User.objects.create_user(username="alice", password="password123")
+
+
+@pytest.fixture
+def user_b(db):
+    return User.objects.create_user(username="bob", password="password123")
+
+
+def login(client, user, password="password123"):
+    resp = client.post("/api/login/", {"username": user.username, "password": password}, format="json")
+    assert resp.status_code == 200
+    return client
+
+
+@pytest.fixture
+def quiz_a(user_a):
+    quiz = Quiz.objects.create(owner=user_a, title="Quiz A", video_url="https://youtu.be/aaa")
+    Question.objects.create(quiz=quiz, question_title="Q1", question_options=["A", "B"], answer="A")
+    return quiz
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("path", ["/api/quizzes/", "/api/quizzes/{id}/"])
+def test_matching_etag_returns_304_without_serializing(api_client, user_a, quiz_a, path, monkeypatch):
+    login(api_client, user_a)
+    url = path.format(id=quiz_a.id)
+    first = api_client.get(url)
+    assert first.status_code == 200
+    assert first["ETag"].startswith('"') and first["Last-Modified"]
+
+    def must_not_serialize(*args, **kwargs):
+        raise AssertionError("serializer ran for a 304")
+
+    monkeypatch.setattr("app_quiz.api.serializers.QuizListSerializer.to_representation", must_not_serialize)
+    with CaptureQueriesContext(connection) as ctx:
+        again = api_client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+    assert again.status_code == 304
+    assert again["ETag"] == first["ETag"]
+    assert not any("app_quiz_question\".\"question_title" in q["sql"] for q in ctx.captured_queries)
+
+    since = api_client.get(url, HTTP_IF_MODIFIED_SINCE=first["Last-Modified"])
+    assert since.status_code == 304
+
+
+@pytest.mark.django_db
+def test_etag_changes_on_writes(api_client, user_a, quiz_a):
+    login(api_client, user_a)
+    list_etag = api_client.get("/api/quizzes/")["ETag"]
+    detail_etag = api_client.get(f"/api/quizzes/{quiz_a.id}/")["ETag"]
+
+    resp = api_client.patch(f"/api/quizzes/{quiz_a.id}/", {"title": "Renamed"}, format="json")
+    assert resp.status_code == 200
+
+    assert api_client.get(f"/api/quizzes/{quiz_a.id}/", HTTP_IF_NONE_MATCH=detail_etag).status_code == 200
+    assert api_client.get("/api/quizzes/", HTTP_IF_NONE_MATCH=list_etag).status_code == 200
+
+    list_etag = api_client.get("/api/quizzes/")["ETag"]
+    Quiz.objects.create(owner=user_a, title="Other")
+    Quiz.objects.filter(title="Other").delete()
+    # Back to the same rows -> same ETag; a deleted question changes it
+    assert api_client.get("/api/quizzes/", HTTP_IF_NONE_MATCH=list_etag).status_code == 304
+    quiz_a.questions.all().delete()
+    assert api_client.get("/api/quizzes/", HTTP_IF_NONE_MATCH=list_etag).status_code == 200
+
+
+@pytest.mark.django_db
+def test_etag_depends_on_query_parameters(api_client, user_a, quiz_a):
+    login(api_client, user_a)
+    full = api_client.get("/api/quizzes/")["ETag"]
+    summary = api_client.get("/api/quizzes/?view=summary")
+    assert summary["ETag"] != full
+    assert api_client.get("/api/quizzes/?view=summary", HTTP_IF_NONE_MATCH=full).status_code == 200
+
+
+@pytest.mark.django_db
+def test_foreign_quiz_is_not_confirmed_by_304(api_client, user_a, user_b, quiz_a):
+    login(api_client, user_a)
+    etag = api_client.get(f"/api/quizzes/{quiz_a.id}/")["ETag"]
+
+    other = login(APIClient(), user_b)
+    resp = other.get(f"/api/quizzes/{quiz_a.id}/", HTTP_IF_NONE_MATCH=etag)
+    assert resp.status_code == 403
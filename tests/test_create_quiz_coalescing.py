@@ -0,0 +1,197 @@
+# tests/test_create_quiz_coalescing.py
+import threading
+import time
+
+import pytest
+from django.contrib.auth import get_user_model
+from rest_framework.test import APIClient
+
+import app_quiz.utils as utils
+from app_quiz import singleflight
+from app_quiz.models import Quiz, QuizJob
+
+User = get_user_model()
+
+
+@pytest.fixture
+def api_client():
+    return APIClient()
+
+
+@pytest.fixture
+def user_a(db):
+    return User.objects.create_user(username="alice", password="password123")
+
+
+def login(client, user, password="password123"):
+    resp = client.post("/api/login/", {"username": user.username, "password": password}, format="json")
+    assert resp.status_code == 200
+    return client
+
+
+def make_generate(calls, delay=0.0):
+    def fake_generate(url: str):
+        calls.append(url)
+        time.sleep(delay)
+        return {
+            "title": "Quiz Title",
+            "description": "Quiz Description",
+            "questions": [
+                {
+                    "question_title": "Question 1",
+                    "question_options": ["Option A", "Option B", "Option C", "Option D"],
+                    "answer": "Option A",
+                }
+            ],
+        }
+    return fake_generate
+
+
+def test_concurrent_calls_for_same_video_run_once(monkeypatch):
+    calls = []
+    monkeypatch.setattr(utils, "generate_quiz_from_youtube", make_generate(calls, delay=0.3))
+    urls = [
+        "https://www.youtube.com/watch?v=samevid",
+        "https://youtu.be/samevid",
+        "https://m.youtube.com/watch?v=samevid&t=42",
+    ] * 2
+    results = []
+
+    def worker(u):
+        results.append(utils.generate_quiz_coalesced(u))
+
+    threads = [threading.Thread(target=worker, args=(u,)) for u in urls]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert len(results) == len(urls)
+    assert all(r["title"] == "Quiz Title" for r in results)
+
+
+def test_failure_is_shared_only_with_waiters():
+    started = threading.Event()
+    errors = []
+
+    def failing():
+        started.set()
+        time.sleep(0.3)
+        raise RuntimeError("gemini down")
+
+    def leader():
+        try:
+            singleflight.run_once("quiz:x", failing)
+        except RuntimeError as e:
+            errors.append(type(e))
+
+    t = threading.Thread(target=leader)
+    t.start()
+    started.wait()
+    with pytest.raises(singleflight.CoalescedError):
+        singleflight.run_once("quiz:x", lambda: pytest.fail("waiter must not rerun"))
+    t.join()
+    assert errors == [RuntimeError]
+
+    # A request arriving after the failure gets a fresh attempt
+    assert singleflight.run_once("quiz:x", lambda: {"ok": True}) == {"ok": True}
+
+
+@pytest.mark.django_db
+def test_idempotency_key_replays_first_result(api_client, user_a, monkeypatch):
+    calls = []
+    monkeypatch.setattr("app_quiz.api.views.utils.generate_quiz_from_youtube", make_generate(calls))
+    monkeypatch.setenv("SINGLEFLIGHT", "0")
+    login(api_client, user_a)
+    payload = {"url": "https://www.youtube.com/watch?v=example"}
+
+    first = api_client.post("/api/createQuiz/", payload, format="json", HTTP_IDEMPOTENCY_KEY="k-1")
+    second = api_client.post("/api/createQuiz/", payload, format="json", HTTP_IDEMPOTENCY_KEY="k-1")
+
+    assert first.status_code == 201 and second.status_code == 201
+    assert second.json()["id"] == first.json()["id"]
+    assert second["Idempotent-Replayed"] == "true"
+    assert len(calls) == 1
+    assert Quiz.objects.count() == 1
+    assert QuizJob.objects.get(idempotency_key="k-1").status == QuizJob.STATUS_SUCCEEDED
+
+
+@pytest.mark.django_db
+def test_idempotency_key_with_other_url_is_rejected(api_client, user_a, monkeypatch):
+    monkeypatch.setattr("app_quiz.api.views.utils.generate_quiz_from_youtube", make_generate([]))
+    login(api_client, user_a)
+    api_client.post("/api/createQuiz/", {"url": "https://www.youtube.com/watch?v=one"},
+                    format="json", HTTP_IDEMPOTENCY_KEY="k-2")
+    resp = api_client.post("/api/createQuiz/", {"url": "https://www.youtube.com/watch?v=two"},
+                           format="json", HTTP_IDEMPOTENCY_KEY="k-2")
+    assert resp.status_code == 422
+
+
+@pytest.mark.django_db
+def test_retry_after_failure_reruns_pipeline(api_client, user_a, monkeypatch):
+    calls = []
+    ok = make_generate(calls)
+
+    def flaky(url):
+        if not calls:
+            calls.append(url)
+            raise RuntimeError("boom")
+        return ok(url)
+
+    monkeypatch.setattr("app_quiz.api.views.utils.generate_quiz_from_youtube", flaky)
+    login(api_client, user_a)
+    payload = {"url": "https://www.youtube.com/watch?v=flaky"}
+
+    first = api_client.post("/api/createQuiz/", payload, format="json", HTTP_IDEMPOTENCY_KEY="k-3")
+    second = api_client.post("/api/createQuiz/", payload, format="json", HTTP_IDEMPOTENCY_KEY="k-3")
+
+    assert first.status_code == 500
+    assert second.status_code == 201
+    job = QuizJob.objects.get(idempotency_key="k-3")
+    assert job.attempts == 2 and job.quiz_id == second.json()["id"]
+
+
+@pytest.mark.django_db
+def test_failed_persist_fails_job_and_retry_reruns_pipeline(api_client, user_a, monkeypatch):
+    calls = []
+    monkeypatch.setattr("app_quiz.api.views.utils.generate_quiz_from_youtube", make_generate(calls))
+    monkeypatch.setenv("SINGLEFLIGHT", "0")
+    monkeypatch.setenv("IDEMPOTENCY_WAIT_SEC", "5")
+    persist = utils.persist_generated_quiz
+    attempts = []
+
+    def flaky_persist(owner, url, generated):
+        attempts.append(url)
+        if len(attempts) == 1:
+            raise RuntimeError("database unavailable")
+        return persist(owner, url, generated)
+
+    monkeypatch.setattr(utils, "persist_generated_quiz", flaky_persist)
+    login(api_client, user_a)
+    payload = {"url": "https://www.youtube.com/watch?v=persist"}
+
+    with pytest.raises(RuntimeError, match="database unavailable"):
+        api_client.post("/api/createQuiz/", payload, format="json", HTTP_IDEMPOTENCY_KEY="k-5")
+    job = QuizJob.objects.get(idempotency_key="k-5")
+    assert job.status == QuizJob.STATUS_FAILED
+
+    started = time.monotonic()
+    retry = api_client.post("/api/createQuiz/", payload, format="json", HTTP_IDEMPOTENCY_KEY="k-5")
+    assert time.monotonic() - started < 5  # no wait on a job that is stuck RUNNING
+    assert retry.status_code == 201
+    assert len(calls) == 2
+    job.refresh_from_db()
+    assert job.status == QuizJob.STATUS_SUCCEEDED and job.quiz_id == retry.json()["id"]
+    assert Quiz.objects.count() == 1
+
+
+@pytest.mark.django_db
+def test_async_retry_returns_same_job(api_client, user_a):
+    login(api_client, user_a)
+    payload = {"url": "https://www.youtube.com/watch?v=example"}
+    first = api_client.post("/api/createQuiz/?async=1", payload, format="json", HTTP_IDEMPOTENCY_KEY="k-4")
+    second = api_client.post("/api/createQuiz/?async=1", payload, format="json", HTTP_IDEMPOTENCY_KEY="k-4")
+    assert first.status_code == 202 and second.status_code == 202
+    assert first.json()["job_id"] == second.json()["job_id"]
+    assert QuizJob.objects.count() == 1
@@ -0,0 +1,126 @@
+# tests/test_create_quiz_stream.py
+import json
+
+import pytest
+from django.contrib.auth import get_user_model
+from rest_framework.test import APIClient
+
+import app_quiz.utils as utils
+from app_quiz import gemini, streaming
+from app_quiz.models import Quiz
+
+User = get_user_model()
+
+QUIZ_JSON = json.dumps(
+    {
+        "title": "Graphs",
+        "description": "About graphs",
+        "questions": [
+            {"question_title": 'What is a "node"?', "question_options": ["A {x}", "B", "C", "D"], "answer": "A {x}"},
+            {"question_title": "What is an edge?", "question_options": ["A", "B", "C", "D", "E"], "answer": "E"},
+            {"question_title": "What is a path?", "question_options": ["A", "B"], "answer": "B"},
+        ],
+    }
+)
+
+
+@pytest.fixture
+def api_client():
+    return APIClient()
+
+
+@pytest.fixture
+def user_a(db):
+    return User.objects.create_user(username="alice", email="alice@example.com", password="password123")
+
+
+def login(client, user, password: str):
+    resp = client.post("/api/login/", {"username": user.username, "password": password}, format="json")
+    assert resp.status_code == 200, getattr(resp, "data", resp.content)
+    return client
+
+
+def parse_events(resp):
+    body = b"".join(resp.streaming_content).decode()
+    events = []
+    for frame in body.split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in frame.splitlines() if line and not line.startswith(":"))
+        if lines:
+            events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+def test_parser_emits_questions_as_they_complete():
+    parser = streaming.QuestionStreamParser()
+    text = "```json\n" + QUIZ_JSON + "\n```"
+    seen = []
+    for i in range(0, len(text), 7):
+        for q in parser.feed(text[i:i + 7]):
+            seen.append((i, q["question_title"]))
+
+    assert [t for _, t in seen] == ['What is a "node"?', "What is an edge?", "What is a path?"]
+    first_done = text.index('"question_title": "What is an edge?"')
+    assert seen[0][0] < first_done  # first question surfaced before the second started
+
+
+def test_parser_ignores_nested_arrays_and_other_keys():
+    parser = streaming.QuestionStreamParser()
+    doc = '{"tags": [{"question_title": "no"}], "questions": [{"question_title": "yes", "question_options": []}]}'
+    assert [q["question_title"] for q in parser.feed(doc)] == ["yes"]
+
+
+@pytest.mark.django_db
+def test_stream_reports_stages_questions_and_quiz(api_client, user_a, monkeypatch):
+    monkeypatch.setenv("GEMINI_API_KEY", "test-key")
+    monkeypatch.setattr(
+        utils, "_get_transcript",
+        lambda video_id, norm_url, progress=None, meta=None: (
+            progress("downloading", percent=100),
+            {"text": "a transcript", "source": "whisper", "cached": False},
+        )[1],
+    )
+    monkeypatch.setattr(
+        gemini.registry, "generate_stream",
+        lambda prompt, api_key: (QUIZ_JSON[i:i + 11] for i in range(0, len(QUIZ_JSON), 11)),
+    )
+    login(api_client, user_a, "password123")
+
+    resp = api_client.post("/api/createQuiz/stream/", {"url": "https://youtu.be/stream1"}, format="json")
+    assert resp.status_code == 200
+    assert resp["Content-Type"] == "text/event-stream"
+    events = parse_events(resp)
+
+    kinds = [k for k, _ in events]
+    assert kinds[0] == "progress" and kinds[-1] == "quiz"
+    stages = [d["stage"] for k, d in events if k == "progress"]
+    assert stages == ["downloading", "generating", "saving"]
+
+    questions = [d for k, d in events if k == "question"]
+    assert [q["index"] for q in questions] == [0, 1, 2]
+    assert questions[1]["question_options"] == ["E", "A", "B", "C"]  # normalized before sending
+    assert kinds.index("question") < kinds.index("quiz")
+
+    quiz = events[-1][1]
+    assert quiz["title"] == "Graphs"
+    assert [q["question_title"] for q in quiz["questions"]] == [q["question_title"] for q in questions]
+    assert Quiz.objects.filter(owner=user_a, title="Graphs").count() == 1
+
+
+@pytest.mark.django_db
+def test_stream_reports_pipeline_error(api_client, user_a, monkeypatch):
+    def boom(video_id, norm_url, progress=None, meta=None):
+        raise RuntimeError("yt-dlp failed")
+
+    monkeypatch.setattr(utils, "_get_transcript", boom)
+    login(api_client, user_a, "password123")
+
+    resp = api_client.post("/api/createQuiz/stream/", {"url": "https://youtu.be/stream2"}, format="json")
+    assert parse_events(resp) == [("error", {"detail": "Internal server error.", "status": 500})]
+    assert Quiz.objects.count() == 0
+
+
+@pytest.mark.django_db
+def test_stream_rejects_invalid_url_up_front(api_client, user_a):
+    login(api_client, user_a, "password123")
+    resp = api_client.post("/api/createQuiz/stream/", {"url": "https://vimeo.com/1"}, format="json")
+    assert resp.status_code == 400
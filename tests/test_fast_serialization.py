@@ -0,0 +1,94 @@
+# tests/test_fast_serialization.py
+import json
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from rest_framework.test import APIClient
+
+from app_quiz.models import Question, Quiz
+
+User = get_user_model()
+
+
+@pytest.fixture
+def api_client():
+    return APIClient()
+
+
+@pytest.fixture
+def user_a(db):
+    return User.objects.create_user(username="alice", password="password123")
+
+
+def login(client, user, password="password123"):
+    resp = client.post("/api/login/", {"username": user.username, "password": password}, format="json")
+    assert resp.status_code == 200
+    return client
+
+
+@pytest.fixture
+def quizzes(user_a):
+    titles = ["Übung – Grundlagen", "Line\u2028separator", "Plain"]
+    created = []
+    for i, title in enumerate(titles):
+        quiz = Quiz.objects.create(owner=user_a, title=title, description="" if i else "Beschreibung ✓",
+                                   video_url=f"https://youtu.be/v{i}")
+        for j in range(i):  # the first quiz has no questions
+            Question.objects.create(
+                quiz=quiz,
+                question_title=f"Frage {j} „quoted“",
+                question_options=["A", {"nested": [1, 2.5, None]}, "Ω"],
+                answer="A",
+            )
+        created.append(quiz)
+    return created
+
+
+PATHS = [
+    "/api/quizzes/",
+    "/api/quizzes/?view=summary",
+    "/api/quizzes/?fields=title,id,questions",
+    "/api/quizzes/?view=summary&fields=question_count,created_at",
+    "/api/quizzes/?page_size=2",
+    "/api/quizzes/?page_size=2&view=summary",
+    "/api/quizzes/{first}/",
+    "/api/quizzes/{last}/",
+]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("path", PATHS)
+def test_fast_path_is_byte_identical(api_client, user_a, quizzes, path, monkeypatch):
+    monkeypatch.setenv("QUIZ_PAYLOAD_CACHE", "off")
+    login(api_client, user_a)
+    url = path.format(first=quizzes[0].id, last=quizzes[-1].id)
+
+    monkeypatch.setenv("QUIZ_FAST_SERIALIZATION", "0")
+    slow = api_client.get(url)
+    monkeypatch.setenv("QUIZ_FAST_SERIALIZATION", "1")
+    fast = api_client.get(url)
+
+    assert slow.status_code == fast.status_code == 200
+    assert fast["Content-Type"] == slow["Content-Type"]
+    assert fast.content == slow.content
+    if path == "/api/quizzes/":
+        assert b"Line\\u2028separator" in fast.content  # escaped like JSONRenderer does
+
+
+@pytest.mark.django_db
+def test_fast_path_follows_next_cursor(api_client, user_a, quizzes, monkeypatch):
+    monkeypatch.setenv("QUIZ_PAYLOAD_CACHE", "off")
+    login(api_client, user_a)
+    first = api_client.get("/api/quizzes/?page_size=2").json()
+    rest = api_client.get(first["next"]).json()
+    assert [q["id"] for q in first["results"] + rest["results"]] == [q.id for q in reversed(quizzes)]
+
+
+@pytest.mark.django_db
+def test_benchmark_serialization_command(capsys):
+    call_command("benchmark_serialization", "--sizes", "3", "10", "--questions", "2", "--runs", "1", "--json")
+    report = json.loads(capsys.readouterr().out)
+    assert [row["quizzes"] for row in report] == [3, 10]
+    assert all(row["identical"] for row in report)
+    assert not Quiz.objects.exists()  # seeded data is rolled back
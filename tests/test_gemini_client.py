@@ -0,0 +1,77 @@
+# tests/test_gemini_client.py
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import app_quiz.gemini as gemini
+import app_quiz.utils as utils
+
+
+@pytest.fixture
+def genai_calls(monkeypatch):
+    calls = {"configure": [], "list_models": 0, "models": []}
+
+    def configure(**kwargs):
+        calls["configure"].append(kwargs)
+
+    def list_models():
+        calls["list_models"] += 1
+        return [
+            SimpleNamespace(name="models/gemini-1.0-pro", supported_generation_methods=["generateContent"]),
+            SimpleNamespace(name="models/gemini-2.0-flash", supported_generation_methods=["generateContent"]),
+            SimpleNamespace(name="models/embedding-001", supported_generation_methods=["embedContent"]),
+        ]
+
+    class Model:
+        def __init__(self, name):
+            self.name = name
+            calls["models"].append(name)
+
+        def generate_content(self, prompt, generation_config=None):
+            calls["generation_config"] = generation_config
+            return SimpleNamespace(text='```json\n{"title": "T"}\n```')
+
+    monkeypatch.setattr(gemini.genai, "configure", configure)
+    monkeypatch.setattr(gemini.genai, "list_models", list_models, raising=False)
+    monkeypatch.setattr(gemini.genai, "GenerativeModel", Model)
+    monkeypatch.delenv("GEMINI_MODEL", raising=False)
+    gemini.registry.reset()
+    yield calls
+    gemini.registry.reset()
+
+
+def test_configures_once_and_caches_model_resolution(genai_calls):
+    for _ in range(3):
+        assert utils._call_gemini("prompt", "key-1") == '{"title": "T"}'
+
+    assert genai_calls["configure"] == [{"api_key": "key-1"}]
+    assert genai_calls["list_models"] == 1
+    assert genai_calls["models"] == ["gemini-2.0-flash"]
+
+
+def test_new_api_key_reconfigures(genai_calls):
+    utils._call_gemini("prompt", "key-1")
+    utils._call_gemini("prompt", "key-2")
+    assert [c["api_key"] for c in genai_calls["configure"]] == ["key-1", "key-2"]
+    assert genai_calls["list_models"] == 1
+
+
+def test_explicit_model_skips_list_models(genai_calls, monkeypatch):
+    monkeypatch.setenv("GEMINI_MODEL", "gemini-2.5-pro")
+    utils._call_gemini("prompt", "key-1")
+    assert genai_calls["list_models"] == 0
+    assert genai_calls["models"] == ["gemini-2.5-pro"]
+
+
+def test_stale_model_name_is_refreshed_in_background(genai_calls, monkeypatch):
+    monkeypatch.setenv("GEMINI_MODEL_TTL_SEC", "0")
+    utils._call_gemini("prompt", "key-1")
+    time.sleep(0.01)
+    utils._call_gemini("prompt", "key-1")  # serves cached name, triggers refresh
+
+    deadline = time.time() + 2
+    while genai_calls["list_models"] < 2 and time.time() < deadline:
+        time.sleep(0.01)
+    assert genai_calls["list_models"] == 2
+    assert genai_calls["models"] == ["gemini-2.0-flash"]
@@ -2,6 +2,8 @@
 
 import pytest
 from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from rest_framework.test import APIClient
 from app_quiz.models import Quiz, Question
 
@@ -62,3 +64,66 @@ def test_returns_only_own_quizzes(api_client, user_a, user_b):
     assert "question_title" in q
     assert "question_options" in q
     assert "answer" in q
+
+
+def make_quizzes(owner, count, questions=3):
+    quizzes = []
+    for i in range(count):
+        quiz = Quiz.objects.create(owner=owner, title=f"Quiz {i}", video_url=f"https://youtu.be/v{i}")
+        Question.objects.bulk_create([
+            Question(quiz=quiz, question_title=f"Q{j}", question_options=["A", "B"], answer="A")
+            for j in range(questions)
+        ])
+        quizzes.append(quiz)
+    return quizzes
+
+
+@pytest.mark.django_db
+def test_cursor_pagination_walks_all_quizzes_newest_first(api_client, user_a):
+    quizzes = make_quizzes(user_a, 5, questions=1)
+    login(api_client, user_a)
+
+    seen, url = [], "/api/quizzes/?page_size=2"
+    while url:
+        resp = api_client.get(url)
+        assert resp.status_code == 200
+        body = resp.json()
+        assert len(body["results"]) <= 2
+        seen += [quiz["id"] for quiz in body["results"]]
+        url = body["next"]
+    assert seen == [quiz.id for quiz in reversed(quizzes)]
+
+
+@pytest.mark.django_db
+def test_summary_view_counts_questions_without_loading_them(api_client, user_a):
+    make_quizzes(user_a, 2, questions=3)
+    login(api_client, user_a)
+
+    with CaptureQueriesContext(connection) as small:
+        resp = api_client.get("/api/quizzes/?view=summary")
+    assert resp.status_code == 200
+    assert [quiz["question_count"] for quiz in resp.json()] == [3, 3]
+    assert "questions" not in resp.json()[0]
+    assert not any('"app_quiz_question"."question_title"' in q["sql"] for q in small.captured_queries)
+
+    make_quizzes(user_a, 10, questions=3)
+    with CaptureQueriesContext(connection) as large:
+        api_client.get("/api/quizzes/?view=summary")
+    assert len(large.captured_queries) == len(small.captured_queries)
+
+
+@pytest.mark.django_db
+def test_sparse_fieldsets(api_client, user_a):
+    make_quizzes(user_a, 1)
+    login(api_client, user_a)
+
+    resp = api_client.get("/api/quizzes/?fields=id,title")
+    assert resp.status_code == 200
+    assert set(resp.json()[0]) == {"id", "title"}
+
+    resp = api_client.get("/api/quizzes/?view=summary&fields=title,question_count&page_size=1")
+    assert set(resp.json()["results"][0]) == {"title", "question_count"}
+
+    assert api_client.get("/api/quizzes/?fields=id,secret").status_code == 400
+    assert api_client.get("/api/quizzes/?view=everything").status_code == 400
+
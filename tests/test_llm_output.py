@@ -0,0 +1,75 @@
+# tests/test_llm_output.py
+import pytest
+
+import app_quiz.utils as utils
+from app_quiz import gemini
+from app_quiz.llm_json import extract_json_object
+
+GOOD = '{"title": "T", "description": "D", "questions": [{"question_title": "Q", "question_options": ["a", "b", "c", "d"], "answer": "a"}]}'
+
+
+@pytest.mark.parametrize(
+    "raw",
+    [
+        GOOD,
+        "```json\n" + GOOD + "\n```",
+        "Sure, here is your quiz:\n" + GOOD + "\nLet me know if you need more!",
+        GOOD.replace('"a"]', '"a",]').replace('"answer": "a"}', '"answer": "a",}'),
+    ],
+)
+def test_extracts_object_despite_noise(raw):
+    assert extract_json_object(raw)["questions"][0]["question_title"] == "Q"
+
+
+def test_recovers_truncated_output_to_last_complete_value():
+    raw = GOOD[:-2] + ', {"question_title": "Q2", "question_opt'
+    parsed = extract_json_object(raw)
+    assert [q["question_title"] for q in parsed["questions"]] == ["Q"]
+
+
+def test_prefers_largest_object_and_respects_strings():
+    raw = 'Example: {"x": 1}. Answer: {"title": "braces } in { strings", "questions": []}'
+    assert extract_json_object(raw) == {"title": "braces } in { strings", "questions": []}
+    assert extract_json_object("no json here") is None
+
+
+@pytest.fixture
+def no_backoff(monkeypatch):
+    monkeypatch.setenv("GEMINI_RETRY_BASE_SEC", "0")
+
+
+@pytest.mark.django_db
+def test_invalid_output_reasks_only_the_llm(monkeypatch, no_backoff):
+    monkeypatch.setenv("GEMINI_API_KEY", "test-key")
+    transcripts = []
+    monkeypatch.setattr(
+        utils, "_get_transcript",
+        lambda video_id, norm_url, progress=None, meta=None: transcripts.append(video_id)
+        or {"text": "transcript", "source": "whisper", "cached": False},
+    )
+    answers = iter(["I cannot help with that.", GOOD])
+    monkeypatch.setattr(utils, "_call_gemini", lambda prompt, api_key: next(answers))
+
+    quiz = utils.generate_quiz_from_youtube("https://youtu.be/retry1")
+    assert quiz["title"] == "T"
+    assert transcripts == ["retry1"]
+
+
+def test_reask_is_bounded(monkeypatch, no_backoff):
+    monkeypatch.setenv("GEMINI_MAX_ATTEMPTS", "2")
+    calls = []
+    monkeypatch.setattr(utils, "_call_gemini", lambda prompt, api_key: calls.append(1) or "nope")
+
+    with pytest.raises(utils.GeminiOutputError):
+        utils._generate_quiz_payload("short transcript", "hint", "key")
+    assert len(calls) == 2
+
+
+def test_structured_output_config(monkeypatch):
+    config = gemini.generation_config()
+    assert config["response_mime_type"] == "application/json"
+    question = config["response_schema"]["properties"]["questions"]["items"]
+    assert question["required"] == ["question_title", "question_options", "answer"]
+
+    monkeypatch.setenv("GEMINI_STRUCTURED_OUTPUT", "0")
+    assert gemini.generation_config() is None
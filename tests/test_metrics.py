@@ -0,0 +1,159 @@
+# tests/test_metrics.py
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from rest_framework.test import APIClient
+
+from app_quiz import metrics
+
+User = get_user_model()
+
+
+@pytest.fixture
+def api_client():
+    return APIClient()
+
+
+@pytest.fixture
+def user_a(db):
+    return User.objects.create_user(username="alice", email="alice@example.com", password="password123")
+
+
+def login(client, user, password: str):
+    resp = client.post("/api/login/", {"username": user.username, "password": password}, format="json")
+    assert resp.status_code == 200, getattr(resp, "data", resp.content)
+    return client
+
+
+def scrape(client, **extra):
+    resp = client.get("/metrics", **extra)
+    assert resp.status_code == 200
+    assert resp["Content-Type"].startswith("text/plain; version=0.0.4")
+    return resp.content.decode()
+
+
+def test_histogram_exposition_is_cumulative():
+    for value in (0.02, 0.2, 3.0):
+        metrics.STAGE_SECONDS.observe(value, stage="gemini")
+    text = metrics.registry.render()
+
+    assert "# TYPE quizly_pipeline_stage_seconds histogram" in text
+    assert 'quizly_pipeline_stage_seconds_bucket{stage="gemini",le="0.05"} 1' in text
+    assert 'quizly_pipeline_stage_seconds_bucket{stage="gemini",le="0.5"} 2' in text
+    assert 'quizly_pipeline_stage_seconds_bucket{stage="gemini",le="+Inf"} 3' in text
+    assert 'quizly_pipeline_stage_seconds_count{stage="gemini"} 3' in text
+
+
+def test_stage_counts_errors():
+    with pytest.raises(RuntimeError):
+        with metrics.stage("download"):
+            raise RuntimeError("403")
+    assert 'quizly_pipeline_stage_errors_total{stage="download"} 1' in metrics.registry.render()
+
+
+def test_aggregates_across_processes():
+    metrics.cache_result("audio", hit=True)
+    env = {**os.environ, "METRICS_DIR": os.environ["METRICS_DIR"]}
+    code = (
+        "from app_quiz import metrics\n"
+        "for _ in range(3): metrics.cache_result('audio', hit=True)\n"
+        "metrics.cache_result('audio', hit=False)\n"
+    )  # flushed by the atexit hook
+    subprocess.run([sys.executable, "-c", code], env=env, cwd=settings.BASE_DIR, check=True)
+
+    text = metrics.registry.render()
+    assert 'quizly_cache_requests_total{cache="audio",result="hit"} 4' in text
+    assert 'quizly_cache_requests_total{cache="audio",result="miss"} 1' in text
+    assert 'quizly_cache_hit_ratio{cache="audio"} 0.8' in text
+
+
+def test_idle_process_publishes_its_last_updates():
+    env = {**os.environ, "METRICS_DIR": os.environ["METRICS_DIR"], "METRICS_FLUSH_SEC": "0.2"}
+    code = (
+        "import sys, time\n"
+        "from app_quiz import metrics\n"
+        "metrics.cache_result('audio', hit=True)\n"  # first update: flushed right away
+        "for _ in range(4): metrics.cache_result('audio', hit=True)\n"  # within the interval
+        "print('ready', flush=True)\n"
+        "time.sleep(30)\n"  # idle worker: no further updates, no exit
+    )
+    proc = subprocess.Popen([sys.executable, "-c", code], env=env, cwd=settings.BASE_DIR, stdout=subprocess.PIPE)
+    try:
+        assert proc.stdout.readline().strip() == b"ready"
+        deadline = time.monotonic() + 5
+        expected = 'quizly_cache_requests_total{cache="audio",result="hit"} 5'
+        while expected not in metrics.registry.render() and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert expected in metrics.registry.render()
+    finally:
+        proc.kill()
+        proc.wait()
+
+
+@pytest.mark.django_db
+def test_request_latency_and_queries_per_view(api_client, user_a):
+    login(api_client, user_a, "password123")
+    assert api_client.get("/api/quizzes/").status_code == 200
+
+    text = scrape(api_client)
+    assert 'quizly_http_request_duration_seconds_count{method="GET",status="200",view="quiz-list"} 1' in text
+    assert 'quizly_http_db_queries_count{view="quiz-list"} 1' in text
+    assert 'view="metrics"' not in text
+
+
+@pytest.mark.django_db
+def test_requests_do_not_flush_before_the_interval(api_client, user_a, monkeypatch):
+    monkeypatch.setenv("METRICS_FLUSH_SEC", "3600")
+    login(api_client, user_a, "password123")
+    metrics.registry.flush()
+    flushes = []
+    monkeypatch.setattr(metrics.registry, "flush", lambda: flushes.append(1))
+    for _ in range(3):
+        assert api_client.get("/api/quizzes/").status_code == 200
+    assert flushes == []
+
+
+class _WritingYDL:
+    def __init__(self, opts):
+        self.opts = opts
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def extract_info(self, *args, **kwargs):
+        return {}
+
+    def download(self, urls):
+        with open(self.opts["outtmpl"].replace("%(ext)s", "webm"), "wb") as fh:
+            fh.write(b"\0")
+        return 0
+
+
+@pytest.mark.django_db
+def test_pipeline_stages_are_timed(api_client, user_a, monkeypatch):
+    import yt_dlp
+
+    monkeypatch.setattr(yt_dlp, "YoutubeDL", _WritingYDL)
+    monkeypatch.setenv("GEMINI_API_KEY", "test-key")
+    login(api_client, user_a, "password123")
+    resp = api_client.post("/api/createQuiz/", {"url": "https://www.youtube.com/watch?v=metrics1"}, format="json")
+    assert resp.status_code == 201
+
+    text = scrape(api_client)
+    for stage in ("url_parse", "download", "decode", "transcribe", "gemini", "json_parse", "db_persist"):
+        assert f'quizly_pipeline_stage_seconds_count{{stage="{stage}"}}' in text, stage
+    assert 'quizly_cache_requests_total{cache="transcript",result="miss"} 1' in text
+
+
+def test_metrics_token(api_client, monkeypatch):
+    monkeypatch.setenv("METRICS_TOKEN", "s3cret")
+    assert api_client.get("/metrics").status_code == 401
+    scrape(api_client, HTTP_AUTHORIZATION="Bearer s3cret")
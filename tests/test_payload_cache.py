@@ -0,0 +1,151 @@
+# tests/test_payload_cache.py
+import pytest
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+import app_quiz.utils as utils
+from app_quiz import metrics
+from app_quiz.models import Question, Quiz
+
+User = get_user_model()
+
+
+@pytest.fixture
+def api_client():
+    return APIClient()
+
+
+@pytest.fixture
+def user_a(db):
+    return User.objects.create_user(username="alice", password="password123")
+
+
+@pytest.fixture
+def user_b(db):
+    return User.objects.create_user(username="bob", password="password123")
+
+
+def login(client, user, password="password123"):
+    resp = client.post("/api/login/", {"username": user.username, "password": password}, format="json")
+    assert resp.status_code == 200
+    return client
+
+
+@pytest.fixture
+def quiz_a(user_a):
+    quiz = Quiz.objects.create(owner=user_a, title="Quiz A", video_url="https://youtu.be/aaa")
+    Question.objects.create(quiz=quiz, question_title="Q1", question_options=["A", "B"], answer="A")
+    return quiz
+
+
+def quiz_queries(client, url, **headers):
+    with CaptureQueriesContext(connection) as ctx:
+        resp = client.get(url, **headers)
+    return resp, [q["sql"] for q in ctx.captured_queries if "app_quiz_" in q["sql"]]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("path", ["/api/quizzes/", "/api/quizzes/{id}/", "/api/quizzes/?view=summary"])
+def test_repeat_read_skips_orm_and_serializer(api_client, user_a, quiz_a, path):
+    login(api_client, user_a)
+    url = path.format(id=quiz_a.id)
+    first, queries = quiz_queries(api_client, url)
+    assert first.status_code == 200 and queries
+
+    second, queries = quiz_queries(api_client, url)
+    assert second.status_code == 200
+    assert queries == []
+    assert second.content == first.content
+    assert second["ETag"] == first["ETag"]
+
+    not_modified, queries = quiz_queries(api_client, url, HTTP_IF_NONE_MATCH=first["ETag"])
+    assert not_modified.status_code == 304 and queries == []
+
+    text = metrics.registry.render()
+    cache = "quiz_detail" if "{id}" in path else "quiz_list"
+    assert f'quizly_cache_requests_total{{cache="{cache}",result="hit"}} 2' in text
+    assert f'quizly_cache_requests_total{{cache="{cache}",result="miss"}} 1' in text
+
+
+@pytest.mark.django_db
+def test_writes_invalidate_list_and_detail(api_client, user_a, quiz_a):
+    login(api_client, user_a)
+    api_client.get("/api/quizzes/")
+    api_client.get(f"/api/quizzes/{quiz_a.id}/")
+
+    api_client.patch(f"/api/quizzes/{quiz_a.id}/", {"title": "Renamed"}, format="json")
+    assert api_client.get(f"/api/quizzes/{quiz_a.id}/").json()["title"] == "Renamed"
+    assert api_client.get("/api/quizzes/").json()[0]["title"] == "Renamed"
+
+    # createQuiz path: questions arrive through bulk_create (no signals)
+    generated = utils.persist_generated_quiz(user_a, "https://youtu.be/bbb", {
+        "title": "New",
+        "questions": [{"question_title": "Q", "question_options": ["A", "B", "C", "D"], "answer": "A"}],
+    })
+    listed = api_client.get("/api/quizzes/").json()
+    assert [quiz["title"] for quiz in listed] == ["New", "Renamed"]
+    assert len(listed[0]["questions"]) == 1
+
+    api_client.delete(f"/api/quizzes/{generated.id}/")
+    assert [quiz["title"] for quiz in api_client.get("/api/quizzes/").json()] == ["Renamed"]
+    assert api_client.get(f"/api/quizzes/{generated.id}/").status_code == 404
+
+    Question.objects.filter(quiz=quiz_a).delete()
+    assert api_client.get(f"/api/quizzes/{quiz_a.id}/").json()["questions"] == []
+
+
+@pytest.mark.django_db
+def test_cached_detail_is_not_served_to_other_users(api_client, user_a, user_b, quiz_a):
+    login(api_client, user_a)
+    assert api_client.get(f"/api/quizzes/{quiz_a.id}/").status_code == 200
+    other = login(APIClient(), user_b)
+    assert other.get(f"/api/quizzes/{quiz_a.id}/").status_code == 403
+    assert other.get("/api/quizzes/").json() == []
+
+
+@pytest.mark.django_db
+def test_cache_can_be_switched_off(api_client, user_a, quiz_a, monkeypatch):
+    monkeypatch.setenv("QUIZ_PAYLOAD_CACHE", "off")
+    login(api_client, user_a)
+    api_client.get("/api/quizzes/")
+    resp, queries = quiz_queries(api_client, "/api/quizzes/")
+    assert resp.status_code == 200 and queries
+
+
+def _quiz_with_questions(owner, n):
+    quiz = Quiz.objects.create(owner=owner, title=f"{n} questions", video_url="https://youtu.be/ccc")
+    Question.objects.bulk_create(
+        [Question(quiz=quiz, question_title=f"Q{i}", question_options=["A", "B"], answer="A") for i in range(n)]
+    )
+    return quiz
+
+
+@pytest.mark.django_db
+def test_quiz_delete_query_count_does_not_grow_with_questions(api_client, user_a):
+    login(api_client, user_a)
+    counts = []
+    for n in (1, 10, 50):
+        quiz = _quiz_with_questions(user_a, n)
+        api_client.get("/api/quizzes/")
+        with CaptureQueriesContext(connection) as ctx:
+            assert api_client.delete(f"/api/quizzes/{quiz.id}/").status_code == 204
+        counts.append(len(ctx.captured_queries))
+        assert api_client.get("/api/quizzes/").json() == []  # list entry invalidated
+    assert counts[0] == counts[1] == counts[2]
+
+
+@pytest.mark.django_db
+def test_question_delete_invalidates_once_per_quiz(api_client, user_a, quiz_a):
+    login(api_client, user_a)
+    _quiz_with_questions(user_a, 0)
+    Question.objects.bulk_create(
+        [Question(quiz=quiz_a, question_title=f"Q{i}", question_options=["A", "B"], answer="A") for i in range(9)]
+    )
+    assert len(api_client.get(f"/api/quizzes/{quiz_a.id}/").json()["questions"]) == 10
+    with CaptureQueriesContext(connection) as ctx:
+        Question.objects.filter(quiz=quiz_a).delete()
+    owner_lookups = [q for q in ctx.captured_queries if 'SELECT "app_quiz_quiz"."owner_id"' in q["sql"]]
+    assert len(owner_lookups) == 1
+    assert api_client.get(f"/api/quizzes/{quiz_a.id}/").json()["questions"] == []
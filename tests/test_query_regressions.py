@@ -0,0 +1,79 @@
+# tests/test_query_regressions.py
+import json
+from pathlib import Path
+
+import pytest
+from django.core.management import CommandError, call_command
+from django.db import connection
+
+from app_quiz import query_audit
+from app_quiz.models import Quiz
+
+BUDGETS = json.loads((Path(__file__).parent / "query_budgets.json").read_text())
+ENDPOINTS = {endpoint.name: endpoint for endpoint in query_audit.ENDPOINTS}
+
+
+@pytest.fixture
+def small(db):
+    return query_audit.seed(users=2, quizzes_per_user=5, questions_per_quiz=3)
+
+
+def test_every_endpoint_has_a_budget():
+    assert set(BUDGETS) == set(ENDPOINTS)
+
+
+@pytest.mark.django_db
+def test_query_counts_match_budgets(small):
+    report = query_audit.audit(small)
+    for name, row in report.items():
+        assert row["status"] == [ENDPOINTS[name].status], name
+    assert {name: row["queries"] for name, row in report.items()} == BUDGETS
+
+
+@pytest.mark.django_db
+def test_query_counts_do_not_grow_with_data(small):
+    """N+1 guard: ten times the quizzes and questions must not change any count."""
+    query_audit.seed(users=1, quizzes_per_user=50, questions_per_quiz=10)
+    large = query_audit.seed(users=2, quizzes_per_user=50, questions_per_quiz=10)
+    before = query_audit.audit(small)
+    after = query_audit.audit(large)
+    assert {n: r["queries"] for n, r in after.items()} == {n: r["queries"] for n, r in before.items()}
+
+
+@pytest.mark.django_db
+def test_read_plans_use_indexes(small):
+    if connection.vendor != "sqlite":
+        pytest.skip("plans are checked with SQLite's EXPLAIN QUERY PLAN")
+    report = query_audit.audit(small, endpoints=[e for e in query_audit.ENDPOINTS if e.explain])
+    for name, row in report.items():
+        assert row["plans"], name
+        for plan in row["plans"]:
+            assert plan["problems"] == [], (name, plan["sql"], plan["plan"])
+
+
+def test_plan_problems():
+    assert query_audit.plan_problems(["SCAN app_quiz_question"]) == ["SCAN app_quiz_question"]
+    assert query_audit.plan_problems(["SCAN app_quiz_quiz USING COVERING INDEX x"]) == []
+    assert query_audit.plan_problems(["SEARCH app_quiz_quiz USING INDEX quiz_owner_created_idx (owner_id=?)"]) == []
+    assert query_audit.plan_problems(["USE TEMP B-TREE FOR ORDER BY"]) == ["USE TEMP B-TREE FOR ORDER BY"]
+    assert query_audit.plan_problems(["USE TEMP B-TREE FOR count(DISTINCT)"]) == []
+
+
+@pytest.mark.django_db
+def test_benchmark_api_command_writes_and_compares(tmp_path, capsys):
+    baseline = tmp_path / "baseline.json"
+    args = ["--users", "1", "--quizzes-per-user", "3", "--questions", "2", "--runs", "1"]
+    call_command("benchmark_api", *args, "--output", str(baseline))
+    report = json.loads(baseline.read_text())
+    assert report["meta"]["users"] == 1
+    assert {name: row["queries"] for name, row in report["endpoints"].items()} == BUDGETS
+    assert not Quiz.objects.exists()  # seeded data is rolled back
+
+    # Generous tolerance: only the query counts are compared in earnest here
+    call_command("benchmark_api", *args, "--compare", str(baseline), "--tolerance", "1000")
+    assert "No regressions" in capsys.readouterr().out
+
+    report["endpoints"]["quizzes.list"]["queries"] -= 1
+    baseline.write_text(json.dumps(report))
+    with pytest.raises(CommandError, match="quizzes.list: 4 queries"):
+        call_command("benchmark_api", *args, "--compare", str(baseline), "--tolerance", "1000")
@@ -0,0 +1,144 @@
+# tests/test_quiz_generation.py
+import json
+import re
+import threading
+import time
+
+import pytest
+
+import app_quiz.utils as utils
+from app_quiz import chunking, gemini
+
+
+@pytest.fixture(autouse=True)
+def _offline_tokens(monkeypatch):
+    # Deterministic length-based estimate, no BPE download
+    monkeypatch.setattr(chunking, "_encoding", lambda: None)
+
+
+def sentences(n, words=20):
+    return " ".join(f"Sentence {i} " + "word " * words + "end." for i in range(n))
+
+
+def test_short_transcript_is_one_chunk():
+    assert chunking.split_transcript("Hello there. General Kenobi.", budget=500) == [
+        "Hello there. General Kenobi."
+    ]
+
+
+def test_chunks_respect_budget_and_keep_everything():
+    text = sentences(60)
+    chunks = chunking.split_transcript(text, budget=200, limit=100)
+    assert len(chunks) > 1
+    assert all(chunking.count_tokens(c) <= 200 for c in chunks)
+    assert " ".join(chunks).split() == text.split()
+    assert all(c.endswith("end.") for c in chunks)  # cut at sentence boundaries
+
+
+def test_unpunctuated_text_is_cut_into_word_runs():
+    chunks = chunking.split_transcript("word " * 2000, budget=200, limit=100)
+    assert len(chunks) > 1
+    assert all(chunking.count_tokens(c) <= 200 for c in chunks)
+
+
+def test_chunk_limit_raises_budget():
+    chunks = chunking.split_transcript(sentences(200), budget=200, limit=4)
+    assert len(chunks) <= 4
+
+
+def _fake_gemini(delay=0.0, fail_parts=()):
+    calls = []
+    lock = threading.Lock()
+
+    def call(prompt, api_key):
+        part = re.search(r"part (\d+) of (\d+)", prompt)
+        idx = int(part.group(1)) if part else 0
+        with lock:
+            calls.append(idx)
+        time.sleep(delay)
+        if idx in fail_parts:
+            raise RuntimeError("Gemini did not return valid JSON.")
+        questions = [
+            {
+                "question_title": f"Q{idx}.{k}",
+                "question_options": ["A", "B", "C", "D"],
+                "answer": "A",
+            }
+            for k in range(3)
+        ]
+        # Every chunk repeats the same overview question first
+        questions.insert(
+            0, {"question_title": "What is this video about?", "question_options": ["A", "B", "C", "D"], "answer": "A"}
+        )
+        return json.dumps({"title": f"Title {idx}", "description": "Desc", "questions": questions})
+
+    return call, calls
+
+
+def test_map_reduce_covers_all_chunks_and_dedupes(monkeypatch):
+    monkeypatch.setenv("QUIZ_CHUNK_TOKENS", "200")
+    call, calls = _fake_gemini()
+    monkeypatch.setattr(utils, "_call_gemini", call)
+
+    quiz = utils._generate_quiz_payload(sentences(40), "hint", "key")
+
+    assert sorted(calls) == list(range(1, len(calls) + 1)) and len(calls) > 2
+    titles = [q["question_title"] for q in quiz["questions"]]
+    assert len(titles) == 10
+    assert titles.count("What is this video about?") == 1
+    assert len(set(titles)) == len(titles)
+    assert {t.split(".")[0] for t in titles if t.startswith("Q")} == {f"Q{i}" for i in calls}
+    assert quiz["title"] == "Title 1"
+
+
+def test_chunks_run_concurrently(monkeypatch):
+    monkeypatch.setenv("QUIZ_CHUNK_TOKENS", "200")
+    monkeypatch.setenv("QUIZ_LLM_CONCURRENCY", "8")
+    call, calls = _fake_gemini(delay=0.2)
+    monkeypatch.setattr(utils, "_call_gemini", call)
+
+    started = time.monotonic()
+    utils._generate_quiz_payload(sentences(40), "hint", "key")
+    elapsed = time.monotonic() - started
+
+    assert len(calls) >= 4
+    assert elapsed < 0.2 * len(calls) / 2
+
+
+def test_failed_chunk_is_skipped(monkeypatch):
+    monkeypatch.setenv("QUIZ_CHUNK_TOKENS", "200")
+    call, _ = _fake_gemini(fail_parts={1})
+    monkeypatch.setattr(utils, "_call_gemini", call)
+
+    quiz = utils._generate_quiz_payload(sentences(40), "hint", "key")
+    assert not any(q["question_title"].startswith("Q1.") for q in quiz["questions"])
+
+
+def test_all_chunks_failing_raises(monkeypatch):
+    monkeypatch.setenv("QUIZ_CHUNK_TOKENS", "200")
+    monkeypatch.setenv("QUIZ_MAX_CHUNKS", "3")
+    call, _ = _fake_gemini(fail_parts={1, 2, 3})
+    monkeypatch.setattr(utils, "_call_gemini", call)
+
+    with pytest.raises(RuntimeError, match="valid JSON"):
+        utils._generate_quiz_payload(sentences(40), "hint", "key")
+
+
+def test_streaming_map_reduce_emits_final_questions(monkeypatch):
+    monkeypatch.setenv("QUIZ_CHUNK_TOKENS", "200")
+    call, calls = _fake_gemini()
+    monkeypatch.setattr(
+        gemini.registry, "generate_stream",
+        lambda prompt, api_key: iter([call(prompt, api_key)]),
+    )
+    emitted = []
+    quiz = utils._generate_quiz_payload(
+        sentences(40), "hint", "key", on_question=lambda q, i: emitted.append((i, q))
+    )
+
+    assert [i for i, _ in emitted] == list(range(10))
+    assert [q for _, q in emitted] == quiz["questions"]
+    # every chunk got its share before leftovers filled the remaining slots
+    assert {q["question_title"].split(".")[0] for _, q in emitted if q["question_title"].startswith("Q")} == {
+        f"Q{i}" for i in calls
+    }
@@ -0,0 +1,131 @@
+# tests/test_quiz_jobs.py
+import pytest
+from django.contrib.auth import get_user_model
+from rest_framework.test import APIClient
+
+from app_quiz.jobs import QuizWorkerPool, claim_next_job, run_job
+from app_quiz.models import Quiz, QuizJob
+
+User = get_user_model()
+
+
+@pytest.fixture
+def api_client():
+    return APIClient()
+
+
+@pytest.fixture
+def user_a(db):
+    return User.objects.create_user(username="alice", password="password123")
+
+
+@pytest.fixture
+def user_b(db):
+    return User.objects.create_user(username="bob", password="password123")
+
+
+def login(client, user, password="password123"):
+    resp = client.post("/api/login/", {"username": user.username, "password": password}, format="json")
+    assert resp.status_code == 200
+    return client
+
+
+def fake_generate(url: str):
+    return {
+        "title": "Quiz Title",
+        "description": "Quiz Description",
+        "questions": [
+            {
+                "question_title": "Question 1",
+                "question_options": ["Option A", "Option B", "Option C", "Option D"],
+                "answer": "Option A",
+            }
+        ],
+    }
+
+
+@pytest.mark.django_db
+def test_async_create_returns_202_with_job(api_client, user_a, monkeypatch):
+    def must_not_run(url):
+        raise AssertionError("pipeline must not run inside the request")
+
+    monkeypatch.setattr("app_quiz.api.views.utils.generate_quiz_from_youtube", must_not_run)
+    login(api_client, user_a)
+    resp = api_client.post(
+        "/api/createQuiz/?async=true",
+        {"url": "https://www.youtube.com/watch?v=example"},
+        format="json",
+    )
+    assert resp.status_code == 202
+    data = resp.json()
+    assert data["status"] == "queued"
+    assert data["quiz_id"] is None
+    assert resp["Location"] == f"/api/jobs/{data['job_id']}/"
+    assert QuizJob.objects.filter(id=data["job_id"], owner=user_a).exists()
+
+
+@pytest.mark.django_db
+def test_async_create_rejects_shorts_immediately(api_client, user_a):
+    login(api_client, user_a)
+    resp = api_client.post(
+        "/api/createQuiz/",
+        {"url": "https://www.youtube.com/shorts/abc123XYZ"},
+        format="json",
+        HTTP_PREFER="respond-async",
+    )
+    assert resp.status_code == 400
+    assert not QuizJob.objects.exists()
+
+
+@pytest.mark.django_db
+def test_run_job_links_created_quiz(api_client, user_a, monkeypatch):
+    monkeypatch.setattr("app_quiz.jobs.utils.generate_quiz_from_youtube", fake_generate)
+    QuizJob.objects.create(owner=user_a, video_url="https://www.youtube.com/watch?v=example")
+
+    job = run_job(claim_next_job())
+    assert job.status == QuizJob.STATUS_SUCCEEDED
+    assert job.attempts == 1
+    assert job.quiz.questions.count() == 1
+
+    login(api_client, user_a)
+    resp = api_client.get(f"/api/jobs/{job.id}/")
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["status"] == "succeeded"
+    assert data["quiz_id"] == job.quiz_id
+    assert data["quiz_url"] == f"/api/quizzes/{job.quiz_id}/"
+
+
+@pytest.mark.django_db
+def test_failed_job_stores_generic_error(user_a, monkeypatch):
+    def boom(url):
+        raise RuntimeError("secret internals")
+
+    monkeypatch.setattr("app_quiz.jobs.utils.generate_quiz_from_youtube", boom)
+    QuizJob.objects.create(owner=user_a, video_url="https://www.youtube.com/watch?v=xyz")
+
+    job = run_job(claim_next_job())
+    assert job.status == QuizJob.STATUS_FAILED
+    assert job.error == "Quiz generation failed."
+    assert not Quiz.objects.exists()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_worker_pool_drains_queue(user_a, monkeypatch):
+    monkeypatch.setattr("app_quiz.jobs.utils.generate_quiz_from_youtube", fake_generate)
+    for vid in ("a1", "b2", "c3"):
+        QuizJob.objects.create(owner=user_a, video_url=f"https://www.youtube.com/watch?v={vid}")
+
+    # One thread: the in-memory SQLite test DB does not wait on write locks
+    processed = QuizWorkerPool(workers=1, poll_interval=0).run(once=True)
+    assert processed == 3
+    assert QuizJob.objects.filter(status=QuizJob.STATUS_SUCCEEDED).count() == 3
+    assert Quiz.objects.count() == 3
+
+
+@pytest.mark.django_db
+def test_job_detail_forbidden_for_other_user(api_client, user_a, user_b):
+    job = QuizJob.objects.create(owner=user_b, video_url="https://www.youtube.com/watch?v=xyz")
+    login(api_client, user_a)
+    resp = api_client.get(f"/api/jobs/{job.id}/")
+    assert resp.status_code == 403
@@ -0,0 +1,119 @@
+# tests/test_quiz_reuse.py
+import importlib
+
+import pytest
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from rest_framework.test import APIClient
+
+import app_quiz.utils as utils
+from app_quiz import captions
+from app_quiz.jobs import claim_next_job, run_job
+from app_quiz.models import GeneratedQuiz, Quiz, QuizJob
+
+User = get_user_model()
+URL = "https://www.youtube.com/watch?v=reusevid"
+
+
+@pytest.fixture
+def users(db):
+    return [User.objects.create_user(username=name, password="password123") for name in ("alice", "bob")]
+
+
+def client_for(user, password="password123"):
+    client = APIClient()
+    resp = client.post("/api/login/", {"username": user.username, "password": password}, format="json")
+    assert resp.status_code == 200
+    return client
+
+
+@pytest.fixture
+def pipeline_runs(monkeypatch):
+    monkeypatch.setenv("GEMINI_API_KEY", "test-key")
+    monkeypatch.setenv("SINGLEFLIGHT", "0")
+    monkeypatch.setattr(
+        captions, "fetch_captions",
+        lambda url, opts, info=None: {"text": "caption transcript", "language": "en", "kind": "manual"},
+    )
+    runs = []
+    original = utils.generate_quiz_from_youtube
+
+    def counting(url, *args, **kwargs):
+        runs.append(url)
+        return original(url, *args, **kwargs)
+
+    monkeypatch.setattr(utils, "generate_quiz_from_youtube", counting)
+    return runs
+
+
+def create(user, url=URL, **extra):
+    return client_for(user).post("/api/createQuiz/", {"url": url, **extra}, format="json")
+
+
+@pytest.mark.django_db
+def test_second_user_gets_a_copy_without_pipeline(users, pipeline_runs):
+    alice, bob = users
+    first = create(alice)
+    assert first.status_code == 201 and first["X-Quiz-Source"] == "generated"
+
+    second = create(bob, url="https://youtu.be/reusevid")
+    assert second.status_code == 201
+    assert second["X-Quiz-Source"] == "reused" and second["X-Transcript-Source"] == "captions"
+    assert len(pipeline_runs) == 1
+
+    a, b = first.json(), second.json()
+    assert b["id"] != a["id"] and b["title"] == a["title"]
+    assert [q["question_title"] for q in b["questions"]] == [q["question_title"] for q in a["questions"]]
+    assert set(Quiz.objects.values_list("video_id", flat=True)) == {"reusevid"}
+    assert Quiz.objects.get(id=b["id"]).owner == bob
+    assert GeneratedQuiz.objects.get(video_id="reusevid").reuse_count == 1
+
+
+@pytest.mark.django_db
+def test_force_regenerate_runs_pipeline(users, pipeline_runs):
+    alice, bob = users
+    create(alice)
+    resp = create(bob, force_regenerate=True)
+    assert resp.status_code == 201 and resp["X-Quiz-Source"] == "generated"
+    assert len(pipeline_runs) == 2
+    assert GeneratedQuiz.objects.count() == 1
+
+
+@pytest.mark.django_db
+def test_stale_or_other_prompt_version_is_not_reused(users, pipeline_runs, monkeypatch):
+    alice, bob = users
+    create(alice)
+    monkeypatch.setenv("QUIZ_QUESTION_COUNT", "5")  # part of the prompt version
+    assert create(bob)["X-Quiz-Source"] == "generated"
+    monkeypatch.setenv("QUIZ_REUSE_TTL_SEC", "0")
+    assert create(bob)["X-Quiz-Source"] == "generated"
+    assert len(pipeline_runs) == 3
+
+
+@pytest.mark.django_db
+def test_background_job_reuses_canonical_quiz(users, pipeline_runs):
+    alice, bob = users
+    create(alice)
+    QuizJob.objects.create(owner=bob, video_url=URL)
+    job = run_job(claim_next_job())
+    assert job.status == QuizJob.STATUS_SUCCEEDED
+    assert job.quiz.owner == bob and job.transcript_source == "captions"
+    assert len(pipeline_runs) == 1
+
+
+@pytest.mark.django_db
+def test_migration_backfills_video_ids(users):
+    alice, _ = users
+    urls = [
+        "https://www.youtube.com/watch?v=abc123XYZ&t=42",
+        "https://youtu.be/def456UVW",
+        "https://www.youtube.com/live/ghi789RST",
+        "",
+    ]
+    for url in urls:
+        Quiz.objects.create(owner=alice, title="t", video_url=url)
+    migration = importlib.import_module("app_quiz.migrations.0008_canonical_generated_quiz")
+    migration.backfill_video_ids(apps, None)
+    assert list(Quiz.objects.order_by("id").values_list("video_id", flat=True)) == [
+        "abc123XYZ", "def456UVW", "ghi789RST", "",
+    ]
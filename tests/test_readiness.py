@@ -0,0 +1,48 @@
+# tests/test_readiness.py
+import pytest
+from rest_framework.test import APIClient
+
+import app_quiz.utils as utils
+from app_quiz.apps import AppQuizConfig
+
+
+@pytest.fixture
+def api_client():
+    return APIClient()
+
+
+@pytest.fixture
+def cold_whisper(monkeypatch):
+    monkeypatch.setattr(utils, "_WHISPER_MODEL_OBJ", None)
+
+
+def test_ready_without_preload(api_client, cold_whisper, monkeypatch):
+    monkeypatch.delenv("WHISPER_PRELOAD", raising=False)
+    resp = api_client.get("/api/health/ready/")
+    assert resp.status_code == 200
+    assert resp.json()["whisper_loaded"] is False
+
+
+def test_not_ready_until_preloaded(api_client, cold_whisper, monkeypatch):
+    monkeypatch.setenv("WHISPER_PRELOAD", "1")
+    assert api_client.get("/api/health/ready/").status_code == 503
+
+    utils.preload_whisper_model()
+    resp = api_client.get("/api/health/ready/")
+    assert resp.status_code == 200
+    assert resp.json()["whisper_loaded"] is True
+
+
+def test_app_ready_hook_preloads_only_in_server(cold_whisper, monkeypatch):
+    import app_quiz
+
+    monkeypatch.setenv("WHISPER_PRELOAD", "1")
+    config = AppQuizConfig("app_quiz", app_quiz)
+
+    monkeypatch.delenv("QUIZLY_SERVER_PROCESS", raising=False)
+    config.ready()
+    assert not utils.whisper_model_loaded()
+
+    monkeypatch.setenv("QUIZLY_SERVER_PROCESS", "gunicorn")
+    config.ready()
+    assert utils.whisper_model_loaded()
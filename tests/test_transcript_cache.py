@@ -0,0 +1,74 @@
+# tests/test_transcript_cache.py
+import os
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+import app_quiz.utils as utils
+from app_quiz import transcript_cache
+from app_quiz.models import TranscriptCache
+
+
+@pytest.fixture
+def fake_download(monkeypatch):
+    calls = []
+
+    def _download(tempdir, video_url, progress=None):
+        calls.append(video_url)
+        path = os.path.join(tempdir, "audio.m4a")
+        with open(path, "wb") as fh:
+            fh.write(b"\0")
+        return path
+
+    monkeypatch.setattr(utils, "_download_audio_to", _download)
+    monkeypatch.setenv("GEMINI_API_KEY", "test-key")
+    return calls
+
+
+@pytest.mark.django_db
+def test_store_and_get_roundtrip_counts_hits():
+    transcript_cache.store_transcript("abc", "base", "hello world", language="en", duration=12.5)
+    assert transcript_cache.get_cached_transcript("abc", "small") is None
+
+    hit = transcript_cache.get_cached_transcript("abc", "base")
+    assert hit == {"text": "hello world", "language": "en", "duration": 12.5}
+
+    row = TranscriptCache.objects.get(video_id="abc")
+    assert row.hit_count == 1
+    assert row.miss_count == 1
+    assert bytes(row.transcript) != b"hello world"  # stored compressed
+
+
+@pytest.mark.django_db
+def test_repeat_generation_skips_download(fake_download):
+    utils.generate_quiz_from_youtube("https://www.youtube.com/watch?v=vid123")
+    utils.generate_quiz_from_youtube("https://youtu.be/vid123")
+
+    assert len(fake_download) == 1
+    stats = transcript_cache.cache_stats()
+    assert stats["hits"] == 1 and stats["misses"] == 1
+
+
+@pytest.mark.django_db
+def test_cache_can_be_disabled(fake_download, monkeypatch):
+    monkeypatch.setenv("TRANSCRIPT_CACHE", "0")
+    utils.generate_quiz_from_youtube("https://www.youtube.com/watch?v=vid123")
+    utils.generate_quiz_from_youtube("https://www.youtube.com/watch?v=vid123")
+    assert len(fake_download) == 2
+    assert not TranscriptCache.objects.exists()
+
+
+@pytest.mark.django_db
+def test_evict_by_age_then_size():
+    for i in range(4):
+        transcript_cache.store_transcript(f"v{i}", "base", "x" * 200 * (i + 1))
+    TranscriptCache.objects.filter(video_id="v0").update(last_used_at=timezone.now() - timedelta(days=40))
+    TranscriptCache.objects.filter(video_id="v1").update(last_used_at=timezone.now() - timedelta(days=2))
+
+    assert transcript_cache.evict_transcripts(max_age_days=30) == 1
+    assert not TranscriptCache.objects.filter(video_id="v0").exists()
+
+    newest = TranscriptCache.objects.get(video_id="v3").size_bytes
+    transcript_cache.evict_transcripts(max_total_bytes=newest)
+    assert list(TranscriptCache.objects.values_list("video_id", flat=True)) == ["v3"]
@@ -0,0 +1,86 @@
+# tests/test_vad.py
+import numpy as np
+import pytest
+from django.contrib.auth import get_user_model
+
+import app_quiz.utils as utils
+from app_quiz import captions, vad
+from app_quiz.jobs import claim_next_job, run_job
+from app_quiz.models import QuizJob
+
+SR = 16000
+User = get_user_model()
+
+
+def tone(seconds, amplitude=0.3):
+    t = np.arange(int(seconds * SR)) / SR
+    return (amplitude * np.sin(2 * np.pi * 220 * t)).astype(np.float32)
+
+
+def hiss(seconds, amplitude=1e-4, seed=0):
+    return (amplitude * np.random.default_rng(seed).standard_normal(int(seconds * SR))).astype(np.float32)
+
+
+def lecture():
+    # 3 s dead air, 2 s speech, 5 s pause, 2 s speech, 0.5 s breath, 1 s speech, 4 s tail
+    return np.concatenate([hiss(3), tone(2), hiss(5, seed=1), tone(2), hiss(0.5, seed=2), tone(1), hiss(4, seed=3)])
+
+
+def test_long_silences_are_removed_short_pauses_kept():
+    samples = lecture()
+    trimmed, speech_map = vad.trim_silence(samples)
+    # three tone bursts, the 0.5 s pause stays; padding adds a little on each side
+    assert 5.5 <= len(trimmed) / SR <= 7.5
+    assert len(speech_map.segments) == 2
+    assert speech_map.original_sec == pytest.approx(len(samples) / SR)
+    assert speech_map.removed_sec == pytest.approx((len(samples) - len(trimmed)) / SR)
+
+
+def test_speech_map_points_back_to_original():
+    trimmed, speech_map = vad.trim_silence(lecture())
+    second_start = speech_map.segments[1][0]
+    # start of the second kept region lies shortly before the tone at 10 s
+    assert 9.5 <= speech_map.to_original(second_start) <= 10.0
+    assert speech_map.to_original(0.0) == pytest.approx(speech_map.segments[0][1])
+
+
+def test_continuous_speech_is_untouched():
+    samples = np.concatenate([tone(3), tone(2, amplitude=0.05)])
+    trimmed, speech_map = vad.trim_silence(samples)
+    assert trimmed is samples
+    assert speech_map.removed_sec == 0
+
+
+def test_audio_without_speech_is_kept():
+    samples = np.zeros(5 * SR, dtype=np.float32)
+    trimmed, speech_map = vad.trim_silence(samples)
+    assert trimmed is samples
+    assert speech_map.removed_sec == 0
+
+
+@pytest.mark.django_db
+def test_job_records_trimmed_seconds(monkeypatch, tmp_path):
+    monkeypatch.setenv("GEMINI_API_KEY", "test-key")
+    monkeypatch.setattr(captions, "fetch_captions", lambda url, opts, info=None: None)
+    monkeypatch.setattr(utils, "_decode_audio", lambda path, tempdir: lecture())
+
+    def fake_download(tempdir, url, progress=None):
+        path = tmp_path / "audio.m4a"
+        path.write_bytes(b"\0")
+        return str(path)
+
+    monkeypatch.setattr(utils, "_download_audio_to", fake_download)
+    owner = User.objects.create_user(username="vad", password="password123")
+    QuizJob.objects.create(owner=owner, video_url="https://www.youtube.com/watch?v=vadvid")
+
+    job = run_job(claim_next_job())
+    assert job.status == QuizJob.STATUS_SUCCEEDED
+    assert 10 <= job.audio_trimmed_sec <= 12
+
+
+@pytest.mark.django_db
+def test_vad_can_be_disabled(monkeypatch):
+    monkeypatch.setenv("AUDIO_VAD", "0")
+    monkeypatch.setattr(utils, "_decode_audio", lambda path, tempdir: lecture())
+    result = utils.providers.WhisperTranscriber().transcribe("audio.m4a", "/tmp")
+    assert "removed_sec" not in result
@@ -0,0 +1,158 @@
+# tests/test_video_probe.py
+import pytest
+from django.contrib.auth import get_user_model
+from rest_framework.test import APIClient
+
+import app_quiz.utils as utils
+from app_quiz import captions, video_probe
+from app_quiz.models import VideoMetadata
+
+User = get_user_model()
+
+VTT_TRACK = [{"ext": "vtt", "url": "https://x/vtt"}]
+
+
+def make_ydl(info, calls):
+    class _ProbeYDL:
+        def __init__(self, *args, **kwargs):
+            pass
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            pass
+
+        def extract_info(self, url, download=True):
+            assert download is False
+            calls.append(url)
+            return dict(info)
+
+    return _ProbeYDL
+
+
+@pytest.fixture
+def probe_info(monkeypatch):
+    calls = []
+    info = {"title": "Graph Algorithms, Lecture 3", "duration": 1800, "language": "en"}
+    monkeypatch.setattr(video_probe.yt_dlp, "YoutubeDL", lambda *a, **k: make_ydl(info, calls)())
+    monkeypatch.setenv("GEMINI_API_KEY", "test-key")
+    return info, calls
+
+
+def no_download(*args, **kwargs):
+    raise AssertionError("audio must not be downloaded")
+
+
+@pytest.mark.django_db
+def test_probe_is_cached_per_video(probe_info):
+    info, calls = probe_info
+    first = video_probe.probe("vid1", "https://www.youtube.com/watch?v=vid1", {})
+    second = video_probe.probe("vid1", "https://www.youtube.com/watch?v=vid1", {})
+    assert len(calls) == 1
+    assert first["cached"] is False and second["cached"] is True
+    assert second["title"] == info["title"] and second["duration"] == 1800
+    assert VideoMetadata.objects.get(video_id="vid1").language == "en"
+
+
+@pytest.mark.django_db
+def test_expired_probe_is_refreshed(probe_info, monkeypatch):
+    _, calls = probe_info
+    monkeypatch.setenv("VIDEO_METADATA_TTL_SEC", "0")
+    video_probe.probe("vid1", "u", {})
+    video_probe.probe("vid1", "u", {})
+    assert len(calls) == 2
+
+
+@pytest.mark.django_db
+def test_too_long_video_is_rejected_before_download(probe_info, monkeypatch):
+    info, _ = probe_info
+    info["duration"] = 5 * 3600
+    monkeypatch.setenv("QUIZ_MAX_VIDEO_SEC", "7200")
+    monkeypatch.setattr(utils, "_download_audio_to", no_download)
+    monkeypatch.setattr(captions, "fetch_captions", no_download)
+    with pytest.raises(ValueError, match="too long"):
+        utils.generate_quiz_from_youtube("https://www.youtube.com/watch?v=longvid")
+
+
+@pytest.mark.django_db
+def test_live_stream_is_rejected(probe_info):
+    info, _ = probe_info
+    info.update(is_live=True, duration=None)
+    with pytest.raises(ValueError, match="Live streams"):
+        utils.generate_quiz_from_youtube("https://www.youtube.com/watch?v=livevid")
+
+
+@pytest.mark.django_db
+def test_live_row_is_probed_again_after_the_stream_ended(probe_info, monkeypatch):
+    info, calls = probe_info
+    info.update(is_live=True, duration=None)
+    assert video_probe.probe("livevid", "u", {})["is_live"] is True
+    assert video_probe.probe("livevid", "u", {})["cached"] is True  # within the live TTL
+
+    monkeypatch.setenv("VIDEO_METADATA_LIVE_TTL_SEC", "0")
+    info.update(is_live=False, duration=3600)
+    meta = video_probe.probe("livevid", "u", {})
+    assert len(calls) == 2
+    assert meta["cached"] is False and meta["is_live"] is False
+    video_probe.check_limits(meta)  # no longer rejected
+    assert VideoMetadata.objects.get(video_id="livevid").is_live is False
+
+
+@pytest.mark.django_db
+def test_no_captions_skips_caption_lookup_and_uses_real_title(probe_info, monkeypatch, tmp_path):
+    monkeypatch.setattr(captions, "fetch_captions", no_download)
+
+    def fake_download(tempdir, url, progress=None):
+        path = tmp_path / "audio.m4a"
+        path.write_bytes(b"\0")
+        return str(path)
+
+    monkeypatch.setattr(utils, "_download_audio_to", fake_download)
+    hints = []
+    original = utils._build_prompt
+    monkeypatch.setattr(
+        utils, "_build_prompt",
+        lambda transcript, title_hint, *args, **kwargs: hints.append(title_hint) or original(
+            transcript, title_hint, *args, **kwargs
+        ),
+    )
+    quiz = utils.generate_quiz_from_youtube("https://www.youtube.com/watch?v=nocaps")
+    assert quiz["meta"]["transcript_source"] == "whisper"
+    assert hints and set(hints) == {"Graph Algorithms, Lecture 3"}
+
+
+@pytest.mark.django_db
+def test_fresh_probe_info_is_reused_for_captions(probe_info, monkeypatch):
+    info, calls = probe_info
+    info["subtitles"] = {"en": VTT_TRACK}
+    seen = []
+
+    def fake_fetch(url, opts, info=None):
+        seen.append(info)
+        return {"text": "caption transcript", "language": "en", "kind": "manual"}
+
+    monkeypatch.setattr(captions, "fetch_captions", fake_fetch)
+    quiz = utils.generate_quiz_from_youtube("https://www.youtube.com/watch?v=capsvid")
+    assert quiz["meta"]["transcript_source"] == "captions"
+    assert seen[0]["subtitles"] == {"en": VTT_TRACK}
+    assert len(calls) == 1
+
+
+def test_has_usable_track_matches_pick_track():
+    assert captions.has_usable_track(["en-GB"], [], ["en"])
+    assert captions.has_usable_track([], ["de-orig"], ["de"])
+    assert not captions.has_usable_track(["fr"], ["es"], ["en", "de"])
+
+
+@pytest.mark.django_db
+def test_create_quiz_returns_400_for_too_long_video(probe_info, monkeypatch):
+    info, _ = probe_info
+    info["duration"] = 4 * 3600
+    monkeypatch.setattr(utils, "_download_audio_to", no_download)
+    User.objects.create_user(username="alice", password="password123")
+    client = APIClient()
+    client.post("/api/login/", {"username": "alice", "password": "password123"}, format="json")
+    resp = client.post("/api/createQuiz/", {"url": "https://www.youtube.com/watch?v=longvid"}, format="json")
+    assert resp.status_code == 400
+    assert "too long" in resp.json()["url"]
@@ -0,0 +1,59 @@
+# tests/test_whisper_profile.py
+import io
+import json
+
+import numpy as np
+from django.core.management import call_command
+
+import app_quiz.utils as utils
+from app_quiz import audio, transcription
+from app_quiz.transcription import CpuProfile, word_error_rate
+
+
+def test_default_profile_keeps_plain_options(monkeypatch):
+    for name in ("WHISPER_INT8", "WHISPER_TORCH_THREADS", "WHISPER_LANGUAGE",
+                 "WHISPER_BEAM_SIZE", "WHISPER_CONDITION_ON_PREVIOUS"):
+        monkeypatch.delenv(name, raising=False)
+    assert utils._whisper_decode_options() == {"temperature": 0, "fp16": False}
+
+
+def test_profile_from_env(monkeypatch):
+    monkeypatch.setenv("WHISPER_INT8", "1")
+    monkeypatch.setenv("WHISPER_TORCH_THREADS", "3")
+    monkeypatch.setenv("WHISPER_LANGUAGE", "DE")
+    monkeypatch.setenv("WHISPER_BEAM_SIZE", "5")
+    monkeypatch.setenv("WHISPER_CONDITION_ON_PREVIOUS", "0")
+    profile = CpuProfile.from_env()
+    assert profile.int8 and profile.threads == 3
+    assert profile.decode_options() == {
+        "temperature": 0, "fp16": False, "language": "de",
+        "beam_size": 5, "condition_on_previous_text": False,
+    }
+
+
+def test_greedy_beam_size_is_not_passed():
+    assert "beam_size" not in CpuProfile(beam_size=1).decode_options()
+
+
+def test_word_error_rate():
+    assert word_error_rate("The cat sat.", "the cat sat") == 0
+    assert word_error_rate("a b c d", "a x c") == 0.5  # one substitution, one deletion
+    assert word_error_rate("", "") == 0
+    assert word_error_rate("", "extra") == 1
+
+
+def test_benchmark_whisper_reports_rtf_and_wer(tmp_path, monkeypatch):
+    monkeypatch.setattr(audio, "decode_pcm", lambda path: np.zeros(transcription.SAMPLE_RATE * 4, np.float32))
+    reference = tmp_path / "ref.txt"
+    reference.write_text("dummy transcript", encoding="utf-8")
+    out = io.StringIO()
+    call_command(
+        "benchmark_whisper", "--audio", str(tmp_path / "sample.wav"), "--reference", str(reference),
+        "--language", "en", "--beam-size", "1", "--json", stdout=out,
+    )
+    report = json.loads(out.getvalue())
+    assert report["audio_sec"] == 4
+    assert set(report["settings"]) == {"baseline", "profile"}
+    assert report["settings"]["profile"]["options"]["language"] == "en"
+    for row in report["settings"].values():
+        assert row["rtf"] >= 0 and row["wer"] == 0